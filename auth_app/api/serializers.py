@@ -1,14 +1,19 @@
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from auth_app.email_lookup import invalidate_email_lookup
+
 class RegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration.   
     Handles user registration with fullname instead of separate first_name and last_name fields.
-    Validates that passwords match and email is unique before creating a new user account.
-    Automatically creates an authentication token for the new user.
+    Validates that passwords match and email is unique before the password is hashed,
+    so duplicate attempts stay cheap. The unique index on auth_user.email catches
+    concurrent registrations of the same address.
+    Automatically creates an authentication token for the new user in the same transaction.
     """
     fullname = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -48,14 +53,22 @@ class RegistrationSerializer(serializers.ModelSerializer):
         first_name = name_parts[0] if len(name_parts) > 0 else ''
         last_name = name_parts[1] if len(name_parts) > 1 else ''
 
-        user = User.objects.create_user(
-            username=validated_data['email'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=first_name,
-            last_name=last_name
-        )
-
-        Token.objects.create(user=user)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=validated_data['email'],
+                    email=validated_data['email'],
+                    password=validated_data['password'],
+                    first_name=first_name,
+                    last_name=last_name
+                )
+                Token.objects.create(user=user)
+        except IntegrityError:
+            if User.objects.filter(email=validated_data['email']).exists():
+                raise serializers.ValidationError({'email': ['Email already exists']})
+            if User.objects.filter(username=validated_data['email']).exists():
+                raise serializers.ValidationError({'email': ['Email is already used as a username']})
+            raise
 
-        return user
\ No newline at end of file
+        invalidate_email_lookup(user.email)
+        return user
@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 from django.contrib.auth import authenticate
 
 from rest_framework import status
@@ -6,16 +8,21 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 
+from core.metrics import InstrumentedViewMixin
+from core.throttling import LoginAccountRateThrottle, LoginRateThrottle, RegisterRateThrottle
+
 from .serializers import RegistrationSerializer
 
 
-class RegisterView(APIView):
+class RegisterView(InstrumentedViewMixin, APIView):
     """
     API view for user registration.   
     Allows any user to register a new account by providing fullname, email, and password.
     Automatically creates an authentication token for the new user.
+    Registrations are throttled per client address.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterRateThrottle]
     
     def post(self, request):
         serializer = RegistrationSerializer(data=request.data)
@@ -30,15 +37,19 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class LoginView(APIView):
+class LoginView(InstrumentedViewMixin, APIView):
     """
     API view for user authentication.   
     Authenticates users with email and password (email is used as username).
     Returns or creates an authentication token upon successful login.
+    Attempts are throttled per client address and per account before the password is checked.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle, LoginAccountRateThrottle]
     
     def post(self, request):
+        if not isinstance(request.data, Mapping):
+            return Response({"error": "Email and password are required."}, status=status.HTTP_400_BAD_REQUEST)
         email = request.data.get('email')
         password = request.data.get('password')
         
@@ -48,7 +59,10 @@ class LoginView(APIView):
         user = authenticate(username=email, password=password)
         
         if user:
-            token, created = Token.objects.get_or_create(user=user)
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token, created = Token.objects.get_or_create(user=user)
             return Response({
                 "token": token.key,
                 "fullname": f"{user.first_name} {user.last_name}".strip(),
@@ -59,7 +73,7 @@ class LoginView(APIView):
         return Response({"error": "Invalid email or password."}, status=status.HTTP_400_BAD_REQUEST)
     
 
-class LogoutView(APIView):
+class LogoutView(InstrumentedViewMixin, APIView):
     """
     API view for user logout.    
     Requires authentication. Deletes the user's authentication token to log them out.
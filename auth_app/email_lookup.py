@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+from core.metrics import cache_lookup
+
+
+CACHE_KEY_PREFIX = 'email_lookup:'
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def cache_key(email):
+    return f"{CACHE_KEY_PREFIX}{normalize_email(email)}"
+
+
+def lookup_users_by_email(emails):
+    """
+    Resolve email addresses to user data, case-insensitively.
+    Results (including misses) are cached for EMAIL_CHECK_CACHE_TIMEOUT seconds.
+    All addresses missing from the cache are resolved with one IN query on the
+    LOWER(email) index.
+    Args:
+        emails: Iterable of email addresses
+    Returns:
+        dict: Normalized email mapped to {'id', 'email', 'fullname'} or None if not registered
+    """
+    normalized = {normalize_email(email) for email in emails}
+    cached = cache.get_many([cache_key(email) for email in normalized])
+    results = {email: cached[cache_key(email)] or None for email in normalized if cache_key(email) in cached}
+
+    missing = normalized - results.keys()
+    cache_lookup('email_lookup', True, len(results))
+    cache_lookup('email_lookup', False, len(missing))
+    if missing:
+        users = (
+            User.objects.alias(email_lower=Lower('email'))
+            .filter(email_lower__in=missing)
+            .order_by('id')
+            .values('id', 'email', 'first_name', 'last_name')
+        )
+        found = {}
+        for user in users:
+            found.setdefault(normalize_email(user['email']), {
+                'id': user['id'],
+                'email': user['email'],
+                'fullname': f"{user['first_name']} {user['last_name']}".strip(),
+            })
+        cache.set_many(
+            {cache_key(email): found.get(email, False) for email in missing},
+            getattr(settings, 'EMAIL_CHECK_CACHE_TIMEOUT', 30),
+        )
+        results.update({email: found.get(email) for email in missing})
+
+    return results
+
+
+def invalidate_email_lookup(email):
+    """
+    Drop a cached lookup result, e.g. after a user registered with this email.
+    """
+    cache.delete(cache_key(email))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt hasher with cost parameters taken from PASSWORD_HASHER_PARAMS['scrypt'].
+    Hashes created with other parameters are upgraded on the next successful login.
+    """
+    def __init__(self):
+        params = getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get('scrypt', {})
+        self.work_factor = params.get('work_factor', self.work_factor)
+        self.block_size = params.get('block_size', self.block_size)
+        self.parallelism = params.get('parallelism', self.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher with cost parameters taken from PASSWORD_HASHER_PARAMS['argon2'].
+    Requires the optional argon2-cffi package.
+    """
+    def __init__(self):
+        params = getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get('argon2', {})
+        self.time_cost = params.get('time_cost', self.time_cost)
+        self.memory_cost = params.get('memory_cost', self.memory_cost)
+        self.parallelism = params.get('parallelism', self.parallelism)
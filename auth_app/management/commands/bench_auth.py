@@ -0,0 +1,67 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from rest_framework.authtoken.models import Token
+
+from auth_app.api.serializers import RegistrationSerializer
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the registration and login paths for the configured password hasher profiles.
+    All users created by the benchmark are rolled back at the end.
+    """
+    help = 'Measure registrations/sec and logins/sec per password hasher profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20, help='Registrations and logins per profile.')
+        parser.add_argument('--profile', action='append', choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+                            help='Hasher profile to benchmark, can be repeated. Defaults to all profiles.')
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or sorted(settings.PASSWORD_HASHER_PROFILES)
+        self.stdout.write(f"{'profile':<10}{'registrations/s':>18}{'logins/s':>12}")
+
+        for profile in profiles:
+            hashers = [settings.PASSWORD_HASHER_PROFILES[profile]] + settings.PASSWORD_HASHERS
+            try:
+                with override_settings(PASSWORD_HASHERS=hashers), transaction.atomic():
+                    registrations, logins = self.run_profile(options['count'])
+                    transaction.set_rollback(True)
+            except ValueError as error:
+                self.stdout.write(f"{profile:<10}  skipped: {error}")
+                continue
+            self.stdout.write(f"{profile:<10}{registrations:>18.1f}{logins:>12.1f}")
+
+    def run_profile(self, count):
+        prefix = uuid.uuid4().hex[:8]
+        credentials = [(f"bench-{prefix}-{i}@example.com", f"Bench-{prefix}-pw-{i}") for i in range(count)]
+
+        start = time.perf_counter()
+        for email, password in credentials:
+            serializer = RegistrationSerializer(data={
+                'fullname': 'Bench User',
+                'email': email,
+                'password': password,
+                'repeated_password': password,
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        registration_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for email, password in credentials:
+            user = authenticate(username=email, password=password)
+            try:
+                user.auth_token
+            except Token.DoesNotExist:
+                Token.objects.get_or_create(user=user)
+        login_time = time.perf_counter() - start
+
+        return count / registration_time, count / login_time
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:30
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Abort before the unique index is created if users share an email address,
+    listing the addresses so they can be resolved by hand.
+    """
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias)
+        .exclude(email='')
+        .values('email')
+        .annotate(users=Count('id'))
+        .filter(users__gt=1)
+        .order_by('email')
+        .values_list('email', 'users')
+    )
+    if duplicates:
+        listed = ', '.join(f'{email} ({users} users)' for email, users in duplicates[:20])
+        more = f' and {len(duplicates) - 20} more' if len(duplicates) > 20 else ''
+        raise RuntimeError(
+            "Cannot make user emails unique, these addresses are used by several users: "
+            f"{listed}{more}. Change or clear the duplicate emails and run migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_uniq ON auth_user (email) WHERE email <> '';",
+            reverse_sql="DROP INDEX auth_user_email_uniq;",
+        ),
+    ]
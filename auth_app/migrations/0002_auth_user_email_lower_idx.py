@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0001_auth_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX auth_user_email_lower_idx ON auth_user (LOWER(email));",
+            reverse_sql="DROP INDEX auth_user_email_lower_idx;",
+        ),
+    ]
@@ -0,0 +1,14 @@
+"""
+ASGI config for the API-only workers of the Core project.
+
+Uses the lean core.settings_api profile; serve the admin from a separate
+process with core.asgi.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings_api')
+
+application = get_asgi_application()
@@ -0,0 +1,400 @@
+import atexit
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import math
+import os
+import secrets
+import threading
+import time
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+EXITED_FILENAME = 'metrics-exited.json'
+
+_request_queries = contextvars.ContextVar('kanban_request_queries', default=None)
+
+
+class Counter:
+    """
+    Monotonic counter per label combination.
+    Labels are passed positionally in the order of labelnames.
+    """
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets per label combination.
+    Stores one count per bucket (not cumulative) and the sum of the observed values.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), [list(counts), total]] for labels, (counts, total) in self.values.items()]
+
+
+class CallbackGauge:
+    """
+    Gauge read from a callback when the metrics are collected, e.g. a queue length.
+    Values of several processes are added up.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = ()
+        self.callback = callback
+
+    def snapshot(self):
+        try:
+            return [[[], self.callback()]]
+        except Exception:
+            logger.exception("Metrics callback %s failed", self.name)
+            return []
+
+
+class Registry:
+    """
+    In-process metrics registry.
+    With KANBAN_METRICS_DIR set, every process writes its snapshot to a file in that
+    directory (at most every KANBAN_METRICS_FLUSH_INTERVAL seconds, and at exit), and
+    collect() adds up the snapshots of all processes. Files are named by pid and a random
+    token per process, so a reused pid (e.g. in another container) never overwrites the
+    file of an exited process. Counters and histograms of exited processes are kept so
+    totals never go backwards, their gauges are dropped; compact() folds them into one file.
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        self.exit_hook = False
+        self.process = None
+
+    def register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def snapshot(self):
+        return {
+            metric.name: {
+                'type': metric.type,
+                'help': metric.documentation,
+                'labels': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'values': metric.snapshot(),
+            }
+            for metric in list(self.metrics.values())
+        }
+
+    def maybe_flush(self):
+        """Write this process' snapshot if multi-process mode is on and the flush interval passed."""
+        directory = settings.KANBAN_METRICS_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self.last_flush < settings.KANBAN_METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory=None):
+        directory = directory or settings.KANBAN_METRICS_DIR
+        if not directory:
+            return
+        if not self.exit_hook:
+            self.exit_hook = True
+            atexit.register(self.flush)
+        pid, token = self.process_key()
+        write_snapshot(os.path.join(directory, f'metrics-{pid}-{token}.json'), {'pid': pid, 'metrics': self.snapshot()})
+
+    def process_key(self):
+        """The pid and a random token of this process, renewed in forked children."""
+        pid = os.getpid()
+        if self.process is None or self.process[0] != pid:
+            self.process = (pid, secrets.token_hex(4))
+        return self.process
+
+    def collect(self):
+        """
+        Snapshot of this process, or of all processes in multi-process mode.
+        Returns:
+            dict: Metric name mapped to type, help, labels, buckets and merged values
+        """
+        directory = settings.KANBAN_METRICS_DIR
+        if not directory:
+            return self.snapshot()
+
+        self.flush(directory)
+        merged = {}
+        for _, data in read_snapshots(directory):
+            merge_snapshot(merged, data['metrics'], gauges=process_alive(data['pid']))
+        return unpack_values(merged)
+
+    def compact(self, directory=None, min_age=3600):
+        """
+        Fold the snapshots of exited processes into a single file and delete theirs,
+        so the directory does not grow with every worker restart. Totals stay the same.
+        Processes are checked by pid, so run it on the host of the workers, one run at a time.
+        Args:
+            directory: Snapshot directory, defaults to KANBAN_METRICS_DIR
+            min_age: Only fold files not written for this many seconds
+        Returns:
+            int: Number of removed snapshot files
+        """
+        directory = directory or settings.KANBAN_METRICS_DIR
+        if not directory:
+            return 0
+        merged, exited = {}, []
+        now = time.time()
+        for path, data in read_snapshots(directory):
+            if os.path.basename(path) == EXITED_FILENAME:
+                merge_snapshot(merged, data['metrics'], gauges=False)
+            elif not process_alive(data['pid']) and now - os.path.getmtime(path) >= min_age:
+                merge_snapshot(merged, data['metrics'], gauges=False)
+                exited.append(path)
+        if not exited or not write_snapshot(os.path.join(directory, EXITED_FILENAME), {'pid': None, 'metrics': unpack_values(merged)}):
+            return 0
+        for path in exited:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(exited)
+
+    def render(self):
+        """Render the collected metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for labels, value in sorted(metric['values'], key=lambda item: item[0]):
+                pairs = list(zip(metric['labels'], labels))
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{format_labels(pairs)} {format_value(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip([*metric['buckets'], math.inf], counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels([*pairs, ('le', format_value(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(pairs)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(pairs)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def write_snapshot(path, data):
+    """Write a snapshot file atomically. Returns whether it was written."""
+    temporary = f'{path}.tmp'
+    try:
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(temporary, path)
+    except OSError:
+        logger.exception("Could not write metrics to %s", path)
+        return False
+    return True
+
+
+def read_snapshots(directory):
+    """Yield the path and content of every readable snapshot file in the directory."""
+    for filename in sorted(os.listdir(directory)):
+        if not (filename.startswith('metrics-') and filename.endswith('.json')):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        yield path, data
+
+
+def merge_snapshot(merged, metrics, gauges=True):
+    """Add the values of a snapshot to merged, keyed by metric name and label tuple."""
+    for name, metric in metrics.items():
+        if metric['type'] == 'gauge' and not gauges:
+            continue
+        target = merged.setdefault(name, {**metric, 'values': {}})
+        for labels, value in metric['values']:
+            key = tuple(labels)
+            target['values'][key] = merge_values(target['values'].get(key), value)
+
+
+def unpack_values(merged):
+    for metric in merged.values():
+        metric['values'] = [[list(labels), value] for labels, value in metric['values'].items()]
+    return merged
+
+
+def merge_values(current, value):
+    if current is None:
+        return value
+    if isinstance(value, list):
+        counts, total = value
+        return [[a + b for a, b in zip(current[0], counts)], current[1] + total]
+    return current + value
+
+
+def process_alive(pid):
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    return '+Inf' if value == math.inf else repr(value)
+
+
+registry = Registry()
+
+REQUESTS = registry.counter('kanmind_http_requests_total', 'API requests by view, method and status code.', ('view', 'method', 'status'))
+REQUEST_DURATION = registry.histogram('kanmind_http_request_duration_seconds', 'API request duration by view.', ('view',))
+REQUEST_QUERIES = registry.histogram('kanmind_http_request_db_queries', 'Database queries per API request by view.', ('view',), QUERY_COUNT_BUCKETS)
+DB_QUERIES = registry.counter('kanmind_db_queries_total', 'Database queries by database alias and statement type.', ('database', 'statement'))
+DB_ERRORS = registry.counter('kanmind_db_errors_total', 'Failed database queries by database alias.', ('database',))
+DB_DURATION = registry.histogram('kanmind_db_query_duration_seconds', 'Database query duration by database alias.', ('database',))
+PERMISSION_CHECKS = registry.counter('kanmind_permission_checks_total', 'Permission checks by permission class, check and result.', ('permission', 'check', 'result'))
+CACHE_REQUESTS = registry.counter('kanmind_cache_requests_total', 'Cache lookups by cache and result (hit or miss).', ('cache', 'result'))
+
+STATEMENTS = frozenset(('SELECT', 'INSERT', 'UPDATE', 'DELETE'))
+
+
+def query_metrics(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting and timing every query.
+    Installed on each connection by install_query_metrics().
+    """
+    start = time.perf_counter()
+    alias = context['connection'].alias
+    try:
+        return execute(sql, params, many, context)
+    except Exception:
+        DB_ERRORS.inc(alias)
+        raise
+    finally:
+        DB_DURATION.observe(time.perf_counter() - start, alias)
+        statement = sql[:6].upper()
+        DB_QUERIES.inc(alias, statement if statement in STATEMENTS else 'OTHER')
+        queries = _request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    """connection_created handler adding query_metrics to the connection's execute wrappers once."""
+    if query_metrics not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_metrics)
+
+
+def cache_lookup(cache, hit, amount=1):
+    """Count cache hits or misses of one of the application caches."""
+    if amount:
+        CACHE_REQUESTS.inc(cache, 'hit' if hit else 'miss', amount=amount)
+
+
+def count_permission_check(method):
+    """
+    Decorator for has_permission / has_object_permission recording the result per permission class.
+    """
+    check = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, request, view, *args):
+        allowed = method(self, request, view, *args)
+        PERMISSION_CHECKS.inc(type(self).__name__, check, 'allow' if allowed else 'deny')
+        return allowed
+    return wrapper
+
+
+class InstrumentedViewMixin:
+    """
+    API view mixin recording request count, duration and database queries per view.
+    Must come first in the bases so the measurement includes the other mixins.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_queries.reset(token)
+            view = type(self).__name__
+            REQUESTS.inc(view, request.method, str(status_code))
+            REQUEST_DURATION.observe(elapsed, view)
+            REQUEST_QUERIES.observe(queries[0], view)
+            registry.maybe_flush()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +51,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -67,6 +71,10 @@ CORS_ALLOWED_ORIGINS = [
     'http://localhost:5500',
 ]
 
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match')
+
+CORS_EXPOSE_HEADERS = ['ETag']
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -95,6 +103,21 @@ DATABASES = {
     }
 }
 
+# Board sharding
+# Boards with their tasks, comments and analytics rows are spread over KANBAN_SHARDS
+# (database aliases, 'default' first). Set KANMIND_SHARDS=<n> to add n-1 SQLite shards.
+# Users, tokens, saved views and the routing index stay in 'default'; users are mirrored into every shard.
+
+KANBAN_SHARDS = ['default']
+for shard_index in range(1, int(os.environ.get('KANMIND_SHARDS', '1'))):
+    DATABASES[f'shard_{shard_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_shard_{shard_index}.sqlite3',
+    }
+    KANBAN_SHARDS.append(f'shard_{shard_index}')
+
+DATABASE_ROUTERS = ['kanban_app.sharding.BoardShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -115,6 +138,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/6.0/topics/auth/passwords/
+# The first hasher of the selected profile hashes new passwords. The remaining hashers
+# only verify existing hashes, which are rehashed with the preferred hasher on the next
+# successful login. The 'argon2' profile requires the argon2-cffi package.
+
+PASSWORD_HASHER_PROFILE = os.environ.get('KANMIND_PASSWORD_HASHER', 'scrypt')
+
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'auth_app.hashers.TunedScryptPasswordHasher',
+    'argon2': 'auth_app.hashers.TunedArgon2PasswordHasher',
+}
+
+PASSWORD_HASHER_PARAMS = {
+    'scrypt': {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1},
+    'argon2': {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+}
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in [
+        ('pbkdf2', 'django.contrib.auth.hashers.PBKDF2PasswordHasher'),
+        ('pbkdf2_sha1', 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'),
+        ('argon2', 'django.contrib.auth.hashers.Argon2PasswordHasher'),
+        ('bcrypt', 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher'),
+        ('scrypt', 'django.contrib.auth.hashers.ScryptPasswordHasher'),
+    ] if profile != PASSWORD_HASHER_PROFILE
+]
+
+AUTHENTICATION_BACKENDS = [
+    'auth_app.backends.TokenPrefetchBackend',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -127,6 +184,31 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# The 'throttle' cache stores the token buckets of the API throttles. The in-memory
+# cache is per process; for several workers switch it to a shared store with an atomic
+# add(), such as the database cache, Memcached or Redis (not the file based cache).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kanmind-throttle',
+    },
+}
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Email check lookups (hits and misses) are cached for this many seconds.
+EMAIL_CHECK_CACHE_TIMEOUT = 30
+
+# Maximum number of addresses per batch email check.
+EMAIL_CHECK_BATCH_LIMIT = 50
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
@@ -143,4 +225,82 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-}
\ No newline at end of file
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserQuotaThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '1000/min',
+        'login': '10/min',
+        'login_account': '30/hour',
+        'register': '10/hour',
+        'email_check': '60/min',
+    },
+}
+
+# Response compression
+# JSON responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are compressed with
+# Brotli (if the optional `brotli` package is installed) or gzip, as accepted by the client.
+
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_CONTENT_TYPES = ['application/json']
+RESPONSE_COMPRESSION_GZIP_LEVEL = 6
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5
+
+# Kanban board deletion
+# Deleted boards are archived immediately and purged in chunks by a background thread.
+# Disable to leave purging to the `purge_boards` management command.
+
+KANBAN_BACKGROUND_PURGE = True
+
+# Task ordering
+# Tasks are ordered within a column by fractional rank keys. Keys grow when cards are
+# repeatedly moved into the same gap; columns with keys longer than the limit are
+# rebalanced by a background thread or the `rebalance_ranks` management command.
+
+KANBAN_RANK_REBALANCE_LENGTH = 48
+KANBAN_BACKGROUND_REBALANCE = True
+
+# Task history
+# Tasks done for longer than this many days are moved with their comments to the
+# history tables by the `move_to_history` management command (run it from cron).
+
+KANBAN_HISTORY_AFTER_DAYS = 90
+
+# Webhooks
+# Board events are queued in memory after commit and delivered by background threads
+# per process: batched per subscription for up to BATCH_WINDOW seconds, sent by WORKERS
+# threads (one host per thread at a time), retried with exponential backoff
+# (BACKOFF * 2^n seconds, at most MAX_BACKOFF) and stored as dead letters after
+# MAX_ATTEMPTS. Redeliver dead letters with `replay_webhooks`.
+# Webhook URLs must resolve to public addresses; ALLOWED_NETWORKS lists internal
+# networks (CIDR) that may be used anyway, e.g. ['10.1.0.0/16'].
+
+KANBAN_WEBHOOK_BACKGROUND = True
+KANBAN_WEBHOOK_QUEUE_SIZE = 10000
+KANBAN_WEBHOOK_BATCH_SIZE = 100
+KANBAN_WEBHOOK_BATCH_WINDOW = 1.0
+KANBAN_WEBHOOK_TIMEOUT = 5
+KANBAN_WEBHOOK_MAX_ATTEMPTS = 6
+KANBAN_WEBHOOK_BACKOFF = 2.0
+KANBAN_WEBHOOK_MAX_BACKOFF = 300
+KANBAN_WEBHOOK_WORKERS = 4
+KANBAN_WEBHOOK_ALLOWED_NETWORKS = []
+
+# Saved views
+# Each user can store up to SAVED_VIEW_LIMIT task filters. Their counts are kept on the
+# view row and their results in the default cache for SAVED_VIEW_CACHE_TIMEOUT seconds,
+# both patched from task changes. Use a shared cache when running several workers.
+
+KANBAN_SAVED_VIEW_LIMIT = 50
+KANBAN_SAVED_VIEW_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Metrics
+# Request, database, permission and cache metrics are kept in memory per process and
+# served in the Prometheus text format on /api/metrics/ (staff only). With several worker
+# processes set KANMIND_METRICS_DIR to a directory shared by the workers: each process
+# writes its metrics there at most every FLUSH_INTERVAL seconds and the endpoint adds
+# them up. Fold the files of exited workers with `manage.py compact_metrics`, or empty
+# the directory when the workers are deployed.
+
+KANBAN_METRICS_DIR = os.environ.get('KANMIND_METRICS_DIR') or None
+KANBAN_METRICS_FLUSH_INTERVAL = 5
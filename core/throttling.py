@@ -0,0 +1,168 @@
+import secrets
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle backed by a pluggable Django cache.
+    A rate of 'N/period' gives a bucket of N tokens that refills at N per period,
+    so short bursts are allowed while the sustained rate stays bounded.
+    The counter store is the cache named by THROTTLE_CACHE_ALIAS: an in-memory cache
+    for a single process, or a database, Memcached or Redis cache shared by several workers.
+    Every bucket is read and written under a short lock taken with cache.add(), so
+    concurrent requests cannot spend the same tokens; the cache backend must implement
+    add() atomically (all of the above do, the file based cache does not).
+    The lock is never waited for: a request that finds it held is let through uncharged
+    when fail_open is set (quotas), and refused otherwise (abuse limits).
+    Subclasses set a scope and implement get_cache_key(), and may override
+    get_cost() for requests that should consume more than one token.
+    """
+    scope = None
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    timer = time.time
+    lock_timeout = 2
+    fail_open = False
+
+    def __init__(self):
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.capacity, self.duration = self.parse_rate(self.rate)
+        self.wait_time = None
+
+    def parse_rate(self, rate):
+        """
+        Parse a rate string such as '10/min' into (tokens, seconds).
+        """
+        if rate is None:
+            return None, None
+        num, period = rate.split('/')
+        return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def get_cost(self, request, view):
+        return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        cost = self.get_cost(request, view)
+        refill_rate = self.capacity / self.duration
+        lock_key = f'{key}_lock'
+        lock_token = secrets.token_hex(8)
+        if not self.cache.add(lock_key, lock_token, self.lock_timeout):
+            if self.fail_open:
+                return True
+            self.wait_time = 1
+            return False
+        try:
+            now = self.timer()
+            tokens, last_seen = self.cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last_seen) * refill_rate)
+
+            if tokens < cost:
+                self.wait_time = (cost - tokens) / refill_rate
+                return False
+
+            self.cache.set(key, (tokens - cost, now), self.duration)
+            return True
+        finally:
+            self.release_lock(lock_key, lock_token)
+
+    def release_lock(self, lock_key, lock_token):
+        """
+        Delete the bucket's lock unless it expired and was taken by another request meanwhile.
+        """
+        if self.cache.get(lock_key) == lock_token:
+            self.cache.delete(lock_key)
+
+    def wait(self):
+        return self.wait_time
+
+    def format_key(self, ident):
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """
+    Limits login attempts per client address before any password is hashed.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.format_key(self.get_ident(request))
+
+
+class LoginAccountRateThrottle(TokenBucketThrottle):
+    """
+    Limits login attempts per account, whatever address they come from, so guesses
+    spread over many clients are throttled too. The budget is larger than the
+    per-address limit to leave room for the account's owner.
+    """
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if isinstance(request.data, Mapping) else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.format_key(email.strip().lower())
+
+
+class RegisterRateThrottle(TokenBucketThrottle):
+    """
+    Limits account registrations per client address.
+    """
+    scope = 'register'
+
+    def get_cache_key(self, request, view):
+        return self.format_key(self.get_ident(request))
+
+
+class EmailCheckRateThrottle(TokenBucketThrottle):
+    """
+    Limits email lookups per user to slow down user enumeration.
+    Batch lookups consume one token per email address.
+    """
+    scope = 'email_check'
+
+    def get_cost(self, request, view):
+        emails = request.data.get('emails') if request.method == 'POST' and isinstance(request.data, Mapping) else None
+        if isinstance(emails, list):
+            return max(1, len(emails))
+        return 1
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.format_key(request.user.pk)
+        return self.format_key(self.get_ident(request))
+
+
+class UserQuotaThrottle(TokenBucketThrottle):
+    """
+    Per-user API quota for authenticated requests.
+    Anonymous requests are left to the endpoint specific throttles. Requests that
+    meet a held bucket lock are let through rather than delayed.
+    """
+    scope = 'user'
+    fail_open = True
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.format_key(request.user.pk)
+        return None
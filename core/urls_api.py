@@ -0,0 +1,11 @@
+"""
+URL configuration of the API-only profile (core.settings_api).
+
+Same API routes as core.urls, without the admin and the browsable API login views.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('auth_app.urls')),
+    path('api/', include('kanban_app.urls')),
+]
@@ -0,0 +1,14 @@
+"""
+WSGI config for the API-only workers of the Core project.
+
+Uses the lean core.settings_api profile; serve the admin from a separate
+process with core.wsgi.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings_api')
+
+application = get_wsgi_application()
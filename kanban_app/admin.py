@@ -1,14 +1,114 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+
 from .models import KanbanBoard, Task, Comment
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) on large unfiltered tables.
+    Uses the planner statistics on PostgreSQL and the ANALYZE statistics on SQLite, read
+    from the database the changelist queries. An estimate outside the primary key range
+    (e.g. statistics from before a mass delete) is not trusted.
+    Small tables, tables without statistics and filtered changelists are counted exactly.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = self.estimate_row_count(self.object_list.model)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+        return super().count
+
+    def estimate_row_count(self, model):
+        connection = connections[self.object_list.db]
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+                row = cursor.fetchone()
+                estimate = row[0] if row else None
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                estimate = max((int(stat.split()[0]) for stat, in cursor.fetchall()), default=None)
+            else:
+                return None
+            if estimate is None or estimate < 0:
+                return None
+
+            if isinstance(model._meta.pk, models.IntegerField):
+                column = connection.ops.quote_name(model._meta.pk.column)
+                cursor.execute(f'SELECT MIN({column}), MAX({column}) FROM {connection.ops.quote_name(table)}')
+                low, high = cursor.fetchone()
+                if low is None or estimate > high - low + 1:
+                    return None
+        return estimate
+
+
+class IdInputFilter(admin.SimpleListFilter):
+    """
+    List filter with a text input for a related object id.
+    Unlike the default related filters it does not render every related row into the sidebar.
+    Subclasses set title, parameter_name and field_name.
+    """
+    template = 'admin/kanban_app/input_filter.html'
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return [('', '')]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.field_name: int(value)})
+        return queryset
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (name, value)
+            for name, values in changelist.get_filters_params().items() if name != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield all_choice
+
+
+class BoardIdFilter(IdInputFilter):
+    title = 'board'
+    parameter_name = 'board_id'
+    field_name = 'board_id'
+
+
+class OwnerIdFilter(IdInputFilter):
+    title = 'owner'
+    parameter_name = 'owner_id'
+    field_name = 'owner_id'
+
+
+class AuthorIdFilter(IdInputFilter):
+    title = 'author'
+    parameter_name = 'author_id'
+    field_name = 'author_id'
+
+
 class KanbanBoardAdmin(admin.ModelAdmin):
     """Admin interface for Kanban boards."""
-    list_display = ['id', 'title', 'owner', 'created_at']
-    list_filter = ['created_at', 'owner']
+    list_display = ['id', 'title', 'owner', 'created_at', 'archived_at']
+    list_filter = ['created_at', OwnerIdFilter]
+    list_select_related = ['owner']
     search_fields = ['title', 'owner__username', 'owner__email']
-    filter_horizontal = ['members']
+    autocomplete_fields = ['owner', 'members']
     readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Board Information', {
@@ -23,13 +123,21 @@ class KanbanBoardAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Include archived boards, which the default manager hides."""
+        return KanbanBoard.all_objects.all()
+
 
 class TaskAdmin(admin.ModelAdmin):
     """Admin interface for tasks."""
     list_display = ['id', 'title', 'board', 'status', 'priority', 'assignee', 'created_by', 'due_date']
-    list_filter = ['status', 'priority', 'board', 'created_at']
+    list_filter = ['status', 'priority', BoardIdFilter, 'created_at']
+    list_select_related = ['board', 'assignee', 'created_by']
     search_fields = ['title', 'description', 'board__title']
+    autocomplete_fields = ['board', 'assignee', 'reviewer_id', 'created_by']
     readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Task Information', {
@@ -47,13 +155,21 @@ class TaskAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Include archived tasks, which the default manager hides."""
+        return Task.all_objects.all()
+
 
 class CommentAdmin(admin.ModelAdmin):
     """Admin interface for comments."""
     list_display = ['id', 'task', 'author', 'created_at', 'content_preview']
-    list_filter = ['created_at', 'author']
+    list_filter = ['created_at', AuthorIdFilter]
+    list_select_related = ['task', 'author']
     search_fields = ['content', 'task__title', 'author__username']
+    autocomplete_fields = ['task', 'author']
     readonly_fields = ['created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Comment Information', {
@@ -0,0 +1,198 @@
+import contextvars
+import datetime
+import functools
+import math
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from kanban_app.models import BoardDailyStats, Task, TaskStatusTransition
+
+
+STATUSES = ['to_do', 'in_progress', 'review', 'done']
+
+_deleting_boards = contextvars.ContextVar('kanban_deleting_boards', default=frozenset())
+
+
+@functools.cache
+def _numpy():
+    """Import NumPy on first use, it is only needed for percentiles and slows down worker startup."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def percentiles(values, quantiles=(50, 90)):
+    """
+    Compute percentiles with linear interpolation.
+    Uses NumPy for large inputs when it is installed and falls back to pure Python otherwise.
+    Args:
+        values: Sequence of numbers
+        quantiles: Percentiles to compute (0-100)
+    Returns:
+        list: One value per quantile, or None values for empty input
+    """
+    if len(values) == 0:
+        return [None for _ in quantiles]
+
+    numpy = _numpy()
+    if numpy is not None:
+        return [float(value) for value in numpy.percentile(numpy.asarray(values, dtype=float), quantiles)]
+
+    ordered = sorted(values)
+    results = []
+    for quantile in quantiles:
+        position = (len(ordered) - 1) * quantile / 100
+        lower = math.floor(position)
+        upper = math.ceil(position)
+        results.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+    return results
+
+
+def start_board_deletion(board_id):
+    """Mark a board as being deleted, the tasks removed with it are not recorded."""
+    _deleting_boards.set(_deleting_boards.get() | {board_id})
+
+
+def finish_board_deletion(board_id):
+    _deleting_boards.set(_deleting_boards.get() - {board_id})
+
+
+def is_board_deleting(board_id):
+    return board_id in _deleting_boards.get()
+
+
+def record_transition(task, from_status, to_status):
+    """
+    Log a status change and update the board's daily rollup.
+    Args:
+        task: The task that changed
+        from_status: Previous status, empty for new tasks
+        to_status: New status, empty for deleted tasks
+    """
+    at = timezone.now()
+    cycle_seconds = None
+    if to_status == 'done' and task.created_at:
+        cycle_seconds = (at - task.created_at).total_seconds()
+
+    with transaction.atomic(using=router.db_for_write(TaskStatusTransition, instance=task)):
+        TaskStatusTransition.objects.create(
+            board_id=task.board_id,
+            task_id=task.pk if to_status else None,
+            from_status=from_status,
+            to_status=to_status,
+            at=at,
+            cycle_seconds=cycle_seconds,
+        )
+        day = timezone.localdate(at)
+        if not _ensure_daily_stats(task.board_id, day):
+            _apply_status_delta(task.board_id, day, from_status, to_status)
+        if to_status == 'done' and from_status != 'done':
+            BoardDailyStats.objects.filter(board_id=task.board_id, date=day).update(completed_count=F('completed_count') + 1)
+
+
+def _ensure_daily_stats(board_id, day):
+    """
+    Make sure the rollup row for the day exists.
+    New rows carry over the counts of the latest earlier row. Without any earlier row
+    the counts are taken from the live tasks, which already include the current change.
+    Returns:
+        bool: True if the row was initialized from live counts
+    """
+    if BoardDailyStats.objects.filter(board_id=board_id, date=day).exists():
+        return False
+
+    previous = BoardDailyStats.objects.filter(board_id=board_id, date__lt=day).order_by('-date').first()
+    if previous:
+        counts = {f'{status}_count': getattr(previous, f'{status}_count') for status in STATUSES}
+        from_live = False
+    else:
+        live = (
+            Task.objects.filter(board_id=board_id)
+            .values('status')
+            .annotate(count=Count('id'))
+        )
+        counts = {f"{row['status']}_count": row['count'] for row in live if row['status'] in STATUSES}
+        from_live = True
+
+    try:
+        with transaction.atomic(using=router.db_for_write(BoardDailyStats)):
+            BoardDailyStats.objects.create(board_id=board_id, date=day, **counts)
+    except IntegrityError:
+        return False
+    return from_live
+
+
+def _apply_status_delta(board_id, day, from_status, to_status):
+    changes = {}
+    if from_status in STATUSES:
+        changes[f'{from_status}_count'] = F(f'{from_status}_count') - 1
+    if to_status in STATUSES:
+        changes[f'{to_status}_count'] = F(f'{to_status}_count') + 1
+    if changes:
+        BoardDailyStats.objects.filter(board_id=board_id, date=day).update(**changes)
+
+
+def board_analytics(board, start, end):
+    """
+    Build cumulative flow, throughput and cycle time series for a board from the rollups.
+    Cycle time percentiles are computed here from the window's completions, so
+    recording a transition never re-reads the day's transitions.
+    Args:
+        board: The KanbanBoard
+        start: First day of the window
+        end: Last day of the window
+    Returns:
+        dict: Chart data for the window
+    """
+    rows = {row.date: row for row in BoardDailyStats.objects.filter(board=board, date__range=(start, end))}
+    carry = BoardDailyStats.objects.filter(board=board, date__lt=start).order_by('-date').first()
+    if carry is None and not rows:
+        live = Task.objects.filter(board=board).values('status').annotate(count=Count('id'))
+        carry = BoardDailyStats(board=board, **{f"{row['status']}_count": row['count'] for row in live if row['status'] in STATUSES})
+
+    cumulative_flow, throughput, daily_cycle_time = [], [], []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        source = row or carry
+        cumulative_flow.append({
+            'date': day,
+            **{status: getattr(source, f'{status}_count') if source else 0 for status in STATUSES},
+        })
+        throughput.append({'date': day, 'completed': row.completed_count if row else 0})
+        if row:
+            carry = row
+        day += datetime.timedelta(days=1)
+
+    window_start = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+    window_end = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min))
+    completions = (
+        TaskStatusTransition.objects.filter(board=board, to_status='done', at__gte=window_start, at__lt=window_end)
+        .exclude(cycle_seconds__isnull=True)
+        .values_list('at', 'cycle_seconds')
+    )
+    cycle_times_by_day = {}
+    for at, cycle_seconds in completions:
+        cycle_times_by_day.setdefault(timezone.localdate(at), []).append(cycle_seconds)
+    for day, cycle_times in sorted(cycle_times_by_day.items()):
+        median, p90 = percentiles(cycle_times)
+        daily_cycle_time.append({'date': day, 'median': median, 'p90': p90})
+
+    window_cycle_times = [cycle_seconds for cycle_times in cycle_times_by_day.values() for cycle_seconds in cycle_times]
+    median, p90 = percentiles(window_cycle_times)
+
+    return {
+        'board': board.id,
+        'from': start,
+        'to': end,
+        'cumulative_flow': cumulative_flow,
+        'throughput': throughput,
+        'cycle_time': {
+            'daily': daily_cycle_time,
+            'window': {'count': len(window_cycle_times), 'median': median, 'p90': p90},
+        },
+    }
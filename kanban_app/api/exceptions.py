@@ -0,0 +1,11 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """
+    Raised when the If-Match version of a request does not match the stored version.
+    """
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource was modified by another request. Reload it and try again.'
+    default_code = 'precondition_failed'
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+
+from .serializers import UserDataSerializer
+
+
+NORMALIZE_QUERY_PARAM = 'normalize'
+TASK_USER_FIELDS = ('assignee', 'reviewer')
+
+
+def wants_normalized(request):
+    """Check if the client asked for the normalized response shape (?normalize=true)."""
+    return request.query_params.get(NORMALIZE_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def side_load_task_users(tasks, users):
+    """
+    Replace nested assignee and reviewer objects of serialized tasks by their ids.
+    Args:
+        tasks: Serialized tasks with nested user data
+        users: Dict the user data is collected in, keyed by the user id as string
+    Returns:
+        list: The tasks referencing users by id
+    """
+    normalized = []
+    for task in tasks:
+        task = dict(task)
+        for field in TASK_USER_FIELDS:
+            user = task.get(field)
+            if user is not None:
+                users[str(user['id'])] = user
+                task[field] = user['id']
+        normalized.append(task)
+    return normalized
+
+
+def normalize_board_document(document):
+    """
+    Convert a board detail document into the normalized shape.
+    Members and task users are emitted once in a 'users' map and referenced by id.
+    """
+    users = {}
+    members = []
+    for member in document['members']:
+        users[str(member['id'])] = member
+        members.append(member['id'])
+    tasks = side_load_task_users(document['tasks'], users)
+    return {**document, 'members': members, 'tasks': tasks, 'users': users}
+
+
+def load_users(tasks):
+    """
+    Load the users referenced by normalized tasks with one query.
+    Returns:
+        dict: Serialized users keyed by the user id as string
+    """
+    user_ids = {task[field] for task in tasks for field in TASK_USER_FIELDS if task.get(field) is not None}
+    if not user_ids:
+        return {}
+    users = User.objects.filter(id__in=user_ids).order_by('id')
+    return {str(user['id']): user for user in UserDataSerializer(users, many=True).data}
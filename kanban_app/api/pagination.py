@@ -0,0 +1,90 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+
+
+class CommentKeysetPagination(BasePagination):
+    """
+    Keyset ("load older") pagination for task comment threads.
+    Pages are read backwards along the (task, created_at, id) index, so every page
+    costs the same regardless of how many comments the thread already has.
+    Without 'limit' or 'before' query parameters the full thread is returned unpaginated.
+    """
+    default_limit = 50
+    max_limit = 200
+    limit_query_param = 'limit'
+    cursor_query_param = 'before'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.limit_query_param not in params and self.cursor_query_param not in params:
+            return None
+
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = params.get(self.cursor_query_param)
+
+        queryset = queryset.order_by('-created_at', '-id')
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        page = list(queryset[:limit + 1])
+        self.has_older = len(page) > limit
+        page = page[:limit]
+        self.older_cursor = self.encode_cursor(page[-1]) if self.has_older else None
+        page.reverse()
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'older': self.older_cursor,
+            'results': data,
+        })
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except ValueError:
+            raise ValidationError({self.limit_query_param: "Limit must be an integer."})
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, comment):
+        raw = f"{comment.created_at.isoformat()}|{comment.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (ValueError, UnicodeDecodeError):
+            created_at = None
+        if created_at is None:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return created_at, pk
+
+
+class MemberCursorPagination(CursorPagination):
+    """
+    Cursor pagination for board member listings, ordered by user id.
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    Cursor pagination for a board's task history, most recently completed first.
+    """
+    ordering = ('-completed_at', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
@@ -1,5 +1,28 @@
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+
 from rest_framework.permissions import BasePermission
-  
+
+from core.metrics import count_permission_check
+from kanban_app.membership import is_board_member
+from kanban_app.models import KanbanBoard
+
+
+def board_access_expression(user, board_path='board'):
+    """
+    Build a boolean expression that is true if the user owns or is a member of the board.
+    Can be used in annotate() so the access check runs in the same query as the lookup.
+    Args:
+        user: The requesting user
+        board_path: ORM path from the queried model to its KanbanBoard (e.g. 'board' or 'task__board')
+    Returns:
+        ExpressionWrapper: Boolean expression for annotate()
+    """
+    is_member = Exists(KanbanBoard.members.through.objects.filter(
+        kanbanboard_id=OuterRef(f'{board_path}_id'),
+        user_id=user.id,
+    ))
+    return ExpressionWrapper(Q(**{f'{board_path}__owner_id': user.id}) | is_member, output_field=BooleanField())
+
         
 class IsBoardOwnerOrMember(BasePermission):
     """
@@ -7,14 +30,41 @@ class IsBoardOwnerOrMember(BasePermission):
     Allows access if user is the board owner or a member of the board.
     Only owner can delete the board.
     """
+    @count_permission_check
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated)
     
+    @count_permission_check
     def has_object_permission(self, request, view, obj):
         if request.method == 'DELETE':
-            return bool(request.user and request.user == obj.owner)
+            return self.can_delete(request, obj)
 
-        return bool(request.user and (request.user == obj.owner or request.user in obj.members.all()))
+        return bool(request.user and is_board_member(obj, request.user))
+
+    def can_delete(self, request, obj):
+        return bool(request.user and request.user.id == obj.owner_id)
+
+
+class IsBoardOwner(BasePermission):
+    """
+    Permission class for owner-only board actions such as archiving.
+    """
+    @count_permission_check
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    @count_permission_check
+    def has_object_permission(self, request, view, obj):
+        return bool(request.user and request.user.id == obj.owner_id)
+
+
+class CanManageBoardMembers(IsBoardOwnerOrMember):
+    """
+    Permission class for the board member endpoints.
+    Board owner and members can list, add and remove members, so DELETE is not owner-only.
+    """
+    def can_delete(self, request, obj):
+        return bool(request.user and is_board_member(obj, request.user))
 
 
 class IsTaskBoardMember(BasePermission):
@@ -23,17 +73,19 @@ class IsTaskBoardMember(BasePermission):
     Allows access if user is the board owner or a member of the board.
     For DELETE, only task creator or board owner can delete.
     """
+    @count_permission_check
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated)
     
+    @count_permission_check
     def has_object_permission(self, request, view, obj):
         board = obj.board
         user = request.user
         
         if request.method == 'DELETE':
-            return bool(user and (user == obj.created_by or user == board.owner))
+            return bool(user and (user.id == obj.created_by_id or user.id == board.owner_id))
         
-        return bool(user and (user == board.owner or user in board.members.all()))
+        return bool(user and is_board_member(board, user))
 
 
 class IsCommentBoardMember(BasePermission):
@@ -42,14 +94,18 @@ class IsCommentBoardMember(BasePermission):
     Allows access if user is the board owner or a member of the board.
     For DELETE, only comment author can delete.
     """
+    @count_permission_check
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated)
     
+    @count_permission_check
     def has_object_permission(self, request, view, obj):
-        board = obj.task.board
         user = request.user
-        
+
         if request.method == 'DELETE':
-            return bool(user and user == obj.author)
-        
-        return bool(user and (user == board.owner or user in board.members.all()))
+            return bool(user and user.id == obj.author_id)
+
+        if hasattr(obj, 'board_access'):
+            return bool(obj.board_access)
+
+        return bool(user and is_board_member(obj.task.board, user))
@@ -1,8 +1,80 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
 
 from rest_framework import serializers
 
-from kanban_app.models import KanbanBoard, Task, Comment
+from kanban_app.membership import non_member_ids
+from kanban_app.models import HistoricComment, HistoricTask, KanbanBoard, SavedView, Task, Comment, WebhookSubscription
+from kanban_app.ranking import rank_for_new_task
+from kanban_app.webhooks import EVENT_TYPES, DeliveryError, resolve_destination
+from .exceptions import PreconditionFailed
+
+
+def validate_task_assignment(board_id, data):
+    """
+    Validate that assignee and reviewer are members of the board with one query.
+    Raises:
+        ValidationError: If assignee or reviewer is not a board member
+    """
+    assignee = data.get('assignee')
+    reviewer = data.get('reviewer_id')
+    outsiders = non_member_ids(board_id, [getattr(assignee, 'pk', None), getattr(reviewer, 'pk', None)])
+
+    if assignee and assignee.pk in outsiders:
+        raise serializers.ValidationError({"assignee_id": "Assignee must be a member of the board."})
+
+    if reviewer and reviewer.pk in outsiders:
+        raise serializers.ValidationError({"reviewer_id": "Reviewer must be a member of the board."})
+
+    return data
+
+
+class VersionedUpdateMixin:
+    """
+    Serializer mixin for optimistic concurrency control on models with a version column.
+    Updates only write the columns that actually changed. The version is claimed with a
+    conditional UPDATE ... WHERE version = ? against the expected version from the
+    request context ('expected_version', the If-Match header) or the loaded version.
+    Raises PreconditionFailed if another request updated the row in between.
+    """
+    def update(self, instance, validated_data):
+        model = type(instance)
+        expected_version = self.context.get('expected_version')
+        if expected_version is None:
+            expected_version = instance.version
+        changed_fields = []
+        many_to_many = {}
+
+        for attr, value in validated_data.items():
+            field = instance._meta.get_field(attr)
+            if field.many_to_many:
+                many_to_many[attr] = value
+            elif field.many_to_one:
+                if getattr(instance, field.attname) != (value.pk if value is not None else None):
+                    setattr(instance, attr, value)
+                    changed_fields.append(attr)
+            elif getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed_fields.append(attr)
+
+        if not changed_fields and not many_to_many:
+            if expected_version != instance.version:
+                raise PreconditionFailed()
+            return instance
+
+        using = instance._state.db
+        with transaction.atomic(using=using):
+            claimed = model._base_manager.using(using).filter(pk=instance.pk, version=expected_version).update(version=F('version') + 1)
+            if not claimed:
+                raise PreconditionFailed()
+            instance.version = expected_version + 1
+            instance.save(update_fields=changed_fields + ['updated_at'])
+            for attr, value in many_to_many.items():
+                getattr(instance, attr).set(value)
+
+        return instance
 
 
 class BoardSerializer(serializers.ModelSerializer):
@@ -78,29 +150,29 @@ class TaskSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Task
-        fields = ['id', 'board', 'title', 'description', 'status', 'priority', 'assignee', 'assignee_id', 'reviewer', 'reviewer_id', 'due_date', 'comments_count']
-        read_only_fields = ['id', 'comments_count']
+        fields = ['id', 'board', 'title', 'description', 'status', 'priority', 'assignee', 'assignee_id', 'reviewer', 'reviewer_id', 'due_date', 'rank', 'comments_count']
+        read_only_fields = ['id', 'rank', 'comments_count']
     
     def validate(self, data):
         board = data.get('board')
-        assignee = data.get('assignee')
-        reviewer = data.get('reviewer_id')
-        
-        board_members = board.members.all()
-        
-        if assignee and assignee not in board_members:
-            raise serializers.ValidationError({"assignee_id": "Assignee must be a member of the board."})
-        
-        if reviewer and reviewer not in board_members:
-            raise serializers.ValidationError({"reviewer_id": "Reviewer must be a member of the board."})
-        
-        return data
+        return validate_task_assignment(board.pk, data)
     
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comment_total'):
+            return obj.comment_total
         return obj.task_comments.count()
 
 
-class TaskDetailSerializer(serializers.ModelSerializer):
+class NormalizedTaskSerializer(TaskSerializer):
+    """
+    Read-only task representation referencing assignee and reviewer by id.   
+    Used for the normalized response shape, where user data is side-loaded once per response.
+    """
+    assignee = serializers.PrimaryKeyRelatedField(read_only=True)
+    reviewer = serializers.PrimaryKeyRelatedField(source='reviewer_id', read_only=True)
+
+
+class TaskDetailSerializer(VersionedUpdateMixin, serializers.ModelSerializer):
     """
     Serializer for retrieving and updating task details.   
     Board field is read-only to prevent moving tasks between boards.
@@ -124,28 +196,44 @@ class TaskDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'status', 'priority', 'assignee', 'assignee_id', 'reviewer', 'reviewer_id', 'due_date']
-        read_only_fields = ['id', 'board']
+        fields = ['id', 'title', 'description', 'status', 'priority', 'assignee', 'assignee_id', 'reviewer', 'reviewer_id', 'due_date', 'rank']
+        read_only_fields = ['id', 'board', 'rank']
     
     def validate(self, data):
-        board = self.instance.board if self.instance else data.get('board')
-        assignee = data.get('assignee')
-        reviewer = data.get('reviewer_id')
+        board_id = self.instance.board_id if self.instance else getattr(data.get('board'), 'pk', None)
         
-        if not board:
+        if not board_id:
             return data
         
-        board_members = board.members.all()
-        
-        if assignee and assignee not in board_members:
-            raise serializers.ValidationError({"assignee_id": "Assignee must be a member of the board."})
-        
-        if reviewer and reviewer not in board_members:
-            raise serializers.ValidationError({"reviewer_id": "Reviewer must be a member of the board."})
-        
-        return data
+        return validate_task_assignment(board_id, data)
+
+    def update(self, instance, validated_data):
+        """
+        A status change moves the task to the end of its new column.
+        """
+        if 'status' in validated_data and validated_data['status'] != instance.status:
+            validated_data['rank'] = rank_for_new_task(instance.board_id, validated_data['status'])
+        return super().update(instance, validated_data)
     
         
+class TaskMoveSerializer(serializers.Serializer):
+    """
+    Serializer for moving a task within or between the columns of its board.   
+    The task is placed between the tasks 'after' and 'before' point to. Without
+    neighbors it goes to the end of the column, the status defaults to the current one.
+    """
+    status = serializers.ChoiceField(choices=Task._meta.get_field('status').choices, required=False)
+    after = serializers.IntegerField(required=False, allow_null=True)
+    before = serializers.IntegerField(required=False, allow_null=True)
+
+
+class TaskDependencySerializer(serializers.Serializer):
+    """
+    Serializer for marking a task as blocked by another task of its board.   
+    """
+    blocked_by = serializers.IntegerField()
+
+
 class BoardDetailSerializer(serializers.ModelSerializer):
     """
     Serializer for detailed board view.   
@@ -167,7 +255,7 @@ class BoardDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'owner_id', 'members', 'members_ids', 'tasks']
 
 
-class BoardUpdateSerializer(serializers.ModelSerializer):
+class BoardUpdateSerializer(VersionedUpdateMixin, serializers.ModelSerializer):
     """
     Serializer for updating board details.   
     Allows updating title and members. Owner cannot be changed.
@@ -186,6 +274,33 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'owner_data', 'members_data', 'members']
         
         
+class BoardMembersSerializer(serializers.Serializer):
+    """
+    Serializer for adding or removing a batch of board members.   
+    Validates that all users exist with a single query.
+    """
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+
+    def validate_user_ids(self, value):
+        user_ids = list(dict.fromkeys(value))
+        existing = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        if missing:
+            raise serializers.ValidationError(f"Users not found: {missing}")
+        return user_ids
+
+
+class BoardCloneSerializer(serializers.Serializer):
+    """
+    Serializer for the options of a board clone.   
+    Title defaults to the source board title.
+    """
+    title = serializers.CharField(max_length=100, required=False)
+    reset_status = serializers.BooleanField(default=False)
+    reset_dates = serializers.BooleanField(default=False)
+    include_comments = serializers.BooleanField(default=False)
+        
+        
 class TaskCommentsSerializer(serializers.ModelSerializer):
     """
     Serializer for task comments.   
@@ -201,4 +316,112 @@ class TaskCommentsSerializer(serializers.ModelSerializer):
     
     def get_author(self, obj):
         return f"{obj.author.first_name} {obj.author.last_name}".strip() or obj.author.username
-    
\ No newline at end of file
+    
+
+
+class HistoricCommentSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for comments of tasks moved to history.   
+    Same representation as TaskCommentsSerializer.
+    """
+    author = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HistoricComment
+        fields = ['id', 'created_at', 'author', 'content']
+
+    def get_author(self, obj):
+        return f"{obj.author.first_name} {obj.author.last_name}".strip() or obj.author.username
+
+
+class HistoricTaskSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for tasks moved to history, including their comments.
+    """
+    assignee = UserDataSerializer(read_only=True)
+    reviewer = UserDataSerializer(read_only=True)
+    comments = HistoricCommentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = HistoricTask
+        fields = ['id', 'board', 'title', 'description', 'priority', 'assignee', 'reviewer', 'due_date', 'created_at', 'completed_at', 'comments']
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for board webhook subscriptions.   
+    An empty events list subscribes to all event types.
+    The URL must resolve to public addresses (see kanban_app.webhooks.resolve_destination).
+    The secret is generated on creation and used to sign every delivery.
+    """
+    events = serializers.ListField(child=serializers.ChoiceField(choices=EVENT_TYPES), required=False)
+
+    class Meta:
+        model = WebhookSubscription
+        fields = ['id', 'url', 'events', 'is_active', 'secret', 'created_at']
+        read_only_fields = ['id', 'secret', 'created_at']
+
+    def validate_url(self, value):
+        try:
+            resolve_destination(value)
+        except DeliveryError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate_events(self, value):
+        return sorted(set(value))
+
+
+class SavedViewFiltersSerializer(serializers.Serializer):
+    """
+    Serializer for the filters of a saved view.   
+    'scope' selects the tasks assigned to or reviewed by the user, or the tasks of boards
+    the user owns or is a member of. All other filters are optional and combined with AND.
+    """
+    scope = serializers.ChoiceField(choices=SavedView.SCOPES)
+    status = serializers.ListField(child=serializers.ChoiceField(choices=Task._meta.get_field('status').choices), required=False)
+    priority = serializers.ListField(child=serializers.ChoiceField(choices=Task._meta.get_field('priority').choices), required=False)
+    boards = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=100)
+    overdue = serializers.BooleanField(required=False)
+    due_within_days = serializers.IntegerField(required=False, min_value=0, max_value=365)
+
+    def validate(self, data):
+        return {
+            key: sorted(set(value)) if isinstance(value, list) else value
+            for key, value in data.items()
+            if value != [] and value is not False
+        }
+
+
+class SavedViewSerializer(serializers.ModelSerializer):
+    """
+    Serializer for saved views of the current user.   
+    Filters are validated with SavedViewFiltersSerializer and stored as JSON.
+    'count' is the stored number of matching tasks, maintained incrementally.
+    """
+    filters = serializers.JSONField()
+    count = serializers.IntegerField(source='task_count', read_only=True)
+
+    class Meta:
+        model = SavedView
+        fields = ['id', 'name', 'filters', 'count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_name(self, value):
+        views = SavedView.objects.filter(user=self.context['request'].user, name=value)
+        if self.instance is not None:
+            views = views.exclude(pk=self.instance.pk)
+        if views.exists():
+            raise serializers.ValidationError("You already have a saved view with this name.")
+        return value
+
+    def validate_filters(self, value):
+        filters = SavedViewFiltersSerializer(data=value)
+        filters.is_valid(raise_exception=True)
+        return filters.validated_data
+
+    def validate(self, data):
+        user = self.context['request'].user
+        if self.instance is None and SavedView.objects.filter(user=user).count() >= settings.KANBAN_SAVED_VIEW_LIMIT:
+            raise serializers.ValidationError(f"At most {settings.KANBAN_SAVED_VIEW_LIMIT} saved views are allowed.")
+        return data
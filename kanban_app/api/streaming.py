@@ -0,0 +1,161 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from kanban_app.models import Comment
+from kanban_app.sharding import shard_aliases
+
+
+STREAM_QUERY_PARAM = 'stream'
+STREAM_CHUNK_SIZE = 2000
+STREAM_ROWS_PER_WRITE = 500
+
+USER_COLUMNS = ('id', 'email', 'first_name', 'last_name', 'username')
+JSON_OPTIONS = {'separators': (',', ':'), 'ensure_ascii': False}
+TASK_COLUMNS = ('id', 'board_id', 'title', 'description', 'status', 'priority', 'due_date', 'rank', 'comment_total')
+
+
+def wants_stream(request):
+    """Check if the client asked for a streamed, chunk-wise serialized response (?stream=true)."""
+    return request.query_params.get(STREAM_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def comment_count():
+    """Comment count as a correlated subquery, so streamed task queries need no GROUP BY."""
+    counts = Comment.objects.filter(task_id=OuterRef('pk')).order_by().values('task_id').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def _user(row, offset):
+    if row[offset] is None:
+        return None
+    user_id, email, first_name, last_name, username = row[offset:offset + len(USER_COLUMNS)]
+    return {'id': user_id, 'email': email, 'fullname': f"{first_name} {last_name}".strip() or username}
+
+
+def task_rows(tasks, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield tasks in the TaskSerializer representation without creating model instances.
+    Only the needed columns are selected as tuples, assignee and reviewer are joined in
+    the same query, and rows are fetched chunk by chunk (server-side cursor where supported).
+    Args:
+        tasks: Task queryset, only its filters are used
+        chunk_size: Rows fetched from the database at a time
+    """
+    columns = (
+        *TASK_COLUMNS,
+        *(f'assignee__{column}' for column in USER_COLUMNS),
+        *(f'reviewer_id__{column}' for column in USER_COLUMNS),
+    )
+    assignee_offset = len(TASK_COLUMNS)
+    reviewer_offset = assignee_offset + len(USER_COLUMNS)
+    rows = (
+        tasks.select_related(None).prefetch_related(None)
+        .annotate(comment_total=comment_count())
+        .order_by('pk')
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        task_id, board_id, title, description, status, priority, due_date, rank, comments = row[:assignee_offset]
+        yield {
+            'id': task_id,
+            'board': board_id,
+            'title': title,
+            'description': description,
+            'status': status,
+            'priority': priority,
+            'assignee': _user(row, assignee_offset),
+            'reviewer': _user(row, reviewer_offset),
+            'due_date': due_date.isoformat() if due_date else None,
+            'rank': rank,
+            'comments_count': comments,
+        }
+
+
+def sharded_task_rows(build_queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield task rows from every shard in turn.
+    Args:
+        build_queryset: Callable returning the filtered task queryset, evaluated once per shard
+    """
+    for alias in shard_aliases():
+        yield from task_rows(build_queryset().using(alias), chunk_size)
+
+
+def normalized_rows(rows, users):
+    """Replace nested assignee and reviewer by their ids, collecting the users once in 'users'."""
+    for row in rows:
+        for field in ('assignee', 'reviewer'):
+            user = row[field]
+            if user is not None:
+                users.setdefault(str(user['id']), user)
+                row[field] = user['id']
+        yield row
+
+
+def json_array_chunks(rows, rows_per_write=STREAM_ROWS_PER_WRITE):
+    """Encode rows as a JSON array, yielding one string per group of rows."""
+    encoder = JSONEncoder(**JSON_OPTIONS)
+    yield '['
+    separator = ''
+    buffer = []
+    for row in rows:
+        buffer.append(encoder.encode(row))
+        if len(buffer) >= rows_per_write:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+    if buffer:
+        yield separator + ','.join(buffer)
+    yield ']'
+
+
+def is_asgi(request):
+    """Check if the request is served by the ASGI handler."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def async_chunks(chunks):
+    """
+    Iterate a synchronous chunk generator from the event loop.
+    Every chunk is fetched in the sync thread, so the database cursor stays on one
+    connection and the response never holds more than one chunk.
+    """
+    done = object()
+    try:
+        while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def stream_task_list(build_queryset, normalized=False, chunk_size=STREAM_CHUNK_SIZE, asynchronous=False):
+    """
+    Build a streaming JSON response for a task list.
+    Memory stays bounded by the chunk size (plus the distinct users when normalized),
+    independent of the number of tasks.
+    Args:
+        build_queryset: Callable returning the filtered task queryset
+        normalized: Use the {"results", "users"} shape
+        asynchronous: Stream through an async iterator, for requests served under ASGI
+    """
+    rows = sharded_task_rows(build_queryset, chunk_size)
+
+    def chunks():
+        if not normalized:
+            yield from json_array_chunks(rows)
+            return
+        users = {}
+        yield '{"results":'
+        yield from json_array_chunks(normalized_rows(rows, users))
+        yield ',"users":' + json.dumps(users, cls=JSONEncoder, **JSON_OPTIONS) + '}'
+
+    content = async_chunks(chunks()) if asynchronous else chunks()
+    return StreamingHttpResponse(content, content_type='application/json')
@@ -1,15 +1,32 @@
 from django.urls import path
-from .views import EmailCheckView, BoardsView, BoardsDetailView, AssignedTasksView, ReviewingTasksView, TasksView, TaskDetailView, TaskCommentsView, TaskCommentsDetailView
+from .views import EmailCheckView, BoardsView, BoardsDetailView, BoardCloneView, BoardMembersView, BoardArchiveView, BoardRestoreView, BoardAnalyticsView, BoardHistoryView, BoardDependenciesView, BoardWebhooksView, BoardWebhookDetailView, AssignedTasksView, ReviewingTasksView, TasksView, TaskDetailView, TaskMoveView, TaskDependenciesView, TaskCommentsView, TaskCommentsDetailView, SavedViewsView, SavedViewDetailView, SavedViewTasksView, MetricsView
 
 
 urlpatterns = [
     path('boards/', BoardsView.as_view(), name='boards'),
     path('boards/<int:pk>/', BoardsDetailView.as_view(), name='board-detail'),
+    path('boards/<int:pk>/members/', BoardMembersView.as_view(), name='board-members'),
+    path('boards/<int:pk>/members/<int:user_pk>/', BoardMembersView.as_view(), name='board-member-detail'),
+    path('boards/<int:pk>/clone/', BoardCloneView.as_view(), name='board-clone'),
+    path('boards/<int:pk>/archive/', BoardArchiveView.as_view(), name='board-archive'),
+    path('boards/<int:pk>/restore/', BoardRestoreView.as_view(), name='board-restore'),
+    path('boards/<int:pk>/analytics/', BoardAnalyticsView.as_view(), name='board-analytics'),
+    path('boards/<int:pk>/history/', BoardHistoryView.as_view(), name='board-history'),
+    path('boards/<int:pk>/dependencies/', BoardDependenciesView.as_view(), name='board-dependencies'),
+    path('boards/<int:pk>/webhooks/', BoardWebhooksView.as_view(), name='board-webhooks'),
+    path('boards/<int:pk>/webhooks/<int:webhook_pk>/', BoardWebhookDetailView.as_view(), name='board-webhook-detail'),
     path('email-check/', EmailCheckView.as_view(), name='email-check'),
     path('tasks/assigned-to-me/', AssignedTasksView.as_view(), name='tasks-assigned-to-me'),
     path('tasks/reviewing/', ReviewingTasksView.as_view(), name='tasks-reviewing'),
     path('tasks/', TasksView.as_view(), name='tasks-list'),
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
+    path('tasks/<int:pk>/move/', TaskMoveView.as_view(), name='task-move'),
+    path('tasks/<int:pk>/dependencies/', TaskDependenciesView.as_view(), name='task-dependencies'),
+    path('tasks/<int:pk>/dependencies/<int:blocked_by_pk>/', TaskDependenciesView.as_view(), name='task-dependency-detail'),
     path('tasks/<int:pk>/comments/', TaskCommentsView.as_view(), name='task-comments'),
     path('tasks/<int:pk>/comments/<int:comment_pk>/', TaskCommentsDetailView.as_view(), name='task-comments-detail'),
+    path('saved-views/', SavedViewsView.as_view(), name='saved-views'),
+    path('saved-views/<int:pk>/', SavedViewDetailView.as_view(), name='saved-view-detail'),
+    path('saved-views/<int:pk>/tasks/', SavedViewTasksView.as_view(), name='saved-view-tasks'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
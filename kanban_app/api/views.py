@@ -1,19 +1,121 @@
+import datetime
+import heapq
+from collections.abc import Mapping
+from operator import itemgetter
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from auth_app.email_lookup import lookup_users_by_email, normalize_email
+from core.metrics import CONTENT_TYPE, InstrumentedViewMixin, registry
+from core.throttling import EmailCheckRateThrottle, UserQuotaThrottle
+from kanban_app.analytics import board_analytics
+from kanban_app.archive import archive_board, delete_board, restore_board
+from kanban_app.cloning import clone_board
+from kanban_app.dependencies import add_dependency, get_dependency_document
+from kanban_app.membership import is_board_member
+from kanban_app.models import HistoricComment, HistoricTask, KanbanBoard, SavedView, Task, TaskDependency, Comment, WebhookSubscription
+from kanban_app.projections import get_board_document, task_queryset
+from kanban_app.ranking import VersionConflict, move_task
+from kanban_app.saved_views import ensure_counted, get_results, invalidate_views
+from kanban_app.sharding import resolve_shard, shard_aliases, shard_for_new_board, sharding_enabled, use_shard
+from .serializers import BoardSerializer, BoardDetailSerializer, BoardUpdateSerializer, BoardCloneSerializer, BoardMembersSerializer, HistoricTaskSerializer, SavedViewSerializer, UserDataSerializer, TaskSerializer, NormalizedTaskSerializer, TaskDetailSerializer, TaskMoveSerializer, TaskDependencySerializer, TaskCommentsSerializer, WebhookSubscriptionSerializer
+from .exceptions import PreconditionFailed
+from .normalization import load_users, normalize_board_document, side_load_task_users, wants_normalized
+from .streaming import is_asgi, stream_task_list, wants_stream
+from .pagination import CommentKeysetPagination, HistoryCursorPagination, MemberCursorPagination
+from .permissions import CanManageBoardMembers, IsBoardOwner, IsBoardOwnerOrMember, IsTaskBoardMember, IsCommentBoardMember, board_access_expression
+
+
+class ShardRoutedMixin:
+    """
+    View mixin for views addressing a board or task by the 'pk' URL argument.
+    The whole request runs on the shard of that object, resolved through the routing index.
+    """
+    shard_lookup = 'board'
 
-from kanban_app.models import KanbanBoard, Task
-from .serializers import BoardSerializer, BoardDetailSerializer, BoardUpdateSerializer, TaskSerializer, TaskDetailSerializer, TaskCommentsSerializer
-from .permissions import IsBoardOwnerOrMember, IsTaskBoardMember, IsCommentBoardMember
+    def dispatch(self, request, *args, **kwargs):
+        with use_shard(resolve_shard(self.shard_lookup, kwargs.get('pk'))):
+            return super().dispatch(request, *args, **kwargs)
 
 
-class BoardsView(generics.ListCreateAPIView):
+class ShardedListMixin:
+    """
+    List view mixin running the list on every shard and merging the results by id.
+    Every shard returns its rows ordered by id, the merged list is paginated as a whole.
+    Normalized task lists ({"results", "users"}) are merged as well.
+    """
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).order_by('id')
+
+    def list(self, request, *args, **kwargs):
+        if not sharding_enabled():
+            return super().list(request, *args, **kwargs)
+
+        paginator = self.paginator
+        self._paginator = None
+        shard_results, users = [], {}
+        try:
+            for alias in shard_aliases():
+                with use_shard(alias):
+                    data = super().list(request, *args, **kwargs).data
+                if isinstance(data, dict):
+                    shard_results.append(data['results'])
+                    users.update(data['users'])
+                else:
+                    shard_results.append(data)
+        finally:
+            self._paginator = paginator
+        results = list(heapq.merge(*shard_results, key=itemgetter('id')))
+
+        if wants_normalized(request):
+            return Response({"results": results, "users": users})
+        page = self.paginate_queryset(results)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(results)
+
+
+class ConditionalUpdateMixin:
+    """
+    View mixin for models with a version column.
+    Responses carry the version as ETag header, and an If-Match header on updates
+    is passed to the serializer as the expected version (412 on mismatch).
+    """
+    def get_object(self):
+        self.versioned_object = super().get_object()
+        return self.versioned_object
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if_match = self.request.headers.get('If-Match')
+        if if_match and if_match.strip() != '*':
+            try:
+                context['expected_version'] = int(if_match.strip().removeprefix('W/').strip('"'))
+            except ValueError:
+                raise PreconditionFailed()
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        instance = getattr(self, 'versioned_object', None)
+        if instance is not None and request.method != 'DELETE' and response.status_code < 300:
+            response['ETag'] = f'"{instance.version}"'
+        return response
+
+
+class BoardsView(InstrumentedViewMixin, ShardedListMixin, generics.ListCreateAPIView):
     """
     API view to list and create Kanban boards.
     Returns only boards owned by the current user or boards where the user is assigned to tasks.
@@ -26,13 +128,16 @@ class BoardsView(generics.ListCreateAPIView):
         return KanbanBoard.objects.filter(Q(owner=user) | Q(board_tasks__assignee=user)).distinct()
     
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with use_shard(shard_for_new_board(self.request.user)):
+            serializer.save(owner=self.request.user)
 
       
-class BoardsDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BoardsDetailView(InstrumentedViewMixin, ShardRoutedMixin, ConditionalUpdateMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Kanban board.   
     Only board owners or members can access the board.
+    Board details are read from the board projection (see kanban_app.projections).
+    Updates honor If-Match with the ETag version and return 412 on conflicts.
     """
     queryset = KanbanBoard.objects.all()
     permission_classes = [IsBoardOwnerOrMember]
@@ -44,56 +149,343 @@ class BoardsDetailView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.method in ['PATCH', 'PUT']:
             return BoardUpdateSerializer
         return BoardDetailSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Serve the board detail from its projection instead of serializing it on every read.
+        """
+        board = self.get_object()
+        document = get_board_document(board)
+        if wants_normalized(request):
+            document = normalize_board_document(document)
+        return Response(document)
+
+    def perform_destroy(self, instance):
+        delete_board(instance)
+
+
+class BoardArchiveView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to archive a Kanban board.   
+    Archived boards and their tasks are hidden but can be restored. Only the owner can archive.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwner]
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        archive_board(board)
+        return Response({"id": board.id, "archived_at": board.archived_at}, status=status.HTTP_200_OK)
+
+
+class BoardRestoreView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to restore an archived Kanban board.   
+    Boards pending deletion cannot be restored. Only the owner can restore.
+    """
+    queryset = KanbanBoard.all_objects.filter(archived_at__isnull=False, deleted_at__isnull=True)
+    permission_classes = [IsBoardOwner]
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        restore_board(board)
+        return Response(BoardSerializer(board).data, status=status.HTTP_200_OK)
       
         
-class EmailCheckView(APIView):
+class BoardMembersView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view for incremental member management of a Kanban board.   
+    GET lists members with cursor pagination. POST adds and DELETE removes the users
+    in 'user_ids' with one set-based write, independent of the board's member count.
+    DELETE on /members/<user_pk>/ removes a single member.
+    Only board owners or members can manage members.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [CanManageBoardMembers]
+    serializer_class = BoardMembersSerializer
+    pagination_class = MemberCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        page = self.paginate_queryset(User.objects.filter(kanban_boards=board))
+        return self.get_paginated_response(UserDataSerializer(page, many=True).data)
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['user_ids']
+        board.members.add(*user_ids)
+        users = User.objects.filter(id__in=user_ids).order_by('id')
+        return Response(UserDataSerializer(users, many=True).data, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, *args, **kwargs):
+        board = self.get_object()
+        if 'user_pk' in kwargs:
+            user_ids = [kwargs['user_pk']]
+        else:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            user_ids = serializer.validated_data['user_ids']
+        board.members.remove(*user_ids)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BoardCloneView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to clone a Kanban board with its members and tasks.   
+    Only board owners or members can clone a board. The current user owns the copy.
+    Tasks can optionally be reset to 'to_do', lose their due dates, or keep their comments.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwnerOrMember]
+    serializer_class = BoardCloneSerializer
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_board = clone_board(board, request.user, **serializer.validated_data)
+        return Response(BoardSerializer(new_board).data, status=status.HTTP_201_CREATED)
+
+
+class BoardAnalyticsView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view for board analytics: cumulative flow, throughput and cycle time.   
+    Served from the daily rollups, so the cost depends on the window, not on the board size.
+    Accepts 'from' and 'to' dates (YYYY-MM-DD) or 'days' (default 30, max 365).
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwnerOrMember]
+    max_days = 365
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        start, end = self.get_window()
+        return Response(board_analytics(board, start, end), status=status.HTTP_200_OK)
+
+    def get_window(self):
+        params = self.request.query_params
+        try:
+            end = parse_date(params['to']) if params.get('to') else timezone.localdate()
+            start = parse_date(params['from']) if params.get('from') else None
+        except ValueError:
+            raise ValidationError({"error": "Invalid date range."})
+
+        if not params.get('from'):
+            try:
+                days = int(params.get('days', 30))
+            except ValueError:
+                raise ValidationError({"days": "Days must be an integer."})
+            start = end - datetime.timedelta(days=max(1, min(days, self.max_days)) - 1) if end else None
+
+        if not start or not end or start > end:
+            raise ValidationError({"error": "Invalid date range."})
+        if (end - start).days >= self.max_days:
+            raise ValidationError({"error": f"The date range can span at most {self.max_days} days."})
+        return start, end
+
+
+class BoardHistoryView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view for the task history of a board.   
+    Lists tasks that were moved out of the live tables after being done for a while,
+    with their comments, most recently completed first and cursor paginated.
+    Only board owners or members can read the history.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwnerOrMember]
+    pagination_class = HistoryCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        history = (
+            HistoricTask.objects.filter(board=board)
+            .select_related('assignee', 'reviewer')
+            .prefetch_related(Prefetch('comments', queryset=HistoricComment.objects.select_related('author').order_by('created_at', 'id')))
+        )
+        page = self.paginate_queryset(history)
+        return self.get_paginated_response(HistoricTaskSerializer(page, many=True).data)
+
+
+class BoardDependenciesView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view for the dependency graph of a board.   
+    Lists the tasks with dependencies in topological order with their blockers,
+    the tasks still blocked by unfinished tasks and the critical path.
+    Served from a per-board cache that is dropped when an edge or a task status changes.
+    Only board owners or members can read the graph.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwnerOrMember]
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        return Response(get_dependency_document(board.pk))
+
+
+class BoardWebhooksView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to list and create the webhook subscriptions of a board.   
+    Subscriptions receive task, comment and board events in signed batches.
+    Only the board owner can manage webhooks.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwner]
+    serializer_class = WebhookSubscriptionSerializer
+
+    def get(self, request, *args, **kwargs):
+        board = self.get_object()
+        return Response(self.get_serializer(board.webhooks.order_by('id'), many=True).data)
+
+    def post(self, request, *args, **kwargs):
+        board = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(board=board, created_by=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class BoardWebhookDetailView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to read, update or delete a single webhook subscription of a board.   
+    Only the board owner can manage webhooks.
+    """
+    queryset = KanbanBoard.objects.all()
+    permission_classes = [IsBoardOwner]
+    serializer_class = WebhookSubscriptionSerializer
+
+    def get_subscription(self):
+        board = self.get_object()
+        return get_object_or_404(WebhookSubscription, board=board, pk=self.kwargs['webhook_pk'])
+
+    def get(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_subscription()).data)
+
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_subscription(), data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    def delete(self, request, *args, **kwargs):
+        self.get_subscription().delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class EmailCheckView(InstrumentedViewMixin, APIView):
     """
     API view to check if an email address is registered.   
-    Returns user information if email exists, 404 if not found.
+    GET returns user information if email exists, 404 if not found.
+    POST resolves a batch of emails in one query and lists found and missing addresses.
+    Lookups are case-insensitive, cached briefly and throttled per user to prevent
+    enumerating registered emails.
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserQuotaThrottle, EmailCheckRateThrottle]
     
     def get(self, request):
         email = request.query_params.get('email')
         if not email:
             return Response({"error": "Email parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = User.objects.filter(email=email).first()
-        exists = user is not None
+        user = lookup_users_by_email([email])[normalize_email(email)]
         
-        if exists:
+        if user:
             return Response({
-                "id": user.id,
+                "id": user['id'],
                 "email": email,
-                "fullname": f"{user.first_name} {user.last_name}".strip()
+                "fullname": user['fullname']
             }, status=status.HTTP_200_OK)
         else:
             return Response({"message": "Email not found. The email address does not exist."}, status=status.HTTP_404_NOT_FOUND)
+
+    def check_throttles(self, request):
+        """Validate batches before the throttle charges one token per address."""
+        if request.method == 'POST':
+            self.validate_batch(request.data.get('emails') if isinstance(request.data, Mapping) else None)
+        super().check_throttles(request)
+
+    def validate_batch(self, emails):
+        limit = settings.EMAIL_CHECK_BATCH_LIMIT
+        if not isinstance(emails, list) or not emails or not all(isinstance(email, str) for email in emails):
+            raise ValidationError({"error": "A non-empty list of emails is required."})
+        if len(emails) > limit:
+            raise ValidationError({"error": f"At most {limit} emails can be checked at once."})
+
+    def post(self, request):
+        emails = request.data.get('emails')
+        users = lookup_users_by_email(emails)
+        found, missing = [], []
+        for email in dict.fromkeys(emails):
+            user = users[normalize_email(email)]
+            if user:
+                found.append({"id": user['id'], "email": email, "fullname": user['fullname']})
+            else:
+                missing.append(email)
+
+        return Response({"found": found, "missing": missing}, status=status.HTTP_200_OK)
         
         
-class AssignedTasksView(generics.ListAPIView):
+class NormalizedTaskListMixin:
+    """
+    List view mixin for task lists.
+    With ?normalize=true tasks reference assignee and reviewer by id and the
+    users are side-loaded once: {"results": [...], "users": {"<id>": {...}}}.
+    """
+    def list(self, request, *args, **kwargs):
+        if not wants_normalized(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        tasks = NormalizedTaskSerializer(queryset, many=True, context=self.get_serializer_context()).data
+        return Response({"results": tasks, "users": load_users(tasks)})
+
+
+class StreamedTaskListMixin:
+    """
+    List view mixin for task lists that can grow large.
+    With ?stream=true only the needed columns are fetched in chunks and serialized
+    row by row into a streamed response, so memory does not grow with the list.
+    Combines with ?normalize=true. Under ASGI the rows are streamed through an async
+    iterator. Views implement filter_tasks().
+    """
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        return stream_task_list(
+            lambda: self.filter_tasks(Task.objects.all()),
+            normalized=wants_normalized(request),
+            asynchronous=is_asgi(request),
+        )
+
+    def get_queryset(self):
+        return self.filter_tasks(task_queryset())
+
+
+class AssignedTasksView(InstrumentedViewMixin, StreamedTaskListMixin, ShardedListMixin, NormalizedTaskListMixin, generics.ListAPIView):
     """
     API view to list all tasks assigned to the current user.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
 
-    def get_queryset(self):
-        return Task.objects.filter(assignee=self.request.user)
+    def filter_tasks(self, tasks):
+        return tasks.filter(assignee=self.request.user)
     
     
-class ReviewingTasksView(generics.ListAPIView):
+class ReviewingTasksView(InstrumentedViewMixin, StreamedTaskListMixin, ShardedListMixin, NormalizedTaskListMixin, generics.ListAPIView):
     """
     API view to list all tasks where the current user is a reviewer.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
 
-    def get_queryset(self):
-        return Task.objects.filter(reviewer_id=self.request.user)
+    def filter_tasks(self, tasks):
+        return tasks.filter(reviewer_id=self.request.user)
     
     
-class TasksView(generics.ListCreateAPIView):
+class TasksView(InstrumentedViewMixin, generics.ListCreateAPIView):
     """
     API view to list and create tasks.   
     Only board members can create tasks for that board.
@@ -107,12 +499,13 @@ class TasksView(generics.ListCreateAPIView):
         """
         board_id = request.data.get('board')
         
-        if board_id:
-            board = KanbanBoard.objects.filter(id=board_id).first()
-            if not board:
-                return Response({"message": "Board not found. Board does not exist."}, status=status.HTTP_404_NOT_FOUND)
-        
-        return super().create(request, *args, **kwargs)
+        with use_shard(resolve_shard('board', board_id)):
+            if board_id:
+                board = KanbanBoard.objects.filter(id=board_id).first()
+                if not board:
+                    return Response({"message": "Board not found. Board does not exist."}, status=status.HTTP_404_NOT_FOUND)
+            
+            return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
@@ -121,69 +514,227 @@ class TasksView(generics.ListCreateAPIView):
         board = serializer.validated_data.get('board')
         user = self.request.user
         
-        if user != board.owner and user not in board.members.all():
+        if not is_board_member(board, user):
             raise PermissionDenied("You must be a member of the board to create tasks.")
         
         serializer.save(created_by=user)
     
     
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailView(InstrumentedViewMixin, ShardRoutedMixin, ConditionalUpdateMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific task.   
     Only board members can access. Only task creator or board owner can delete.
+    Updates honor If-Match with the ETag version and return 412 on conflicts.
     """
+    shard_lookup = 'task'
     permission_classes = [IsTaskBoardMember]
     serializer_class = TaskDetailSerializer
-    queryset = Task.objects.all()
+    queryset = Task.objects.select_related('board')
+
+
+class TaskMoveView(InstrumentedViewMixin, ShardRoutedMixin, ConditionalUpdateMixin, generics.GenericAPIView):
+    """
+    API view to reorder a task within its column or move it to another column.   
+    The new position is stored as a rank key between the neighbors, so only the moved row is written.
+    Moves honor If-Match with the ETag version and return 412 on conflicts.
+    Only board members can move tasks.
+    """
+    shard_lookup = 'task'
+    permission_classes = [IsTaskBoardMember]
+    serializer_class = TaskMoveSerializer
+    queryset = Task.objects.select_related('board')
+
+    def post(self, request, *args, **kwargs):
+        task = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        expected_version = serializer.context.get('expected_version')
+        try:
+            move_task(task, expected_version=expected_version, **serializer.validated_data)
+        except VersionConflict:
+            raise PreconditionFailed()
+        except ValueError as error:
+            raise ValidationError({"detail": str(error)})
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
     
     
-class TaskCommentsView(generics.ListCreateAPIView):
+class TaskDependenciesView(InstrumentedViewMixin, ShardRoutedMixin, generics.GenericAPIView):
+    """
+    API view to add and remove the blockers of a task.   
+    POST marks the task as blocked by the task in 'blocked_by', which must belong to
+    the same board. Edges that would create a cycle are rejected with 400.
+    DELETE on /dependencies/<blocked_by_pk>/ removes a blocker.
+    Only board members can change dependencies.
+    """
+    shard_lookup = 'task'
+    permission_classes = [IsAuthenticated]
+    serializer_class = TaskDependencySerializer
+
+    def get_task(self):
+        """
+        Get the task and verify the user is a board member, in a single query.
+        Raises:
+            Http404: If task does not exist
+            PermissionDenied: If user is not a board member
+        """
+        task = get_object_or_404(
+            Task.objects.only('id', 'board_id', 'status').annotate(board_access=board_access_expression(self.request.user)),
+            id=self.kwargs['pk'],
+        )
+        if not task.board_access:
+            raise PermissionDenied("You must be a member of the board to change task dependencies.")
+        return task
+
+    def post(self, request, *args, **kwargs):
+        task = self.get_task()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        blocked_by = Task.objects.only('id', 'board_id').filter(pk=serializer.validated_data['blocked_by']).first()
+        if blocked_by is None:
+            raise ValidationError({"blocked_by": "Task not found."})
+        try:
+            add_dependency(task, blocked_by)
+        except ValueError as error:
+            raise ValidationError({"blocked_by": str(error)})
+        return Response({"task": task.pk, "blocked_by": blocked_by.pk}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, *args, **kwargs):
+        task = self.get_task()
+        edge = get_object_or_404(TaskDependency, task=task, blocked_by_id=self.kwargs['blocked_by_pk'])
+        edge.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskCommentsView(InstrumentedViewMixin, ShardRoutedMixin, generics.ListCreateAPIView):
     """
     API view to list and create comments for a specific task.   
     Only board members can view and create comments.
     Comments are sorted chronologically by creation date.
+    Supports keyset pagination via 'limit' and 'before' to load older comments.
     """
+    shard_lookup = 'task'
     permission_classes = [IsAuthenticated]
     serializer_class = TaskCommentsSerializer
+    pagination_class = CommentKeysetPagination
 
     def get_task_and_check_membership(self):
         """
-        Helper method to get task and verify user is a board member.      
+        Helper method to get task and verify user is a board member.
+        Task lookup and membership check run as a single query.
         Returns:
             Task: The task instance if user is a board member           
         Raises:
             Http404: If task does not exist
             PermissionDenied: If user is not a board member
         """
-        task_id = self.kwargs['pk']
-        task = get_object_or_404(Task, id=task_id)
-        board = task.board
-        user = self.request.user
-        
-        if user != board.owner and user not in board.members.all():
+        task = get_object_or_404(
+            Task.objects.only('id', 'board_id').annotate(board_access=board_access_expression(self.request.user)),
+            id=self.kwargs['pk'],
+        )
+
+        if not task.board_access:
             raise PermissionDenied("You must be a member of the board to access task comments.")
-        
+
         return task
 
     def get_queryset(self):
         task = self.get_task_and_check_membership()
-        return task.task_comments.all().order_by('created_at')
+        return Comment.objects.filter(task_id=task.id).select_related('author').order_by('created_at', 'id')
     
     def perform_create(self, serializer):
         task = self.get_task_and_check_membership()
         serializer.save(author=self.request.user, task=task)
     
    
-class TaskCommentsDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskCommentsDetailView(InstrumentedViewMixin, ShardRoutedMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific comment.  
     Only board members can access comments. Only the comment author can delete it.
     """
+    shard_lookup = 'task'
     permission_classes = [IsCommentBoardMember]
     serializer_class = TaskCommentsSerializer
     lookup_url_kwarg = 'comment_pk'
 
     def get_queryset(self):
-        task_id = self.kwargs['pk']
-        task = get_object_or_404(Task, id=task_id)
-        return task.task_comments.all()
+        return (
+            Comment.objects.filter(task_id=self.kwargs['pk'], task__archived_at__isnull=True)
+            .select_related('author')
+            .annotate(board_access=board_access_expression(self.request.user, 'task__board'))
+        )
+
+
+class SavedViewsView(InstrumentedViewMixin, generics.ListCreateAPIView):
+    """
+    API view to list and create the saved views of the current user.   
+    Counts are read from the stored counters, only missing or outdated ones are recounted.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = SavedViewSerializer
+
+    def get_queryset(self):
+        return SavedView.objects.filter(user=self.request.user).order_by('name', 'id')
+
+    def list(self, request, *args, **kwargs):
+        views = list(self.get_queryset())
+        ensure_counted(views)
+        return Response(self.get_serializer(views, many=True).data)
+
+    def perform_create(self, serializer):
+        view = serializer.save(user=self.request.user)
+        ensure_counted([view])
+
+
+class SavedViewDetailView(InstrumentedViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    API view to retrieve, update or delete a saved view of the current user.   
+    Changing the filters drops the stored count and cached results.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = SavedViewSerializer
+
+    def get_queryset(self):
+        return SavedView.objects.filter(user=self.request.user)
+
+    def get_object(self):
+        view = super().get_object()
+        ensure_counted([view])
+        return view
+
+    def perform_update(self, serializer):
+        filters_changed = 'filters' in serializer.validated_data and serializer.validated_data['filters'] != serializer.instance.filters
+        view = serializer.save()
+        if filters_changed:
+            invalidate_views([view])
+            ensure_counted([view])
+
+
+class SavedViewTasksView(InstrumentedViewMixin, generics.GenericAPIView):
+    """
+    API view to list the tasks of a saved view.   
+    Results are served from the cache and kept up to date from task changes,
+    so opening a saved view does not query the tasks. Accepts ?normalize=true.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedView.objects.filter(user=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        tasks = get_results(self.get_object())
+        if wants_normalized(request):
+            users = {}
+            return Response({"results": side_load_task_users(tasks, users), "users": users})
+        return Response(tasks)
+
+
+class MetricsView(APIView):
+    """
+    API view serving the metrics registry in the Prometheus text format.   
+    With KANBAN_METRICS_DIR set the metrics of all worker processes are added up.
+    Only staff users can read metrics.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class KanbanAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kanban_app'
+
+    def ready(self):
+        from core.metrics import install_query_metrics
+        from kanban_app import signals  # noqa: F401
+        from kanban_app.sharding import reserve_shard_id_range
+
+        post_migrate.connect(reserve_shard_id_range, sender=self)
+        connection_created.connect(install_query_metrics)
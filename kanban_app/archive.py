@@ -0,0 +1,149 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from kanban_app.models import BoardDailyStats, BoardProjection, HistoricComment, HistoricTask, KanbanBoard, Task, TaskDependency, TaskStatusTransition, Comment, WebhookDeadLetter, WebhookSubscription
+from kanban_app.saved_views import invalidate_views_of_board
+from kanban_app.sharding import current_shard, use_shard
+
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK_SIZE = 500
+
+
+def archive_board(board):
+    """
+    Soft delete a board and its tasks.
+    Both are hidden from the default managers but can be restored.
+    Args:
+        board: The KanbanBoard to archive
+    Returns:
+        datetime: The archive timestamp
+    """
+    archived_at = timezone.now()
+    with transaction.atomic(using=board._state.db):
+        KanbanBoard.all_objects.filter(pk=board.pk).update(archived_at=archived_at)
+        Task.all_objects.filter(board_id=board.pk, archived_at__isnull=True).update(archived_at=archived_at)
+        transaction.on_commit(lambda: invalidate_views_of_board(board.pk, using=board._state.db), using=board._state.db)
+    board.archived_at = archived_at
+    return archived_at
+
+
+def restore_board(board):
+    """
+    Restore an archived board together with the tasks archived with it.
+    Args:
+        board: The archived KanbanBoard
+    """
+    with transaction.atomic(using=board._state.db):
+        Task.all_objects.filter(board_id=board.pk, archived_at=board.archived_at).update(archived_at=None)
+        KanbanBoard.all_objects.filter(pk=board.pk).update(archived_at=None)
+        transaction.on_commit(lambda: invalidate_views_of_board(board.pk, using=board._state.db), using=board._state.db)
+    board.archived_at = None
+
+
+def delete_board(board):
+    """
+    Delete a board without blocking the request.
+    The board is archived and marked as deleted right away, the rows are
+    removed afterwards by a background purge (or the purge_boards command).
+    Args:
+        board: The KanbanBoard to delete
+    """
+    using = board._state.db
+    with transaction.atomic(using=using):
+        archive_board(board)
+        KanbanBoard.all_objects.filter(pk=board.pk).update(deleted_at=timezone.now())
+        transaction.on_commit(lambda: schedule_board_purge(board.pk, shard=using), using=using)
+
+
+def schedule_board_purge(board_id, shard=None):
+    """
+    Run purge_board in a background thread unless KANBAN_BACKGROUND_PURGE is disabled.
+    Boards that are not purged here are picked up by the purge_boards command.
+    """
+    if not getattr(settings, 'KANBAN_BACKGROUND_PURGE', True):
+        return
+
+    thread = threading.Thread(target=_purge_in_background, args=(board_id, shard or current_shard()), daemon=True)
+    thread.start()
+    return thread
+
+
+def _purge_in_background(board_id, shard):
+    try:
+        with use_shard(shard):
+            purge_board(board_id)
+    except Exception:
+        logger.exception("Background purge of board %s failed", board_id)
+    finally:
+        connections.close_all()
+
+
+def purge_board(board_id, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Hard delete a board in bounded chunks: comments, analytics rows, task dependencies, tasks, task history, memberships, projection, webhooks, then the board.
+    Every chunk runs in its own short transaction so the database is never locked for long.
+    Rows are deleted with plain DELETE statements (see delete_rows), without loading them
+    or sending model signals, so dependent rows must be deleted before the rows they reference.
+    Args:
+        board_id: Primary key of the board to purge
+        chunk_size: Maximum number of rows deleted per statement
+    Returns:
+        int: Total number of deleted rows
+    """
+    Membership = KanbanBoard.members.through
+    deleted = 0
+    deleted += _delete_in_chunks(Comment.objects.filter(task__board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(TaskStatusTransition.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(BoardDailyStats.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(TaskDependency.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(Task.all_objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(HistoricComment.objects.filter(task__board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(HistoricTask.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(Membership.objects.filter(kanbanboard_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(BoardProjection.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(WebhookDeadLetter.objects.filter(subscription__board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(WebhookSubscription.objects.filter(board_id=board_id), chunk_size)
+    deleted += _delete_in_chunks(KanbanBoard.all_objects.filter(pk=board_id), chunk_size)
+    return deleted
+
+
+def _delete_in_chunks(queryset, chunk_size):
+    deleted = 0
+    model = queryset.model
+    using = router.db_for_write(model)
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(queryset.using(using).values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += delete_rows(model, 'pk', ids, using)
+
+
+def delete_rows(model, field, values, using):
+    """
+    Delete the rows whose field is one of the values with a single plain DELETE statement,
+    without loading them, cascading or sending model signals.
+    Args:
+        model: The model whose table is deleted from
+        field: Field name ('pk' for the primary key), the bound for one statement is the number of values
+        values: Values to match
+        using: Database alias
+    Returns:
+        int: Number of deleted rows
+    """
+    values = list(values)
+    if not values:
+        return 0
+    column = model._meta.pk.column if field == 'pk' else model._meta.get_field(field).column
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {quote_name(model._meta.db_table)} WHERE {quote_name(column)} IN ({placeholders})', values)
+        return cursor.rowcount
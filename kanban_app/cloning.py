@@ -0,0 +1,86 @@
+from django.db import transaction
+
+from kanban_app.analytics import STATUSES
+from kanban_app.models import KanbanBoard, Task, TaskDependency, Comment
+from kanban_app.ranking import evenly_spaced_ranks
+from kanban_app.saved_views import invalidate_views_of_board
+
+
+TASK_COPY_FIELDS = ['id', 'title', 'description', 'status', 'priority', 'assignee_id', 'reviewer_id_id', 'due_date', 'rank']
+
+
+def clone_board(board, owner, title=None, reset_status=False, reset_dates=False, include_comments=False):
+    """
+    Copy a board with its members, tasks and task dependencies (and optionally comments) into a new board.
+    Archived tasks are left out, copied comments keep their creation time.
+    All rows are written with set-based bulk inserts inside a single transaction,
+    so the cost grows with the number of insert batches rather than with one
+    validated request per task.
+    Args:
+        board: The KanbanBoard to copy
+        owner: User who will own the new board
+        title: Title of the new board, defaults to the source board title
+        reset_status: Put every copied task back into 'to_do'
+        reset_dates: Clear the due dates of the copied tasks
+        include_comments: Copy the comments of every task as well
+    Returns:
+        KanbanBoard: The newly created board
+    """
+    with transaction.atomic(using=board._state.db):
+        new_board = KanbanBoard.objects.create(title=title or board.title, owner=owner)
+
+        member_ids = set(board.members.values_list('id', flat=True))
+        member_ids.add(board.owner_id)
+        member_ids.discard(owner.id)
+        Membership = KanbanBoard.members.through
+        Membership.objects.bulk_create(
+            Membership(kanbanboard_id=new_board.id, user_id=user_id) for user_id in sorted(member_ids)
+        )
+
+        source_tasks = list(board.board_tasks.order_by('id').values(*TASK_COPY_FIELDS))
+        if reset_status:
+            merged = sorted(source_tasks, key=lambda task: (STATUSES.index(task['status']), task['rank'], task['id']))
+            ranks = dict(zip((task['id'] for task in merged), evenly_spaced_ranks(len(merged))))
+        else:
+            ranks = {task['id']: task['rank'] for task in source_tasks}
+        new_tasks = Task.objects.bulk_create([
+            Task(
+                board_id=new_board.id,
+                title=task['title'],
+                description=task['description'],
+                status='to_do' if reset_status else task['status'],
+                priority=task['priority'],
+                assignee_id=task['assignee_id'],
+                reviewer_id_id=task['reviewer_id_id'],
+                created_by_id=owner.id,
+                due_date=None if reset_dates else task['due_date'],
+                rank=ranks[task['id']],
+            )
+            for task in source_tasks
+        ])
+
+        task_id_map = {task['id']: new_task.id for task, new_task in zip(source_tasks, new_tasks)}
+        source_edges = board.task_dependencies.filter(
+            task__archived_at__isnull=True, blocked_by__archived_at__isnull=True,
+        ).order_by('id').values_list('task_id', 'blocked_by_id')
+        TaskDependency.objects.bulk_create(
+            TaskDependency(board_id=new_board.id, task_id=task_id_map[task_id], blocked_by_id=task_id_map[blocked_by_id])
+            for task_id, blocked_by_id in source_edges.iterator()
+        )
+
+        if include_comments and new_tasks:
+            source_comments = list(
+                Comment.objects.filter(task_id__in=task_id_map)
+                .order_by('task_id', 'created_at', 'id')
+                .values_list('task_id', 'author_id', 'content', 'created_at')
+            )
+            new_comments = Comment.objects.bulk_create(
+                Comment(task_id=task_id_map[task_id], author_id=author_id, content=content)
+                for task_id, author_id, content, _ in source_comments
+            )
+            for comment, (_, _, _, created_at) in zip(new_comments, source_comments):
+                comment.created_at = created_at
+            Comment.objects.bulk_update(new_comments, ['created_at'], batch_size=500)
+
+        transaction.on_commit(lambda: invalidate_views_of_board(new_board.id, using=board._state.db), using=board._state.db)
+        return new_board
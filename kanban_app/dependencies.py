@@ -0,0 +1,185 @@
+import heapq
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import router, transaction
+
+from core.metrics import cache_lookup
+from kanban_app.models import KanbanBoard, TaskDependency
+
+
+GRAPH_CACHE_TIMEOUT = 60 * 60
+
+
+class DependencyCycle(ValueError):
+    """Raised when a new edge would make a task (indirectly) block itself."""
+
+
+class DependencyGraph:
+    """
+    In-memory "blocked by" graph of a board.
+    Edges point from the blocking task to the blocked task. Only tasks with at least
+    one edge are part of the graph.
+    """
+    def __init__(self, edges, statuses):
+        """
+        Args:
+            edges: Iterable of (task_id, blocked_by_id) pairs
+            statuses: Dict of task id to status for every task in the edges
+        """
+        self.statuses = statuses
+        self.blockers = defaultdict(set)
+        self.dependents = defaultdict(set)
+        for task_id, blocked_by_id in edges:
+            self.blockers[task_id].add(blocked_by_id)
+            self.dependents[blocked_by_id].add(task_id)
+
+    @classmethod
+    def load(cls, board_id, using=None):
+        """Load the graph of a board with one query over the board's edges and both tasks' status."""
+        rows = TaskDependency.objects.db_manager(using).filter(board_id=board_id).values_list(
+            'task_id', 'blocked_by_id', 'task__status', 'blocked_by__status',
+        )
+        edges, statuses = [], {}
+        for task_id, blocked_by_id, task_status, blocked_by_status in rows:
+            edges.append((task_id, blocked_by_id))
+            statuses[task_id] = task_status
+            statuses[blocked_by_id] = blocked_by_status
+        return cls(edges, statuses)
+
+    def reaches(self, start, target):
+        """Check if target is downstream of start, i.e. (indirectly) blocked by it."""
+        stack, seen = [start], {start}
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            for dependent in self.dependents.get(node, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return False
+
+    def would_create_cycle(self, task_id, blocked_by_id):
+        """A new edge blocked_by -> task closes a cycle if the blocker already depends on the task."""
+        return task_id == blocked_by_id or self.reaches(task_id, blocked_by_id)
+
+    def topological_order(self):
+        """
+        Order the tasks so every task comes after the tasks blocking it (Kahn's algorithm).
+        Ties are broken by task id, so the order is stable.
+        """
+        pending = {task_id: len(self.blockers.get(task_id, ())) for task_id in self.statuses}
+        ready = [task_id for task_id, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.dependents.get(node, ()):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        return order
+
+    def critical_path(self, order=None):
+        """
+        Longest chain of unfinished tasks, each depending on the previous one.
+        Finished tasks do not add to the length, the chain is the shortest remaining schedule.
+        """
+        order = order if order is not None else self.topological_order()
+        length, previous = {}, {}
+        for node in order:
+            best, best_blocker = 0, None
+            for blocker in self.blockers.get(node, ()):
+                if length[blocker] > best:
+                    best, best_blocker = length[blocker], blocker
+            weight = 0 if self.statuses[node] == 'done' else 1
+            length[node] = best + weight
+            previous[node] = best_blocker if weight or best else None
+
+        if not length or max(length.values()) == 0:
+            return []
+        node = max(order, key=lambda task_id: (length[task_id], -task_id))
+        path = []
+        while node is not None:
+            if self.statuses[node] != 'done':
+                path.append(node)
+            node = previous[node]
+        path.reverse()
+        return path
+
+    def blocked_tasks(self):
+        """Unfinished tasks with at least one unfinished blocker."""
+        return sorted(
+            task_id for task_id, blockers in self.blockers.items()
+            if self.statuses[task_id] != 'done' and any(self.statuses[blocker] != 'done' for blocker in blockers)
+        )
+
+    def to_document(self):
+        order = self.topological_order()
+        return {
+            'tasks': [
+                {
+                    'id': task_id,
+                    'status': self.statuses[task_id],
+                    'blocked_by': sorted(self.blockers.get(task_id, ())),
+                }
+                for task_id in order
+            ],
+            'blocked': self.blocked_tasks(),
+            'critical_path': self.critical_path(order),
+        }
+
+
+def graph_cache_key(board_id):
+    return f'kanban:dependency_graph:{board_id}'
+
+
+def get_dependency_document(board_id):
+    """
+    Return the board's dependency view: tasks in topological order with their blockers,
+    the blocked tasks and the critical path. Cached per board until an edge or a status changes.
+    """
+    key = graph_cache_key(board_id)
+    document = cache.get(key)
+    cache_lookup('dependency_graph', document is not None)
+    if document is None:
+        document = DependencyGraph.load(board_id).to_document()
+        cache.set(key, document, GRAPH_CACHE_TIMEOUT)
+    return document
+
+
+def invalidate_dependency_graph(board_id, using=None):
+    """
+    Drop the cached graph now and again after commit, so a read racing the
+    transaction cannot keep a stale graph in the cache.
+    """
+    key = graph_cache_key(board_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=using)
+
+
+def add_dependency(task, blocked_by):
+    """
+    Mark a task as blocked by another task of the same board.
+    The board row is locked while the graph is checked, so concurrent inserts cannot
+    combine into a cycle.
+    Raises:
+        ValueError: If the tasks belong to different boards
+        DependencyCycle: If the edge would create a cycle (a ValueError as well)
+    Returns:
+        TaskDependency: The new or existing edge
+    """
+    if task.board_id != blocked_by.board_id:
+        raise ValueError("Tasks must belong to the same board.")
+
+    using = router.db_for_write(TaskDependency, instance=task)
+    with transaction.atomic(using=using):
+        KanbanBoard.all_objects.using(using).select_for_update().filter(pk=task.board_id).values_list('pk', flat=True).first()
+        graph = DependencyGraph.load(task.board_id, using)
+        if blocked_by.pk in graph.blockers.get(task.pk, ()):
+            return TaskDependency.objects.using(using).get(task=task, blocked_by=blocked_by)
+        if graph.would_create_cycle(task.pk, blocked_by.pk):
+            raise DependencyCycle(f"Task {blocked_by.pk} already depends on task {task.pk}.")
+        return TaskDependency.objects.using(using).create(board_id=task.board_id, task=task, blocked_by=blocked_by)
@@ -0,0 +1,129 @@
+import datetime
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from kanban_app.archive import delete_rows
+from kanban_app.dependencies import invalidate_dependency_graph
+from kanban_app.models import Comment, HistoricComment, HistoricTask, ShardRoute, Task, TaskDependency, TaskStatusTransition
+from kanban_app.projections import remove_task_entries
+from kanban_app.saved_views import invalidate_views_of_board
+from kanban_app.sharding import sharding_enabled
+
+
+HISTORY_BATCH_SIZE = 500
+
+
+def history_candidates(older_than_days=None, board_id=None):
+    """
+    Live tasks that have been done for longer than the given number of days.
+    A task's updated_at is at least its completion time, so tasks edited after
+    completion simply stay live a little longer.
+    Args:
+        older_than_days: Age in days, defaults to KANBAN_HISTORY_AFTER_DAYS
+        board_id: Only consider tasks of this board
+    """
+    if older_than_days is None:
+        older_than_days = settings.KANBAN_HISTORY_AFTER_DAYS
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    tasks = Task.objects.filter(status='done', updated_at__lt=cutoff)
+    if board_id is not None:
+        tasks = tasks.filter(board_id=board_id)
+    return tasks
+
+
+def move_to_history(older_than_days=None, board_id=None, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Move old done tasks with their comments from the live tables to the history tables.
+    Works through the candidates in batches, each in its own short transaction.
+    Args:
+        older_than_days: Age in days, defaults to KANBAN_HISTORY_AFTER_DAYS
+        board_id: Only move tasks of this board
+        batch_size: Maximum number of tasks moved per transaction
+    Returns:
+        int: Number of moved tasks
+    """
+    candidates = history_candidates(older_than_days, board_id)
+    moved = 0
+    while True:
+        count = move_batch_to_history(candidates, batch_size)
+        if not count:
+            return moved
+        moved += count
+
+
+def move_batch_to_history(candidates, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Copy one batch of tasks and their comments into the history tables and delete the live rows.
+    Live rows are deleted without model signals: the analytics rollups keep counting the
+    tasks as done, and the board projections, dependency graphs and saved views are patched once per board.
+    Dependency edges of moved tasks are dropped, a done blocker no longer blocks anything.
+    Returns:
+        int: Number of moved tasks
+    """
+    using = router.db_for_write(Task)
+    with transaction.atomic(using=using):
+        tasks = list(candidates.using(using).select_for_update().order_by('pk')[:batch_size])
+        if not tasks:
+            return 0
+
+        task_ids = [task.pk for task in tasks]
+        completed_at = dict(
+            TaskStatusTransition.objects.using(using)
+            .filter(task_id__in=task_ids, to_status='done')
+            .values_list('task_id')
+            .annotate(at=Max('at'))
+            .order_by()
+        )
+        moved_at = timezone.now()
+        HistoricTask.objects.using(using).bulk_create([
+            HistoricTask(
+                id=task.pk,
+                board_id=task.board_id,
+                title=task.title,
+                description=task.description,
+                priority=task.priority,
+                assignee_id=task.assignee_id,
+                reviewer_id=task.reviewer_id_id,
+                created_by_id=task.created_by_id,
+                due_date=task.due_date,
+                created_at=task.created_at,
+                completed_at=completed_at.get(task.pk, task.updated_at),
+                moved_at=moved_at,
+            )
+            for task in tasks
+        ])
+
+        comments = Comment.objects.using(using).filter(task_id__in=task_ids)
+        HistoricComment.objects.using(using).bulk_create((
+            HistoricComment(
+                id=comment.pk,
+                task_id=comment.task_id,
+                author_id=comment.author_id,
+                content=comment.content,
+                created_at=comment.created_at,
+            )
+            for comment in comments.order_by('pk').iterator(chunk_size=batch_size)
+        ), batch_size=batch_size)
+
+        TaskStatusTransition.objects.using(using).filter(task_id__in=task_ids).update(task=None)
+        delete_rows(Comment, 'task', task_ids, using)
+        delete_rows(TaskDependency, 'task', task_ids, using)
+        delete_rows(TaskDependency, 'blocked_by', task_ids, using)
+        delete_rows(Task, 'pk', task_ids, using)
+
+        by_board = {}
+        for task in tasks:
+            by_board.setdefault(task.board_id, []).append(task.pk)
+        for board_id, board_task_ids in by_board.items():
+            remove_task_entries(board_id, board_task_ids)
+            invalidate_dependency_graph(board_id, using=using)
+
+    for board_id in by_board:
+        invalidate_views_of_board(board_id, using=using)
+
+    if sharding_enabled():
+        ShardRoute.objects.filter(kind='task', object_id__in=task_ids).delete()
+    return len(tasks)
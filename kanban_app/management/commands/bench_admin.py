@@ -0,0 +1,89 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kanban_app.models import KanbanBoard, Task, Comment
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the render time of the kanban admin changelists on a seeded database.
+    Seed data is created in a transaction that is rolled back at the end.
+    """
+    help = 'Seed boards, tasks and comments and measure admin changelist render time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--boards', type=int, default=1000)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=3, help='Renders per page, the best time is reported.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            start = time.perf_counter()
+            admin_user = self.seed(options)
+            self.stdout.write(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(admin_user)
+            board_id = KanbanBoard.objects.values_list('id', flat=True).first()
+            pages = [
+                ('boards', reverse('admin:kanban_app_kanbanboard_changelist'), {}),
+                ('tasks', reverse('admin:kanban_app_task_changelist'), {}),
+                ('tasks by status', reverse('admin:kanban_app_task_changelist'), {'status__exact': 'review'}),
+                ('tasks by board', reverse('admin:kanban_app_task_changelist'), {'board_id': board_id}),
+                ('comments', reverse('admin:kanban_app_comment_changelist'), {}),
+            ]
+
+            self.stdout.write(f"{'page':<20}{'ms':>10}{'queries':>10}")
+            for name, url, params in pages:
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = client.get(url, params)
+                        timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.status_code
+                self.stdout.write(f"{name:<20}{min(timings) * 1000:>10.1f}{len(queries):>10}")
+
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        admin_user = User.objects.create_superuser('bench-admin', 'bench-admin@example.com', 'bench-admin')
+        User.objects.bulk_create(
+            User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com') for i in range(options['users'])
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+
+        KanbanBoard.objects.bulk_create(
+            KanbanBoard(title=f'Board {i}', owner_id=user_ids[i % len(user_ids)]) for i in range(options['boards'])
+        )
+        board_ids = list(KanbanBoard.objects.values_list('id', flat=True))
+
+        statuses = ['to_do', 'in_progress', 'review', 'done']
+        priorities = ['low', 'medium', 'high']
+        Task.objects.bulk_create((
+            Task(
+                board_id=board_ids[i % len(board_ids)],
+                title=f'Task {i}',
+                status=statuses[i % len(statuses)],
+                priority=priorities[i % len(priorities)],
+                assignee_id=user_ids[i % len(user_ids)],
+                created_by_id=user_ids[(i + 1) % len(user_ids)],
+            )
+            for i in range(options['tasks'])
+        ), batch_size=5000)
+        task_ids = list(Task.objects.values_list('id', flat=True)[:options['comments']])
+
+        if task_ids:
+            Comment.objects.bulk_create((
+                Comment(task_id=task_ids[i % len(task_ids)], author_id=user_ids[i % len(user_ids)], content=f'Comment {i} ' * 10)
+                for i in range(options['comments'])
+            ), batch_size=5000)
+        return admin_user
@@ -0,0 +1,331 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from kanban_app.archive import purge_board
+from kanban_app.models import KanbanBoard, Task
+from kanban_app.ranking import evenly_spaced_ranks
+
+
+PASSWORD = 'load-test-password'
+STATUSES = ['to_do', 'in_progress', 'review', 'done']
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+_request_queries = contextvars.ContextVar('bench_load_request_queries', default=None)
+
+
+class LoadStats:
+    """
+    Collects one sample per request: scenario, latency, status and error kind.
+    Exceptions are reported by a Django signal and joined to the sample by a request id header.
+    """
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.exceptions = {}
+        self.request_ids = itertools.count(1)
+        self.logins = 0
+
+    def total(self):
+        return sum(len(samples) for samples in self.samples.values())
+
+    def record(self, scenario, request_id, status, elapsed):
+        self.samples[scenario].append(elapsed)
+        error = None
+        if status >= 500:
+            error = self.exceptions.pop(request_id, f'HTTP {status}')
+        elif status >= 400:
+            error = f'HTTP {status}'
+        if error:
+            self.errors[scenario][error] += 1
+
+    def on_exception(self, sender, request=None, **kwargs):
+        exc = sys.exc_info()[1]
+        request_id = int(request.headers.get('X-Load-Request', 0)) if request is not None else 0
+        if exc is None or not request_id:
+            return
+        message = str(exc)
+        self.exceptions[request_id] = 'database is locked' if 'database is locked' in message else type(exc).__name__
+
+    def on_connection_created(self, sender, connection, **kwargs):
+        if count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_query)
+
+
+def count_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+    return execute(sql, params, many, context)
+
+
+class SimulatedUser:
+    """
+    One kanban user replaying a weighted mix of scenarios against the ASGI application.
+    """
+    def __init__(self, application, stats, index, email, board_id, task_ids):
+        self.application = application
+        self.stats = stats
+        self.email = email
+        self.board_id = board_id
+        self.task_ids = task_ids
+        self.client = (f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}', 40000 + index % 20000)
+        self.token = None
+        self.query_counts = defaultdict(list)
+
+    async def run(self, mix, deadline, think_time):
+        scenarios, weights = zip(*mix.items())
+        while time.perf_counter() < deadline:
+            scenario = random.choices(scenarios, weights)[0]
+            await getattr(self, scenario)()
+            if think_time:
+                await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+    async def login(self):
+        status, body = await self.request('login', 'POST', reverse('login'), {'email': self.email, 'password': PASSWORD})
+        if status == 200:
+            self.token = json.loads(body)['token']
+
+    async def poll(self):
+        await self.request('poll', 'GET', reverse('board-detail', args=[self.board_id]))
+
+    async def move(self):
+        task_id = random.choice(self.task_ids)
+        await self.request('move', 'PATCH', reverse('task-detail', args=[task_id]), {'status': random.choice(STATUSES)})
+
+    async def comment(self):
+        task_id = random.choice(self.task_ids)
+        await self.request('comment', 'POST', reverse('task-comments', args=[task_id]), {'content': 'Load test comment'})
+
+    async def request(self, scenario, method, path, data=None):
+        request_id = next(self.stats.request_ids)
+        body = json.dumps(data).encode() if data is not None else b''
+        headers = [
+            (b'host', b'localhost'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'x-load-request', str(request_id).encode()),
+        ]
+        if self.token:
+            headers.append((b'authorization', f'Token {self.token}'.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'headers': headers,
+            'client': self.client, 'server': ('localhost', 80),
+        }
+        disconnect = asyncio.Event()
+        received = []
+        response = {'status': 0, 'body': []}
+
+        async def receive():
+            if not received:
+                received.append(True)
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        # The query counter lives in a context variable, which the tasks and executor calls
+        # serving this request copy. Sync code of concurrent requests shares one executor
+        # thread, so a thread local would mix up their counts.
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnect.set()
+            _request_queries.reset(token)
+        elapsed = time.perf_counter() - start
+
+        self.stats.record(scenario, request_id, response['status'], elapsed)
+        self.query_counts[scenario].append(queries[0])
+        return response['status'], b''.join(response['body'])
+
+
+class Command(BaseCommand):
+    """
+    Load test the API with concurrent simulated users, in process through core.asgi.
+    Every user logs in through LoginView, then polls its board, moves cards through
+    TaskDetailView and comments through TaskCommentsView in a weighted random mix.
+    Seed users and boards are created in the configured database and removed afterwards.
+    Reports throughput, errors (including SQLite 'database is locked'), queries per
+    request and latency percentiles and histograms.
+    """
+    help = 'Run a concurrent load test of the kanban API and report throughput, errors and latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent simulated users.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run after all users logged in.')
+        parser.add_argument('--boards', type=int, default=5, help='Boards shared by the users.')
+        parser.add_argument('--tasks', type=int, default=50, help='Tasks per board.')
+        parser.add_argument('--mix', default='poll=70,move=20,comment=10', help='Scenario weights.')
+        parser.add_argument('--think-time', type=float, default=0.1, help='Mean pause between requests per user, in seconds.')
+        parser.add_argument('--seed', type=int, help='Random seed for a reproducible request mix.')
+        parser.add_argument('--keep', action='store_true', help='Keep the seed users and boards.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['boards'] < 1 or options['tasks'] < 1:
+            raise CommandError("--users, --boards and --tasks must be positive.")
+        mix = self.parse_mix(options['mix'])
+        random.seed(options['seed'])
+
+        users, boards = self.seed(options)
+        stats = LoadStats()
+        receivers = [
+            (got_request_exception, stats.on_exception),
+            (connection_created, stats.on_connection_created),
+        ]
+        for signal, receiver in receivers:
+            signal.connect(receiver)
+        connections.close_all()
+        # Imported late: core.asgi sets up Django again, which resets the logging configuration.
+        from core.asgi import application
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            elapsed, simulated = asyncio.run(self.run_load(application, users, boards, mix, stats, options))
+        finally:
+            request_logger.setLevel(level)
+            for signal, receiver in receivers:
+                signal.disconnect(receiver)
+            if not options['keep']:
+                self.cleanup(users, boards)
+
+        self.report(stats, simulated, elapsed, options)
+
+    def parse_mix(self, mix):
+        weights = {}
+        for part in mix.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in ('poll', 'move', 'comment', 'login'):
+                raise CommandError(f"Unknown scenario '{name}', use poll, move, comment or login.")
+            try:
+                weights[name] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight for '{name}'.")
+            if not 0 <= weights[name] < math.inf:
+                raise CommandError(f"The weight for '{name}' must be a non-negative number.")
+        if not any(weights.values()):
+            raise CommandError("--mix needs at least one positive weight.")
+        return weights
+
+    def seed(self, options):
+        password = make_password(PASSWORD)
+        run = random.randrange(16 ** 6)
+        users = [
+            User.objects.create(username=f'load-{run:06x}-{i}@example.com', email=f'load-{run:06x}-{i}@example.com', password=password)
+            for i in range(options['users'])
+        ]
+        boards = []
+        for b in range(options['boards']):
+            members = users[b::options['boards']]
+            board = KanbanBoard.objects.create(title=f'Load test {b}', owner=members[0] if members else users[0])
+            board.members.add(*members)
+            ranks = evenly_spaced_ranks(options['tasks'])
+            Task.objects.bulk_create(
+                Task(board=board, title=f'Task {i}', status='to_do', rank=ranks[i], created_by=board.owner, assignee=random.choice(members or users))
+                for i in range(options['tasks'])
+            )
+            boards.append((board.pk, list(Task.objects.filter(board=board).values_list('id', flat=True))))
+        self.stdout.write(f"Seeded {len(users)} user(s), {len(boards)} board(s) with {options['tasks']} task(s) each.")
+        return users, boards
+
+    def cleanup(self, users, boards):
+        for board_id, _ in boards:
+            purge_board(board_id)
+        for user in users:
+            user.delete()
+
+    async def run_load(self, application, users, boards, mix, stats, options):
+        simulated = [
+            SimulatedUser(application, stats, i, user.email, *boards[i % len(boards)])
+            for i, user in enumerate(users)
+        ]
+        await asyncio.gather(*(user.login() for user in simulated))
+        stats.logins = stats.total()
+
+        start = time.perf_counter()
+        deadline = start + options['duration']
+        await asyncio.gather(*(user.run(mix, deadline, options['think_time']) for user in simulated))
+        return time.perf_counter() - start, simulated
+
+    def report(self, stats, simulated, elapsed, options):
+        queries = defaultdict(list)
+        for user in simulated:
+            for scenario, counts in user.query_counts.items():
+                queries[scenario].extend(counts)
+
+        load_requests = stats.total() - stats.logins
+        self.stdout.write(
+            f"\n{options['users']} user(s), {elapsed:.1f}s, {load_requests} request(s) after login, "
+            f"{load_requests / elapsed:.1f} req/s"
+        )
+        self.stdout.write(
+            f"\n{'scenario':<10}{'requests':>10}{'errors':>8}{'queries':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for scenario, samples in sorted(stats.samples.items()):
+            samples = sorted(samples)
+            counts = queries.get(scenario)
+            self.stdout.write(
+                f"{scenario:<10}{len(samples):>10}{sum(stats.errors[scenario].values()):>8}"
+                f"{(sum(counts) / len(counts)) if counts else 0:>9.1f}"
+                f"{self.percentile(samples, 50):>9.1f}{self.percentile(samples, 90):>9.1f}"
+                f"{self.percentile(samples, 99):>9.1f}{samples[-1] * 1000:>9.1f}"
+            )
+
+        errors = Counter()
+        for counter in stats.errors.values():
+            errors.update(counter)
+        if errors:
+            self.stdout.write("\nErrors")
+            for error, count in errors.most_common():
+                self.stdout.write(f"  {error:<30}{count:>8}")
+        else:
+            self.stdout.write("\nNo errors.")
+
+        for scenario, samples in sorted(stats.samples.items()):
+            self.stdout.write(f"\nLatency histogram: {scenario}")
+            self.stdout.write(self.histogram(samples))
+
+    def percentile(self, samples, percent):
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index] * 1000
+
+    def histogram(self, samples, width=40):
+        counts = Counter()
+        for sample in samples:
+            ms = sample * 1000
+            counts[next((bound for bound in HISTOGRAM_BUCKETS_MS if ms < bound), None)] += 1
+        peak = max(counts.values())
+        bounds = HISTOGRAM_BUCKETS_MS + [None]
+        used = [index for index, bound in enumerate(bounds) if counts.get(bound)]
+        lines = []
+        for bound in bounds[used[0]:used[-1] + 1]:
+            count = counts.get(bound, 0)
+            label = f"< {bound} ms" if bound else f">= {HISTOGRAM_BUCKETS_MS[-1]} ms"
+            lines.append(f"  {label:>11} {'#' * round(count / peak * width):<{width}} {count}")
+        return '\n'.join(lines)
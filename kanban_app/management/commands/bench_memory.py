@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from kanban_app.models import KanbanBoard, Task
+
+
+class Command(BaseCommand):
+    """
+    Benchmark peak memory of large task lists, serialized in full or streamed in chunks.
+    Seeds a user with a growing number of assigned tasks and requests
+    /tasks/assigned-to-me/ with and without ?stream=true at every size.
+    Peak memory is the Python heap peak measured with tracemalloc during the request
+    and while reading the response. Seed data is rolled back at the end.
+    """
+    help = 'Compare peak memory of serialized and streamed task lists for growing result sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user('bench-memory', 'bench-memory@example.com', 'bench-memory')
+            board = KanbanBoard.objects.create(title='Memory benchmark', owner=user)
+            board.members.add(user)
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}')
+            url = reverse('tasks-assigned-to-me')
+
+            self.stdout.write(f"{'tasks':>8}{'mode':>12}{'bytes':>14}{'peak MB':>10}{'ms':>10}")
+            seeded = 0
+            for size in sorted(options['sizes']):
+                self.seed(board, user, seeded, size)
+                seeded = size
+                for mode, params in [('serialized', {}), ('streamed', {'stream': 'true'})]:
+                    length, peak, elapsed = self.measure(client, url, params)
+                    self.stdout.write(f"{size:>8}{mode:>12}{length:>14}{peak / 2 ** 20:>10.1f}{elapsed * 1000:>10.0f}")
+
+            transaction.set_rollback(True)
+
+    def seed(self, board, user, start, end):
+        Task.objects.bulk_create((
+            Task(
+                board=board,
+                title=f'Task {i}',
+                description=f'Description of task {i} ' * 4,
+                status='to_do',
+                assignee=user,
+                reviewer_id=user,
+                created_by=user,
+                rank=f'{i:08d}',
+            )
+            for i in range(start, end)
+        ), batch_size=2000)
+
+    def measure(self, client, url, params):
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            response = client.get(url, params)
+            if response.streaming:
+                length = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                length = len(response.content)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert response.status_code == 200, response.status_code
+        return length, peak, elapsed
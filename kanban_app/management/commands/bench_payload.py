@@ -0,0 +1,95 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from kanban_app.models import KanbanBoard, Task
+from kanban_app.projections import serialize_board
+
+
+class Command(BaseCommand):
+    """
+    Benchmark wire size and serialization time of large board and task list responses.
+    Compares the nested and the normalized response shape, uncompressed, gzip and Brotli.
+    Seed data is created in a transaction that is rolled back at the end.
+    """
+    help = 'Seed a large board and measure response bytes and time per shape and encoding.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+        parser.add_argument('--members', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per variant, the best time is reported.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, board = self.seed(options)
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}')
+
+            start = time.perf_counter()
+            serialize_board(board.id)
+            self.stdout.write(f"Live board serialization: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+            urls = [
+                ('board', reverse('board-detail', args=[board.id])),
+                ('assigned', reverse('tasks-assigned-to-me')),
+            ]
+            variants = [
+                ('nested', {}, 'identity'),
+                ('nested', {}, 'gzip'),
+                ('nested', {}, 'br'),
+                ('normalized', {'normalize': 'true'}, 'identity'),
+                ('normalized', {'normalize': 'true'}, 'gzip'),
+                ('normalized', {'normalize': 'true'}, 'br'),
+            ]
+
+            self.stdout.write(f"{'endpoint':<12}{'shape':<12}{'encoding':<10}{'bytes':>10}{'ms':>10}")
+            for name, url in urls:
+                for shape, params, encoding in variants:
+                    timings = []
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        response = client.get(url, params, HTTP_ACCEPT_ENCODING=encoding)
+                        timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.status_code
+                    used = response.get('Content-Encoding', 'identity')
+                    self.stdout.write(
+                        f"{name:<12}{shape:<12}{used:<10}{len(response.content):>10}{min(timings) * 1000:>10.1f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        owner = User.objects.create_user('bench-owner', 'bench-owner@example.com', 'bench-owner')
+        User.objects.bulk_create(
+            User(username=f'bench-member-{i}', email=f'bench-member-{i}@example.com', first_name='Bench', last_name=f'Member {i}')
+            for i in range(options['members'])
+        )
+        member_ids = list(User.objects.filter(username__startswith='bench-member-').values_list('id', flat=True))
+        member_ids.append(owner.id)
+
+        board = KanbanBoard.objects.create(title='Payload benchmark', owner=owner)
+        board.members.add(*member_ids)
+
+        statuses = ['to_do', 'in_progress', 'review', 'done']
+        priorities = ['low', 'medium', 'high']
+        Task.objects.bulk_create((
+            Task(
+                board=board,
+                title=f'Task {i}',
+                description=f'Description of task {i}',
+                status=statuses[i % len(statuses)],
+                priority=priorities[i % len(priorities)],
+                assignee_id=owner.id if i % 2 else member_ids[i % len(member_ids)],
+                reviewer_id_id=member_ids[(i + 1) % len(member_ids)],
+                created_by=owner,
+                rank=f'{i:06d}1',
+            )
+            for i in range(options['tasks'])
+        ), batch_size=1000)
+        return owner, board
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+PROBE = r'''
+import json, os, sys, time
+start = time.perf_counter()
+import django
+from django.core.handlers.wsgi import WSGIHandler
+django.setup(set_prefix=False)
+application = WSGIHandler()
+setup_ms = (time.perf_counter() - start) * 1000
+
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/tasks/assigned-to-me/', 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': sys.stdin.buffer,
+    'HTTP_ACCEPT_ENCODING': 'gzip',
+}
+def request():
+    response = application(dict(environ), lambda status, headers: None)
+    b''.join(response)
+    response.close()
+
+start = time.perf_counter()
+request()
+first_ms = (time.perf_counter() - start) * 1000
+
+repeat = int(sys.argv[1])
+start = time.perf_counter()
+for _ in range(repeat):
+    request()
+request_us = (time.perf_counter() - start) / repeat * 1e6
+
+print(json.dumps({
+    'setup_ms': setup_ms,
+    'first_request_ms': first_ms,
+    'request_us': request_us,
+    'middleware': len(django.conf.settings.MIDDLEWARE),
+    'apps': len(django.conf.settings.INSTALLED_APPS),
+    'modules': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Benchmark worker cold start and per-request overhead of the settings profiles.
+    Every sample runs in a fresh interpreter. Requests are unauthenticated and rejected
+    by the permission check, so the timing covers middleware, routing and DRF dispatch
+    without touching the database.
+    """
+    help = 'Compare cold start and per-request overhead of core.settings and core.settings_api.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['core.settings', 'core.settings_api'])
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per profile, the best run is reported.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per run for the per-request overhead.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<22}{'apps':>6}{'mw':>5}{'modules':>9}{'setup ms':>10}{'1st req ms':>12}{'req µs':>9}"
+        )
+        for profile in options['profiles']:
+            samples = [self.probe(profile, options['requests']) for _ in range(options['runs'])]
+            best = {key: min(sample[key] for sample in samples) for key in ('setup_ms', 'first_request_ms', 'request_us')}
+            sample = samples[0]
+            self.stdout.write(
+                f"{profile:<22}{sample['apps']:>6}{sample['middleware']:>5}{sample['modules']:>9}"
+                f"{best['setup_ms']:>10.1f}{best['first_request_ms']:>12.1f}{best['request_us']:>9.0f}"
+            )
+
+    def probe(self, profile, requests):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, str(requests)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
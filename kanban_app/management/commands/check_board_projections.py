@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban_app.models import BoardProjection
+from kanban_app.projections import rebuild_projection, serialize_board
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Compare stored board detail projections with live serialization.
+    Reports every board whose projection differs and optionally rebuilds it.
+    """
+    help = 'Check board detail projections against live serialization.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Rebuild projections that differ.')
+        parser.add_argument('--board', type=int, action='append', help='Only check this board id, can be repeated.')
+
+    def handle(self, *args, **options):
+        checked = mismatched = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                shard_checked, shard_mismatched = self.check_shard(options)
+            checked += shard_checked
+            mismatched += shard_mismatched
+
+        summary = f"Checked {checked} projection(s), {mismatched} out of date."
+        if mismatched and not options['repair']:
+            raise CommandError(summary)
+        if mismatched:
+            summary += ' Repaired.'
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def check_shard(self, options):
+        projections = BoardProjection.objects.order_by('board_id')
+        if options['board']:
+            projections = projections.filter(board_id__in=options['board'])
+
+        checked = mismatched = 0
+        for board_id, document in projections.values_list('board_id', 'document').iterator():
+            checked += 1
+            live = serialize_board(board_id)
+            if live == document:
+                continue
+
+            mismatched += 1
+            self.stdout.write(self.style.WARNING(f"Board {board_id}: {self.describe_difference(document, live)}"))
+            if options['repair']:
+                if live is None:
+                    BoardProjection.objects.filter(board_id=board_id).delete()
+                else:
+                    rebuild_projection(board_id)
+        return checked, mismatched
+
+    def describe_difference(self, document, live):
+        if live is None:
+            return 'board no longer exists'
+        differences = [key for key in ('title', 'owner_id', 'members') if document.get(key) != live.get(key)]
+        stored_tasks = {task['id']: task for task in document.get('tasks', [])}
+        live_tasks = {task['id']: task for task in live.get('tasks', [])}
+        changed_tasks = sorted(
+            task_id for task_id in stored_tasks.keys() | live_tasks.keys()
+            if stored_tasks.get(task_id) != live_tasks.get(task_id)
+        )
+        if changed_tasks:
+            differences.append(f"tasks {changed_tasks}")
+        return 'differs in ' + ', '.join(differences)
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.metrics import registry
+
+
+class Command(BaseCommand):
+    """
+    Fold the metrics snapshot files of exited worker processes into one file.
+    Keeps KANBAN_METRICS_DIR from growing with every worker restart without
+    resetting the counters served on /api/metrics/.
+    """
+    help = 'Fold metrics snapshots of exited worker processes into a single file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600, help='Only fold files not written for this many seconds.')
+
+    def handle(self, *args, **options):
+        if not settings.KANBAN_METRICS_DIR:
+            raise CommandError("KANBAN_METRICS_DIR is not set.")
+        removed = registry.compact(min_age=options['min_age'])
+        self.stdout.write(self.style.SUCCESS(f"Folded {removed} snapshot(s) of exited processes."))
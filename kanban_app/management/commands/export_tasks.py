@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban_app.api.streaming import json_array_chunks, sharded_task_rows
+from kanban_app.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Export tasks as a JSON array in the API task representation.
+    Rows are fetched in chunks and written as they are serialized, so exports of any
+    size run in bounded memory.
+    """
+    help = 'Export the tasks of a board or user as JSON, streamed in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help='Export the tasks of this board id.')
+        parser.add_argument('--assignee', type=int, help='Export the tasks assigned to this user id.')
+        parser.add_argument('--reviewer', type=int, help='Export the tasks reviewed by this user id.')
+        parser.add_argument('--output', help='File to write to, default stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filters = {
+            key: options[option] for option, key in
+            [('board', 'board_id'), ('assignee', 'assignee_id'), ('reviewer', 'reviewer_id_id')]
+            if options[option] is not None
+        }
+        if not filters:
+            raise CommandError("Pass at least one of --board, --assignee or --reviewer.")
+
+        rows = sharded_task_rows(lambda: Task.objects.filter(**filters), options['chunk_size'])
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in json_array_chunks(rows):
+                output.write(chunk)
+            output.write('\n')
+        finally:
+            if options['output']:
+                output.close()
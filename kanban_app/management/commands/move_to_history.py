@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kanban_app.history import HISTORY_BATCH_SIZE, move_to_history
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Move tasks that have been done for a while, with their comments, to the history tables.
+    Meant to run periodically (e.g. nightly from cron) so live boards keep a small working set.
+    """
+    help = 'Move old done tasks and their comments from the live tables to the task history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.KANBAN_HISTORY_AFTER_DAYS, help='Minimum days since completion.')
+        parser.add_argument('--board', type=int, help='Only move tasks of this board id.')
+        parser.add_argument('--batch-size', type=int, default=HISTORY_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        moved = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                moved += move_to_history(options['days'], board_id=options['board'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} task(s) to history."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from kanban_app.archive import PURGE_CHUNK_SIZE, purge_board
+from kanban_app.models import KanbanBoard
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Purge boards whose deletion was requested but not yet completed.
+    Picks up boards left behind when a background purge was interrupted or disabled.
+    """
+    help = 'Hard delete boards marked as deleted, in bounded chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        purged = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                board_ids = list(KanbanBoard.all_objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+                for board_id in board_ids:
+                    deleted = purge_board(board_id, chunk_size=options['chunk_size'])
+                    self.stdout.write(f"Purged board {board_id} ({deleted} rows)")
+            purged += len(board_ids)
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} board(s)."))
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+
+from kanban_app.models import Task
+from kanban_app.projections import rebuild_projection
+from kanban_app.ranking import rebalance_column
+from kanban_app.saved_views import invalidate_views_of_board
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Rewrite the rank keys of board columns whose keys grew too long.
+    Picks up columns left behind when a background rebalance was interrupted or disabled.
+    """
+    help = 'Rebalance task rank keys of columns with long keys (or all columns of a board).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help='Rebalance every column of this board')
+        parser.add_argument('--max-length', type=int, default=settings.KANBAN_RANK_REBALANCE_LENGTH)
+
+    def handle(self, *args, **options):
+        rebalanced = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                rebalanced += self.rebalance_shard(options)
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {rebalanced} column(s)."))
+
+    def rebalance_shard(self, options):
+        if options['board']:
+            columns = Task.objects.filter(board_id=options['board']).values_list('board_id', 'status')
+        else:
+            columns = (
+                Task.objects.annotate(rank_length=Length('rank'))
+                .filter(rank_length__gt=options['max_length'])
+                .values_list('board_id', 'status')
+            )
+        columns = sorted(set(columns))
+
+        for board_id, status in columns:
+            count = rebalance_column(board_id, status)
+            self.stdout.write(f"Rebalanced board {board_id} column {status} ({count} tasks)")
+        for board_id in sorted({board_id for board_id, _ in columns}):
+            rebuild_projection(board_id)
+            invalidate_views_of_board(board_id)
+        return len(columns)
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from kanban_app.models import KanbanBoard, Task
+from kanban_app.sharding import move_board, resolve_shard, shard_aliases, sharding_enabled, sync_users, use_shard
+
+
+class Command(BaseCommand):
+    """
+    Move boards between shards.
+    Either moves a single board (--board/--to) or repeatedly moves boards from the
+    most loaded to the least loaded shard until the task counts are within --tolerance.
+    Moved boards and tasks keep their ids and are found through the routing index.
+    """
+    help = 'Rebalance boards between the databases in KANBAN_SHARDS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help='Move this board id.')
+        parser.add_argument('--to', help='Target shard alias for --board.')
+        parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed load difference as share of the average.')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the planned moves.')
+        parser.add_argument('--sync-users', action='store_true', help='Mirror all users into every shard first.')
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Sharding is not configured, KANBAN_SHARDS has a single database.")
+        if options['sync_users']:
+            self.stdout.write(f"Mirrored {sync_users()} user(s).")
+
+        if options['board']:
+            if options['to'] not in shard_aliases():
+                raise CommandError(f"--to must be one of {shard_aliases()}.")
+            moves = [(options['board'], resolve_shard('board', options['board']), options['to'])]
+        else:
+            moves = self.plan(options['tolerance'])
+
+        for board_id, source, target in moves:
+            if options['dry_run']:
+                self.stdout.write(f"Would move board {board_id}: {source} -> {target}")
+                continue
+            copied = move_board(board_id, target)
+            self.stdout.write(f"Moved board {board_id}: {source} -> {target} ({copied} rows)")
+        self.stdout.write(self.style.SUCCESS(f"{len(moves)} board move(s)."))
+
+    def plan(self, tolerance):
+        """
+        Greedily move boards from the most to the least loaded shard. Load is the number of tasks plus one per board.
+        """
+        boards = {}
+        for alias in shard_aliases():
+            with use_shard(alias):
+                sizes = dict(Task.all_objects.values_list('board_id').annotate(count=Count('id')).order_by())
+                for board_id in KanbanBoard.all_objects.filter(deleted_at__isnull=True).values_list('id', flat=True):
+                    boards[board_id] = (alias, sizes.get(board_id, 0) + 1)
+
+        load = {alias: 0 for alias in shard_aliases()}
+        for alias, size in boards.values():
+            load[alias] += size
+        average = sum(load.values()) / len(load)
+
+        moves = []
+        while True:
+            source = max(load, key=load.get)
+            target = min(load, key=load.get)
+            gap = load[source] - load[target]
+            if gap <= tolerance * average:
+                return moves
+            candidates = [
+                (size, board_id) for board_id, (alias, size) in boards.items()
+                if alias == source and size * 2 <= gap
+            ]
+            if not candidates:
+                return moves
+            size, board_id = max(candidates)
+            boards[board_id] = (target, size)
+            load[source] -= size
+            load[target] += size
+            moves.append((board_id, source, target))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from kanban_app.models import SavedView
+from kanban_app.saved_views import count_view, invalidate_views
+
+
+class Command(BaseCommand):
+    """
+    Recount all saved views and drop their cached results.
+    Counters are maintained from task changes; run this nightly (after midnight for
+    date-relative filters such as 'overdue') to correct any drift.
+    """
+    help = 'Recount saved views and drop their cached results.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only refresh the saved views of this user id.')
+
+    def handle(self, *args, **options):
+        views = SavedView.objects.order_by('id')
+        if options['user']:
+            views = views.filter(user_id=options['user'])
+        views = list(views)
+        invalidate_views(views)
+        for view in views:
+            count_view(view)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(views)} saved view(s)."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from kanban_app.models import WebhookDeadLetter
+from kanban_app.sharding import shard_aliases, use_shard
+from kanban_app.webhooks import replay_dead_letter
+
+
+class Command(BaseCommand):
+    """
+    Redeliver webhook batches that were given up after all retries.
+    Delivered dead letters are deleted, failed ones keep their row with the new error.
+    """
+    help = 'Redeliver webhook dead letters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscription', type=int, help='Only replay dead letters of this subscription id.')
+        parser.add_argument('--board', type=int, help='Only replay dead letters of this board id.')
+
+    def handle(self, *args, **options):
+        delivered = failed = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                dead_letters = WebhookDeadLetter.objects.select_related('subscription').order_by('id')
+                if options['subscription']:
+                    dead_letters = dead_letters.filter(subscription_id=options['subscription'])
+                if options['board']:
+                    dead_letters = dead_letters.filter(subscription__board_id=options['board'])
+                for dead_letter in dead_letters:
+                    if replay_dead_letter(dead_letter):
+                        delivered += 1
+                    else:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f"Dead letter {dead_letter.pk}: {dead_letter.last_error}"))
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} dead letter(s), {failed} failed."))
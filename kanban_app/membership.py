@@ -0,0 +1,37 @@
+from kanban_app.models import KanbanBoard
+
+
+Membership = KanbanBoard.members.through
+
+
+def non_member_ids(board_id, user_ids):
+    """
+    Return the user ids that are not members of the board.
+    Runs a single IN query against the membership table, independent of the
+    number of board members, so it can also be used by bulk paths.
+    Args:
+        board_id: Primary key of the board
+        user_ids: Iterable of user ids, None values are ignored
+    Returns:
+        set: User ids without a membership on the board
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return set()
+
+    members = Membership.objects.filter(kanbanboard_id=board_id, user_id__in=user_ids).values_list('user_id', flat=True)
+    return user_ids - set(members)
+
+
+def is_board_member(board, user):
+    """
+    Check if the user owns the board or is one of its members with one EXISTS query at most.
+    Args:
+        board: The KanbanBoard
+        user: The user to check
+    Returns:
+        bool: True if the user may access the board
+    """
+    if user.id == board.owner_id:
+        return True
+    return Membership.objects.filter(kanbanboard_id=board.pk, user_id=user.id).exists()
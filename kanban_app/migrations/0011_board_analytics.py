@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0010_board_task_archival'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('to_do_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('cycle_time_median', models.FloatField(blank=True, null=True)),
+                ('cycle_time_p90', models.FloatField(blank=True, null=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='kanban_app.kanbanboard')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'date'), name='unique_board_daily_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(blank=True, max_length=20)),
+                ('at', models.DateTimeField()),
+                ('cycle_seconds', models.FloatField(blank=True, null=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='kanban_app.kanbanboard')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_transitions', to='kanban_app.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'to_status', 'at'], name='transition_board_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0013_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardProjection',
+            fields=[
+                ('board', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='projection', serialize=False, to='kanban_app.kanbanboard')),
+                ('document', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
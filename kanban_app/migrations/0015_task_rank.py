@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:20
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def evenly_spaced_ranks(count):
+    """
+    Copy of kanban_app.ranking.evenly_spaced_ranks at the time of this migration:
+    count increasing base-36 keys spread evenly over the middle third of the key space.
+    """
+    width = math.ceil(math.log(count + 1, BASE)) + 2
+    third = BASE ** width // 3
+    step = third // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value, digits = third + position * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+def backfill_ranks(apps, schema_editor):
+    """Rank existing tasks per board column in creation order."""
+    Task = apps.get_model('kanban_app', 'Task')
+    columns = Task.objects.values_list('board_id', 'status').distinct()
+    for board_id, status in columns:
+        tasks = list(Task.objects.filter(board_id=board_id, status=status).order_by('id').only('id'))
+        for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks))):
+            task.rank = rank
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0014_board_projection'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status', 'rank'], name='task_column_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0015_task_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('board', 'Board'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('shard', models.CharField(max_length=50)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_shard_route')],
+            },
+        ),
+    ]
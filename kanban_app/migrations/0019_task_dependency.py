@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0018_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('blocked_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='kanban_app.task')),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_dependencies', to='kanban_app.kanbanboard')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='kanban_app.task')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('task', 'blocked_by'), name='unique_task_dependency'), models.CheckConstraint(condition=models.Q(('task', models.F('blocked_by')), _negated=True), name='task_dependency_not_self')],
+            },
+        ),
+    ]
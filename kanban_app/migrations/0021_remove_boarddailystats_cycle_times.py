@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0020_saved_views'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='boarddailystats',
+            name='cycle_time_median',
+        ),
+        migrations.RemoveField(
+            model_name='boarddailystats',
+            name='cycle_time_p90',
+        ),
+    ]
@@ -1,7 +1,18 @@
+import secrets
+
 from django.db import models
 from django.contrib.auth.models import User
 
 
+class ActiveManager(models.Manager):
+    """
+    Default manager that hides archived rows.
+    Archived rows stay reachable through the 'all_objects' manager.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
+
+
 class KanbanBoard(models.Model):
     """
     Kanban board model for organizing tasks.
@@ -15,12 +26,26 @@ class KanbanBoard(models.Model):
         created_at: Timestamp when board was created
         updated_at: Timestamp when board was last modified
         owner: User who created and owns the board
+        archived_at: Timestamp when board was archived, hidden from default queries while set
+        deleted_at: Timestamp when board deletion was requested, pending background purge
+        version: Incremented on every update, used for optimistic concurrency control
     """
     title = models.CharField(max_length=100)
     members = models.ManyToManyField(User, related_name='kanban_boards')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_kanban_board')
+    archived_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='board_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -45,6 +70,9 @@ class Task(models.Model):
         due_date: Target completion date
         created_at: Timestamp when task was created
         updated_at: Timestamp when task was last modified
+        archived_at: Timestamp when task was archived together with its board
+        version: Incremented on every update, used for optimistic concurrency control
+        rank: Lexicographic sort key of the task within its board column
     """
     board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='board_tasks')
     title = models.CharField(max_length=100)
@@ -57,6 +85,35 @@ class Task(models.Model):
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    rank = models.CharField(max_length=255, blank=True, default='')
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'archived_at'], name='task_board_archived_idx'),
+            models.Index(fields=['status'], name='task_status_idx'),
+            models.Index(fields=['priority'], name='task_priority_idx'),
+            models.Index(fields=['created_at'], name='task_created_idx'),
+            models.Index(fields=['board', 'status', 'rank'], name='task_column_rank_idx'),
+        ]
+
+    SNAPSHOT_FIELDS = ('board_id', 'status', 'priority', 'assignee_id', 'reviewer_id_id', 'due_date', 'archived_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the loaded status so status changes can be detected on save, and the
+        loaded filter fields so saved views can compare the task before and after.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        if all(field in instance.__dict__ for field in cls.SNAPSHOT_FIELDS):
+            instance._loaded_snapshot = {field: instance.__dict__[field] for field in cls.SNAPSHOT_FIELDS}
+        return instance
 
     def __str__(self):
         return self.title
@@ -79,7 +136,311 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField(max_length=1000)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'created_at', 'id'], name='comment_task_created_idx'),
+            models.Index(fields=['created_at'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
-    
\ No newline at end of file
+    
+
+class TaskDependency(models.Model):
+    """
+    "Blocked by" edge between two tasks of the same board.
+    
+    The task cannot be finished before the blocking task. Edges carry the board id,
+    so the whole dependency graph of a board is loaded with one indexed query.
+    Edges are checked for cycles before they are created.
+    
+    Attributes:
+        board: The board both tasks belong to
+        task: The blocked task
+        blocked_by: The task that blocks it
+        created_at: Timestamp when the edge was created
+    """
+    board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='task_dependencies')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependencies')
+    blocked_by = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependents')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'blocked_by'], name='unique_task_dependency'),
+            models.CheckConstraint(condition=~models.Q(task=models.F('blocked_by')), name='task_dependency_not_self'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} blocked by {self.blocked_by_id}"
+
+
+class HistoricTask(models.Model):
+    """
+    Cold storage copy of a task that has been done for longer than KANBAN_HISTORY_AFTER_DAYS.
+    
+    Rows are moved here from Task in batches by the move_to_history command and keep
+    their original id. They are only read by the board history endpoint, so boards
+    keep a small working set of live tasks no matter how old they are.
+    
+    Attributes:
+        id: Primary key of the original task
+        board: The board the task belonged to
+        title, description, priority, due_date: Copied from the task
+        assignee, reviewer, created_by: Users copied from the task
+        created_at: Timestamp when the task was created
+        completed_at: Timestamp when the task was moved to 'done'
+        moved_at: Timestamp when the task was moved to history
+    """
+    id = models.BigIntegerField(primary_key=True)
+    board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='historic_tasks')
+    title = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=50)
+    assignee = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='historic_tasks_assigned')
+    reviewer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='historic_tasks_reviewed')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='historic_tasks_created', null=True, blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField()
+    moved_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'completed_at', 'id'], name='historic_task_board_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class HistoricComment(models.Model):
+    """
+    Cold storage copy of a comment, moved together with its task.
+    
+    Attributes:
+        id: Primary key of the original comment
+        task: The historic task the comment belongs to
+        author: User who wrote the comment
+        content: The comment text
+        created_at: Timestamp when the comment was created
+    """
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(HistoricTask, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='historic_comments')
+    content = models.TextField(max_length=1000)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'created_at', 'id'], name='historic_comment_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author_id} on historic task {self.task_id}"
+
+
+class TaskStatusTransition(models.Model):
+    """
+    Compact log of task status changes used for board analytics.
+    
+    One row is written whenever a task is created, changes its status or is deleted.
+    Rows keep the board id even after the task is gone, so completed work stays countable.
+    
+    Attributes:
+        board: The board the task belonged to
+        task: The task that changed (null once the task is deleted)
+        from_status: Previous status, empty when the task was created
+        to_status: New status, empty when the task was deleted
+        at: Timestamp of the change
+        cycle_seconds: Seconds from task creation to completion, set for transitions to 'done'
+    """
+    board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='status_transitions')
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name='status_transitions')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, blank=True)
+    at = models.DateTimeField()
+    cycle_seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'to_status', 'at'], name='transition_board_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}: {self.from_status or '-'} -> {self.to_status or '-'}"
+
+
+class BoardDailyStats(models.Model):
+    """
+    Daily per-board rollup maintained incrementally from status transitions.
+    
+    Status counts describe the board at the end of the day (cumulative flow).
+    Days without activity have no row; their counts equal the previous row.
+    
+    Attributes:
+        board: The board the numbers belong to
+        date: The day of the bucket
+        to_do_count, in_progress_count, review_count, done_count: Tasks per status
+        completed_count: Tasks moved to 'done' on that day
+    """
+    board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    to_do_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'date'], name='unique_board_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f"{self.board_id} on {self.date}"
+
+
+class BoardProjection(models.Model):
+    """
+    Read model holding the pre-serialized board detail document.
+    
+    The document is built once from BoardDetailSerializer and then patched
+    incrementally from task, comment and membership change signals, so reading
+    a board detail only needs this row.
+    
+    Attributes:
+        board: The board the document describes
+        document: The serialized board detail (members and tasks)
+        updated_at: Timestamp of the last patch
+    """
+    board = models.OneToOneField(KanbanBoard, on_delete=models.CASCADE, primary_key=True, related_name='projection')
+    document = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Projection of board {self.board_id}"
+
+
+class SavedView(models.Model):
+    """
+    Saved task filter ("smart view") of a user.
+    
+    The filters compile to a task query (see kanban_app.saved_views). The number of
+    matching tasks is kept in task_count and updated incrementally from task changes,
+    so badge counts are read without counting. Saved views live in the 'default'
+    database next to their user, their tasks may be on any shard.
+    
+    Attributes:
+        user: The user the view belongs to
+        name: Display name, unique per user
+        filters: Scope and filter values, e.g. {"scope": "assigned", "overdue": true}
+        task_count: Number of matching tasks, None while it has to be recounted
+        counted_on: Date of the last full count, date-relative filters are recounted daily
+        created_at: Timestamp when the view was created
+        updated_at: Timestamp when the view was last modified
+    """
+    SCOPES = ('assigned', 'reviewing', 'owned_boards', 'member_boards')
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_views')
+    name = models.CharField(max_length=100)
+    filters = models.JSONField(default=dict)
+    task_count = models.PositiveIntegerField(null=True, blank=True)
+    counted_on = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_saved_view_name'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} of {self.user_id}"
+
+
+def generate_webhook_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookSubscription(models.Model):
+    """
+    Outbound webhook endpoint receiving the task, comment and board events of a board.
+    
+    Events are delivered asynchronously in batches by kanban_app.webhooks. Every
+    request body is signed with the secret (HMAC-SHA256, X-KanMind-Signature header).
+    
+    Attributes:
+        board: The board whose events are delivered
+        url: Endpoint receiving POST requests
+        events: Event types to deliver, all events when empty
+        secret: Shared secret for the request signature
+        is_active: Inactive subscriptions receive no events
+        created_by: User who created the subscription
+        created_at: Timestamp when the subscription was created
+    """
+    board = models.ForeignKey(KanbanBoard, on_delete=models.CASCADE, related_name='webhooks')
+    url = models.URLField(max_length=500)
+    events = models.JSONField(default=list, blank=True)
+    secret = models.CharField(max_length=64, default=generate_webhook_secret)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhook_subscriptions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'is_active'], name='webhook_board_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"Webhook {self.url} for board {self.board_id}"
+
+
+class WebhookDeadLetter(models.Model):
+    """
+    Batch of webhook events that could not be delivered after all retries.
+    
+    Kept for inspection and redelivery with the replay_webhooks command.
+    
+    Attributes:
+        subscription: The subscription the batch was meant for
+        payload: The request body that failed
+        attempts: Number of delivery attempts
+        last_error: Error of the last attempt
+        created_at: Timestamp when the batch was given up
+    """
+    subscription = models.ForeignKey(WebhookSubscription, on_delete=models.CASCADE, related_name='dead_letters')
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dead letter {self.pk} of webhook {self.subscription_id}"
+
+
+class ShardRoute(models.Model):
+    """
+    Routing index entry for a board or task that was moved to another shard.
+    
+    Ids are allocated from a per-shard range, so the shard an object was created on
+    follows from its id. Only objects moved by the rebalance_shards command need
+    an entry. The table lives in the 'default' database.
+    
+    Attributes:
+        kind: 'board' or 'task'
+        object_id: Primary key of the board or task
+        shard: Database alias the object lives on
+    """
+    kind = models.CharField(max_length=10, choices=[('board', 'Board'), ('task', 'Task')])
+    object_id = models.BigIntegerField()
+    shard = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_shard_route'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} -> {self.shard}"
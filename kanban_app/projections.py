@@ -0,0 +1,181 @@
+import bisect
+import json
+
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.db.models import Count, Prefetch
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.metrics import cache_lookup
+from kanban_app.api.serializers import BoardDetailSerializer, TaskSerializer, UserDataSerializer
+from kanban_app.models import BoardProjection, KanbanBoard, Task
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+def task_queryset():
+    """Tasks with everything TaskSerializer needs loaded in one query."""
+    return Task.objects.select_related('assignee', 'reviewer_id').annotate(comment_total=Count('task_comments'))
+
+
+def to_json(data):
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def task_entries(tasks):
+    """Serialize a task_queryset() into the JSON entries stored in projections and saved view results."""
+    return to_json(TaskSerializer(tasks, many=True).data)
+
+
+def task_entry(task_id, using=None):
+    """
+    Serialize a single task as a JSON entry.
+    Returns:
+        dict: The TaskSerializer entry, or None if the task does not exist
+    """
+    task = task_queryset().using(using).filter(pk=task_id).first()
+    return to_json(TaskSerializer(task).data) if task else None
+
+
+def serialize_board(board_id):
+    """
+    Serialize a board detail document from the live tables.
+    Returns:
+        dict: The BoardDetailSerializer document, or None if the board does not exist
+    """
+    board = (
+        KanbanBoard.objects.filter(pk=board_id)
+        .select_related('owner')
+        .prefetch_related(
+            Prefetch('members', queryset=User.objects.order_by('id')),
+            Prefetch('board_tasks', queryset=task_queryset().order_by('id')),
+        )
+        .first()
+    )
+    if board is None:
+        return None
+    return to_json(BoardDetailSerializer(board).data)
+
+
+def get_board_document(board):
+    """
+    Return the board detail document from the projection, building it on first access.
+    """
+    projection = BoardProjection.objects.filter(board_id=board.pk).values_list('document', flat=True).first()
+    cache_lookup('board_projection', projection is not None)
+    if projection is not None:
+        return projection
+    return rebuild_projection(board.pk)
+
+
+def lock_board(board_id):
+    """
+    Lock the board row; rebuilds and patches of its projection take this lock first,
+    so a rebuild cannot overwrite a patch made while it was serializing.
+    """
+    list(KanbanBoard.all_objects.select_for_update().filter(pk=board_id).values_list('pk', flat=True))
+
+
+def rebuild_projection(board_id):
+    """
+    Rebuild and store the projection of a board from live serialization, under the board lock.
+    """
+    with transaction.atomic(using=router.db_for_write(BoardProjection)):
+        lock_board(board_id)
+        document = serialize_board(board_id)
+        if document is not None:
+            BoardProjection.objects.update_or_create(board_id=board_id, defaults={'document': document})
+    return document
+
+
+def patch_projection(board_id, patch):
+    """
+    Apply a change to a stored projection under the board lock and a row lock.
+    Boards without projection are skipped, they are built on their next read.
+    Args:
+        board_id: Primary key of the board
+        patch: Callable that modifies the document in place; it runs under the locks,
+            so entries it serializes reflect the latest committed state
+    """
+    with transaction.atomic(using=router.db_for_write(BoardProjection)):
+        lock_board(board_id)
+        projection = BoardProjection.objects.select_for_update().filter(board_id=board_id).first()
+        if projection is None:
+            return
+        patch(projection.document)
+        projection.save(update_fields=['document', 'updated_at'])
+
+
+def refresh_task_entry(board_id, task_id):
+    """
+    Re-serialize a single task and replace (or insert, or remove) its entry in the board document.
+    The task is serialized under the projection lock, so of two concurrent saves the later
+    serialization is stored last.
+    """
+    def patch(document):
+        entry = task_entry(task_id)
+        tasks = document['tasks']
+        ids = [item['id'] for item in tasks]
+        position = bisect.bisect_left(ids, task_id)
+        exists = position < len(ids) and ids[position] == task_id
+        if entry is None and exists:
+            del tasks[position]
+        elif entry is not None and exists:
+            tasks[position] = entry
+        elif entry is not None:
+            tasks.insert(position, entry)
+
+    patch_projection(board_id, patch)
+
+
+def remove_task_entries(board_id, task_ids):
+    """
+    Remove the entries of tasks that left the live tables without signals, e.g. moved to history.
+    """
+    task_ids = set(task_ids)
+
+    def patch(document):
+        document['tasks'] = [task for task in document['tasks'] if task['id'] not in task_ids]
+
+    patch_projection(board_id, patch)
+
+
+def patch_board_fields(board):
+    """
+    Update the board level fields (title, owner) of the document.
+    """
+    def patch(document):
+        document['title'] = board.title
+        document['owner_id'] = board.owner_id
+
+    patch_projection(board.pk, patch)
+
+
+def patch_members(board_id, added_ids=(), removed_ids=(), clear=False):
+    """
+    Add or remove member entries of the document without re-serializing the other members.
+    """
+    removed_ids = set(removed_ids)
+
+    def patch(document):
+        added = to_json(UserDataSerializer(User.objects.filter(pk__in=added_ids).order_by('id'), many=True).data) if added_ids else []
+        members = [] if clear else [member for member in document['members'] if member['id'] not in removed_ids]
+        known = {member['id'] for member in members}
+        members.extend(member for member in added if member['id'] not in known)
+        members.sort(key=lambda member: member['id'])
+        document['members'] = members
+
+    patch_projection(board_id, patch)
+
+
+def drop_projections_for_user(user):
+    """
+    Delete the projections that embed the user's data on every shard; they are rebuilt on the next read.
+    """
+    for alias in shard_aliases():
+        with use_shard(alias):
+            board_ids = set(KanbanBoard.all_objects.filter(owner_id=user.pk).values_list('id', flat=True))
+            board_ids.update(KanbanBoard.members.through.objects.filter(user_id=user.pk).values_list('kanbanboard_id', flat=True))
+            board_ids.update(Task.all_objects.filter(assignee_id=user.pk).values_list('board_id', flat=True))
+            board_ids.update(Task.all_objects.filter(reviewer_id_id=user.pk).values_list('board_id', flat=True))
+            BoardProjection.objects.filter(board_id__in=board_ids).delete()
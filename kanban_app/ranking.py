@@ -0,0 +1,242 @@
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from kanban_app.models import Task
+from kanban_app.sharding import current_shard, use_shard
+
+
+logger = logging.getLogger(__name__)
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+STEP_WIDTH = 3
+
+
+class VersionConflict(Exception):
+    """Raised when a task was updated by another request since the expected version was read."""
+
+
+def rank_between(before, after):
+    """
+    Return a rank key that sorts strictly between two keys.
+    Keys are base-36 fractions ('0'-'9', 'a'-'z') compared as plain strings and never end in '0'.
+    Keys at the start or end of a column are stepped by one unit instead of halving the
+    remaining gap, so repeatedly moving cards to the top or bottom only grows keys slowly.
+    Args:
+        before: Key of the previous card, None or '' for the start of the column
+        after: Key of the next card, None for the end of the column
+    Returns:
+        str: The new key
+    Raises:
+        ValueError: If before does not sort before after
+    """
+    before = before or ''
+    if after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+    if not before and not after:
+        return DIGITS[BASE // 2]
+    if after is None:
+        return _step(before, 1)
+    if not before:
+        return _step(after, -1)
+    return _midpoint(before, after)
+
+
+def _midpoint(before, after):
+    if after is not None:
+        prefix = 0
+        while prefix < len(after) and (before[prefix] if prefix < len(before) else '0') == after[prefix]:
+            prefix += 1
+        if prefix:
+            return after[:prefix] + _midpoint(before[prefix:], after[prefix:])
+
+    low = DIGITS.index(before[0]) if before else 0
+    high = DIGITS.index(after[0]) if after is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if after is not None and len(after) > 1:
+        return after[:1]
+    return DIGITS[low] + _midpoint(before[1:], None)
+
+
+def _step(rank, delta):
+    """Add delta units at the last digit of rank, using more digits when the key space is used up."""
+    width = max(len(rank), STEP_WIDTH)
+    while True:
+        value = int(rank.ljust(width, '0'), BASE) + delta
+        if 0 < value < BASE ** width:
+            return _encode(value, width)
+        width += 1
+
+
+def _encode(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def evenly_spaced_ranks(count):
+    """
+    Generate count increasing keys spread evenly over the middle third of the key space.
+    The outer thirds are left free for cards moved to the top or the bottom of the column.
+    """
+    width = math.ceil(math.log(count + 1, BASE)) + 2
+    third = BASE ** width // 3
+    step = third // (count + 1)
+    return [_encode(third + position * step, width) for position in range(1, count + 1)]
+
+
+def last_rank(board_id, status):
+    """Highest rank key in a column, using the (board, status, rank) index."""
+    return (
+        Task.objects.filter(board_id=board_id, status=status)
+        .order_by('-rank')
+        .values_list('rank', flat=True)
+        .first()
+    )
+
+
+def rank_for_new_task(board_id, status):
+    """Rank key placing a new task at the end of its column."""
+    return rank_between(last_rank(board_id, status), None)
+
+
+def move_task(task, status=None, after=None, before=None, expected_version=None):
+    """
+    Move a task between two neighbors of a column with a single-row update.
+    A missing neighbor is looked up next to the given one, without any neighbor the
+    task goes to the end of the column. Columns whose keys got too long are
+    rebalanced in the background.
+    The version is claimed with a conditional UPDATE ... WHERE version = ? first, so of
+    two concurrent moves of the same task only one succeeds.
+    Args:
+        task: The Task to move
+        status: Target column, defaults to the task's current status
+        after: Id of the task that should precede the moved task
+        before: Id of the task that should follow the moved task
+        expected_version: Version the move is based on (If-Match), defaults to the loaded version
+    Returns:
+        Task: The moved task
+    Raises:
+        ValueError: If a neighbor is not in the target column or the neighbors are out of order
+        VersionConflict: If the task's version is no longer the expected one
+    """
+    status = status or task.status
+    if expected_version is None:
+        expected_version = task.version
+
+    using = router.db_for_write(Task, instance=task)
+    with transaction.atomic(using=using):
+        claimed = Task._base_manager.using(using).filter(pk=task.pk, version=expected_version).update(version=F('version') + 1)
+        if not claimed:
+            raise VersionConflict()
+
+        previous, following = _neighbor_ranks(task, status, after, before)
+        if previous is not None and previous == following:
+            rebalance_board_column(task.board_id, status)
+            previous, following = _neighbor_ranks(task, status, after, before)
+
+        task.rank = rank_between(previous, following)
+        task.status = status
+        task.version = expected_version + 1
+        task.save(update_fields=['status', 'rank', 'updated_at'])
+
+    if needs_rebalance(task.rank):
+        schedule_rebalance(task.board_id, status)
+    return task
+
+
+def _neighbor_ranks(task, status, after, before):
+    column = Task.objects.filter(board_id=task.board_id, status=status).exclude(pk=task.pk)
+    neighbor_ids = [pk for pk in (after, before) if pk is not None]
+    ranks = dict(column.filter(pk__in=neighbor_ids).values_list('pk', 'rank'))
+    for pk in neighbor_ids:
+        if pk not in ranks:
+            raise ValueError(f"Task {pk} is not in the '{status}' column of this board.")
+
+    previous = ranks.get(after)
+    following = ranks.get(before)
+    if after is not None and before is None:
+        following = column.filter(rank__gt=previous).order_by('rank').values_list('rank', flat=True).first()
+    elif before is not None and after is None:
+        previous = column.filter(rank__lt=following).order_by('-rank').values_list('rank', flat=True).first()
+    elif after is None:
+        previous = column.order_by('-rank').values_list('rank', flat=True).first()
+
+    if previous is not None and following is not None and previous > following:
+        raise ValueError("'after' must come before 'before' in the column.")
+    return previous, following
+
+
+def rebalance_column(board_id, status):
+    """
+    Rewrite all rank keys of a column with short, evenly spaced keys, keeping the order.
+    Returns:
+        int: Number of tasks in the column
+    """
+    with transaction.atomic(using=router.db_for_write(Task)):
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(board_id=board_id, status=status)
+            .order_by('rank', 'id')
+            .only('id', 'rank')
+        )
+        for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks))):
+            task.rank = rank
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=500)
+    return len(tasks)
+
+
+def rebalance_board_column(board_id, status):
+    """
+    Rebalance a column and refresh what its bulk_update bypasses: the board projection
+    and the saved views that can contain the board's tasks.
+    Returns:
+        int: Number of tasks in the column
+    """
+    from kanban_app.projections import rebuild_projection
+    from kanban_app.saved_views import invalidate_views_of_board
+
+    count = rebalance_column(board_id, status)
+    rebuild_projection(board_id)
+    invalidate_views_of_board(board_id)
+    return count
+
+
+def needs_rebalance(rank):
+    return len(rank) > getattr(settings, 'KANBAN_RANK_REBALANCE_LENGTH', 48)
+
+
+def schedule_rebalance(board_id, status):
+    """
+    Rebalance a column in a background thread after the current transaction commits,
+    unless KANBAN_BACKGROUND_REBALANCE is disabled.
+    Columns that are not rebalanced here are picked up by the rebalance_ranks command.
+    """
+    if not getattr(settings, 'KANBAN_BACKGROUND_REBALANCE', True):
+        return
+
+    shard = current_shard()
+
+    def start():
+        thread = threading.Thread(target=_rebalance_in_background, args=(board_id, status, shard), daemon=True)
+        thread.start()
+
+    transaction.on_commit(start, using=router.db_for_write(Task))
+
+
+def _rebalance_in_background(board_id, status, shard):
+    try:
+        with use_shard(shard):
+            rebalance_board_column(board_id, status)
+    except Exception:
+        logger.exception("Background rank rebalance of board %s column %s failed", board_id, status)
+    finally:
+        connections.close_all()
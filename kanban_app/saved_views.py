@@ -0,0 +1,366 @@
+import bisect
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.metrics import cache_lookup
+from kanban_app.models import KanbanBoard, SavedView, Task
+from kanban_app.projections import task_entries, task_entry, task_queryset
+from kanban_app.sharding import shard_aliases, use_shard
+
+
+GENERATION_KEY = 'kanban:saved_views:generation'
+SCOPES_KEY = 'kanban:saved_views:scopes'
+MEMBER_FILTER_LIMIT = 500
+
+
+def task_snapshot(task):
+    """The fields saved view filters look at, as a dict."""
+    return {field: getattr(task, field) for field in Task.SNAPSHOT_FIELDS}
+
+
+def is_date_relative(filters):
+    return bool(filters.get('overdue')) or filters.get('due_within_days') is not None
+
+
+def compile_filters(filters, user_id, today=None):
+    """
+    Compile saved view filters into a Q object on Task.
+    Every scope starts from an indexed column (assignee, reviewer, board) and the
+    remaining filters narrow it down.
+    Args:
+        filters: Validated filters of a SavedView
+        user_id: The user the view belongs to
+        today: Date for date-relative filters, defaults to the local date
+    Returns:
+        Q: Filter for Task.objects
+    """
+    today = today or timezone.localdate()
+    scope = filters['scope']
+    if scope == 'assigned':
+        query = Q(assignee_id=user_id)
+    elif scope == 'reviewing':
+        query = Q(reviewer_id_id=user_id)
+    elif scope == 'owned_boards':
+        query = Q(board__owner_id=user_id)
+    else:
+        member_boards = KanbanBoard.members.through.objects.filter(user_id=user_id).values('kanbanboard_id')
+        query = Q(board__owner_id=user_id) | Q(board_id__in=member_boards)
+
+    if filters.get('status'):
+        query &= Q(status__in=filters['status'])
+    if filters.get('priority'):
+        query &= Q(priority__in=filters['priority'])
+    if filters.get('boards'):
+        query &= Q(board_id__in=filters['boards'])
+    if filters.get('overdue'):
+        query &= Q(due_date__lt=today) & ~Q(status='done')
+    if filters.get('due_within_days') is not None:
+        query &= Q(due_date__gte=today, due_date__lte=today + datetime.timedelta(days=filters['due_within_days']))
+    return query
+
+
+def matches(filters, user_id, snapshot, board_owner_id, board_member_ids, today):
+    """
+    Check a task snapshot against saved view filters in memory, with the same result as compile_filters.
+    """
+    if snapshot['archived_at'] is not None:
+        return False
+    scope = filters['scope']
+    if scope == 'assigned' and snapshot['assignee_id'] != user_id:
+        return False
+    if scope == 'reviewing' and snapshot['reviewer_id_id'] != user_id:
+        return False
+    if scope == 'owned_boards' and board_owner_id != user_id:
+        return False
+    if scope == 'member_boards' and board_owner_id != user_id and user_id not in board_member_ids:
+        return False
+
+    due_date = snapshot['due_date']
+    if filters.get('status') and snapshot['status'] not in filters['status']:
+        return False
+    if filters.get('priority') and snapshot['priority'] not in filters['priority']:
+        return False
+    if filters.get('boards') and snapshot['board_id'] not in filters['boards']:
+        return False
+    if filters.get('overdue') and (due_date is None or due_date >= today or snapshot['status'] == 'done'):
+        return False
+    if filters.get('due_within_days') is not None:
+        if due_date is None or not today <= due_date <= today + datetime.timedelta(days=filters['due_within_days']):
+            return False
+    return True
+
+
+def results_cache_key(view_id):
+    return f'kanban:saved_view:{view_id}'
+
+
+def generation():
+    """Version of the cached results, bumped when user data embedded in task entries changes."""
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def view_scopes():
+    """
+    The scopes of the saved views per user id, {user_id: {scope, ...}}.
+    Task changes look up the connected users here and skip users without views.
+    Cached, dropped when a saved view is created, changed or deleted.
+    """
+    scopes = cache.get(SCOPES_KEY)
+    if scopes is None:
+        scopes = {}
+        for user_id, scope in SavedView.objects.values_list('user_id', 'filters__scope'):
+            scopes.setdefault(user_id, set()).add(scope)
+        cache.set(SCOPES_KEY, scopes, settings.KANBAN_SAVED_VIEW_CACHE_TIMEOUT)
+    return scopes
+
+
+def drop_view_scopes(using=None):
+    """Drop the cached view scopes, again after the transaction commits so no stale read is cached."""
+    cache.delete(SCOPES_KEY)
+    transaction.on_commit(lambda: cache.delete(SCOPES_KEY), using=using)
+
+
+def cached_results(view, today=None):
+    """The cached results of a view, or None if they are missing or outdated."""
+    document = cache.get(results_cache_key(view.pk))
+    if document is None or document['generation'] != generation():
+        return None
+    if is_date_relative(view.filters) and document['date'] != (today or timezone.localdate()).isoformat():
+        return None
+    return document
+
+
+def is_counted(view, today=None):
+    if view.task_count is None:
+        return False
+    return not is_date_relative(view.filters) or view.counted_on == (today or timezone.localdate())
+
+
+def count_view(view):
+    """Count the matching tasks on every shard and store the count on the view."""
+    today = timezone.localdate()
+    query = compile_filters(view.filters, view.user_id, today)
+    total = 0
+    for alias in shard_aliases():
+        with use_shard(alias):
+            total += Task.objects.filter(query).count()
+    SavedView.objects.filter(pk=view.pk).update(task_count=total, counted_on=today)
+    view.task_count, view.counted_on = total, today
+    return total
+
+
+def ensure_counted(views):
+    """Recount the views whose counter is missing or outdated, the others are read as stored."""
+    today = timezone.localdate()
+    for view in views:
+        if not is_counted(view, today):
+            count_view(view)
+
+
+def get_results(view):
+    """
+    Return the serialized tasks of a saved view, ordered by id.
+    Served from the cache, which is built on first access and patched from task changes.
+    The view row is locked while the results are built, so task changes committed in the
+    meantime are patched into the stored results afterwards instead of being overwritten.
+    """
+    today = timezone.localdate()
+    document = cached_results(view, today)
+    cache_lookup('saved_view', document is not None)
+    if document is not None:
+        return document['tasks']
+
+    with transaction.atomic(using=router.db_for_write(SavedView)):
+        locked = SavedView.objects.select_for_update().filter(pk=view.pk).exists()
+        document = cached_results(view, today) if locked else None
+        if document is not None:
+            return document['tasks']
+
+        current_generation = generation()
+        query = compile_filters(view.filters, view.user_id, today)
+        tasks = []
+        for alias in shard_aliases():
+            with use_shard(alias):
+                tasks.extend(task_entries(task_queryset().filter(query).order_by('id')))
+        tasks.sort(key=lambda task: task['id'])
+        if not locked:
+            return tasks
+
+        cache.set(
+            results_cache_key(view.pk),
+            {'generation': current_generation, 'date': today.isoformat(), 'tasks': tasks},
+            settings.KANBAN_SAVED_VIEW_CACHE_TIMEOUT,
+        )
+        SavedView.objects.filter(pk=view.pk).update(task_count=len(tasks), counted_on=today)
+    view.task_count, view.counted_on = len(tasks), today
+    return tasks
+
+
+def invalidate_views(views):
+    """Drop the counters and cached results of views, they are rebuilt on their next read."""
+    view_ids = [view.pk for view in views]
+    if not view_ids:
+        return
+    SavedView.objects.filter(pk__in=view_ids).update(task_count=None, counted_on=None)
+    cache.delete_many([results_cache_key(view_id) for view_id in view_ids])
+
+
+def invalidate_views_of_users(user_ids, scopes=None):
+    """
+    Drop the saved views of the given users, e.g. after tasks changed with set-based writes.
+    Args:
+        user_ids: Users whose views are affected
+        scopes: Only views with one of these scopes, default all
+    """
+    views = SavedView.objects.filter(user_id__in=set(user_ids) - {None})
+    if scopes:
+        views = views.filter(filters__scope__in=scopes)
+    invalidate_views(list(views.only('id')))
+
+
+def invalidate_views_of_board(board_id, using=None):
+    """
+    Drop the saved views that can contain tasks of a board: those of its owner, members,
+    assignees and reviewers. Used after archiving, restoring, cloning or moving tasks to history.
+    """
+    boards = KanbanBoard.all_objects.db_manager(using)
+    tasks = Task.all_objects.db_manager(using).filter(board_id=board_id)
+    user_ids = set(boards.filter(pk=board_id).values_list('owner_id', flat=True))
+    user_ids.update(KanbanBoard.members.through.objects.db_manager(using).filter(kanbanboard_id=board_id).values_list('user_id', flat=True))
+    user_ids.update(tasks.order_by().values_list('assignee_id', flat=True).distinct())
+    user_ids.update(tasks.order_by().values_list('reviewer_id_id', flat=True).distinct())
+    invalidate_views_of_users(user_ids)
+
+
+def schedule_task_change(task_id, old, new, using):
+    """
+    Apply a task change to the saved views after the task's transaction committed.
+    Args:
+        task_id: Primary key of the task
+        old: Snapshot before the change, None for new tasks
+        new: Snapshot after the change, None for deleted tasks
+        using: Database alias of the task
+    """
+    transaction.on_commit(lambda: apply_task_change(task_id, old, new, using), using=using)
+
+
+def apply_task_change(task_id, old, new, using):
+    """
+    Update counters and cached results of the saved views affected by a task change.
+    Only views of users connected to the task (assignee, reviewer, board owner and members,
+    before and after the change) are checked, in memory against both snapshots.
+    Users without saved views are skipped via view_scopes(), board members are only
+    loaded for users with 'member_boards' views.
+    """
+    scopes = view_scopes()
+    if not scopes:
+        return
+    snapshots = [snapshot for snapshot in (old, new) if snapshot is not None]
+    board_ids = {snapshot['board_id'] for snapshot in snapshots}
+    user_ids = set()
+    for snapshot in snapshots:
+        user_ids.update((snapshot['assignee_id'], snapshot['reviewer_id_id']))
+
+    owners = {}
+    if any(user_scopes & {'owned_boards', 'member_boards'} for user_scopes in scopes.values()):
+        owners = dict(KanbanBoard.all_objects.db_manager(using).filter(pk__in=board_ids).values_list('pk', 'owner_id'))
+        user_ids.update(owners.values())
+
+    members = {board_id: set() for board_id in board_ids}
+    member_view_users = {user_id for user_id, user_scopes in scopes.items() if 'member_boards' in user_scopes}
+    if member_view_users:
+        rows = KanbanBoard.members.through.objects.db_manager(using).filter(kanbanboard_id__in=board_ids)
+        if len(member_view_users) <= MEMBER_FILTER_LIMIT:
+            rows = rows.filter(user_id__in=member_view_users)
+        for board_id, user_id in rows.values_list('kanbanboard_id', 'user_id'):
+            if user_id in member_view_users:
+                members[board_id].add(user_id)
+                user_ids.add(user_id)
+
+    user_ids &= scopes.keys()
+    if not user_ids:
+        return
+    views = list(SavedView.objects.filter(user_id__in=user_ids))
+
+    today = timezone.localdate()
+    entry, entry_loaded = None, False
+
+    def matching(view, snapshot):
+        if snapshot is None:
+            return False
+        board_id = snapshot['board_id']
+        return matches(view.filters, view.user_id, snapshot, owners.get(board_id), members[board_id], today)
+
+    for view in views:
+        was, now = matching(view, old), matching(view, new)
+        if not was and not now:
+            continue
+        if now and not entry_loaded:
+            entry = task_entry(task_id, using)
+            entry_loaded = True
+        patch_view(view, task_id, was, now, entry, today)
+
+
+def patch_tasks(tasks, task_id, now, entry):
+    """
+    Replace, insert or remove the task in sorted cached results.
+    Returns:
+        bool: Whether the results changed
+    """
+    if now and entry is None:
+        return False
+    ids = [task['id'] for task in tasks]
+    position = bisect.bisect_left(ids, task_id)
+    exists = position < len(ids) and ids[position] == task_id
+    if not now and exists:
+        del tasks[position]
+    elif now and exists:
+        if tasks[position] == entry:
+            return False
+        tasks[position] = entry
+    elif now:
+        tasks.insert(position, entry)
+    else:
+        return False
+    return True
+
+
+def patch_view(view, task_id, was, now, entry, today):
+    """
+    Adjust the counter of a view and replace, insert or remove the task in its cached results.
+    While results are cached the counter is their length, so a change that is already part of
+    results built after its commit is not counted twice. Otherwise the counter follows the
+    snapshots only. If the task is already gone (entry None), the cached results are left to
+    the change deleting it.
+    The view row is locked, so concurrent patches and result builds of the same view are
+    applied one after another. Views whose counter and cached results stay the same are not locked.
+    """
+    if was == now:
+        document = cached_results(view, today)
+        if document is None or not patch_tasks(document['tasks'], task_id, now, entry):
+            return
+
+    with transaction.atomic(using=router.db_for_write(SavedView)):
+        if not SavedView.objects.select_for_update().filter(pk=view.pk).exists():
+            return
+        document = cached_results(view, today)
+        if document is None:
+            if was != now:
+                SavedView.objects.filter(pk=view.pk, task_count__isnull=False).update(task_count=F('task_count') + (1 if now else -1))
+            return
+        if patch_tasks(document['tasks'], task_id, now, entry):
+            cache.set(results_cache_key(view.pk), document, settings.KANBAN_SAVED_VIEW_CACHE_TIMEOUT)
+        if was != now:
+            SavedView.objects.filter(pk=view.pk, task_count__isnull=False).update(task_count=len(document['tasks']))
@@ -0,0 +1,298 @@
+import contextvars
+import functools
+import logging
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import F
+from django.db.models.deletion import Collector
+
+
+logger = logging.getLogger(__name__)
+
+SHARD_ID_SPAN = 10 ** 12
+AUTO_FIELD_TYPES = ('AutoField', 'BigAutoField', 'SmallAutoField')
+GLOBAL_MODELS = ('shardroute', 'savedview')
+
+_current_shard = contextvars.ContextVar('kanban_shard', default=None)
+
+
+def shard_aliases():
+    """Database aliases holding board-scoped rows, 'default' first."""
+    return list(getattr(settings, 'KANBAN_SHARDS', None) or [DEFAULT_DB_ALIAS])
+
+
+def sharding_enabled():
+    return len(shard_aliases()) > 1
+
+
+def current_shard():
+    """The shard activated with use_shard(), or None."""
+    return _current_shard.get()
+
+
+@contextmanager
+def use_shard(alias):
+    """
+    Route board-scoped queries without an instance hint to the given shard.
+    """
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+
+def on_signal_shard(receiver):
+    """
+    Run a model signal receiver on the shard of the database the signal was sent for.
+    """
+    @functools.wraps(receiver)
+    def wrapper(sender, **kwargs):
+        with use_shard(kwargs.get('using') or current_shard()):
+            return receiver(sender, **kwargs)
+    return wrapper
+
+
+def is_board_scoped(model):
+    return model._meta.app_label == 'kanban_app' and model._meta.model_name not in GLOBAL_MODELS
+
+
+def is_user_model(model):
+    return model._meta.label == settings.AUTH_USER_MODEL
+
+
+def shard_for_id(object_id):
+    """The shard whose id range contains the id, i.e. the shard the object was created on."""
+    aliases = shard_aliases()
+    index = int(object_id) // SHARD_ID_SPAN
+    return aliases[index] if 0 <= index < len(aliases) else DEFAULT_DB_ALIAS
+
+
+def resolve_shard(kind, object_id):
+    """
+    Find the shard of a board or task: a routing index entry if it was moved, else its id range.
+    Args:
+        kind: 'board' or 'task'
+        object_id: Primary key from the URL or request body
+    Returns:
+        str: Database alias
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    try:
+        object_id = int(object_id)
+    except (TypeError, ValueError):
+        return DEFAULT_DB_ALIAS
+
+    from kanban_app.models import ShardRoute
+
+    routed = ShardRoute.objects.filter(kind=kind, object_id=object_id).values_list('shard', flat=True).first()
+    return routed or shard_for_id(object_id)
+
+
+def shard_for_new_board(owner):
+    """Place new boards by owner tenant, so one owner's boards share a shard."""
+    aliases = shard_aliases()
+    return aliases[owner.pk % len(aliases)]
+
+
+class BoardShardRouter:
+    """
+    Database router spreading board-scoped kanban models over KANBAN_SHARDS.
+    Queries follow the database of the instance they are made for, otherwise the
+    shard activated with use_shard(). Users are written to 'default' and mirrored
+    into every shard, so board rows can reference and join them on their own shard.
+    With a single shard the router stays out of the way.
+    """
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        if sharding_enabled() and is_user_model(model):
+            return DEFAULT_DB_ALIAS
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if sharding_enabled() and all(is_board_scoped(type(obj)) or is_user_model(type(obj)) for obj in (obj1, obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'kanban_app' and model_name in GLOBAL_MODELS:
+            return db == DEFAULT_DB_ALIAS
+        return None
+
+    def _route(self, model, hints):
+        if not sharding_enabled() or not (is_board_scoped(model) or is_user_model(model)):
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db and is_board_scoped(type(instance)):
+            return instance._state.db
+        return current_shard()
+
+
+def mirror_user(user):
+    """
+    Copy a user row into every shard with one upsert per shard.
+    """
+    User = type(user)
+    fields = [field.attname for field in User._meta.concrete_fields]
+    values = {name: getattr(user, name) for name in fields}
+    for alias in shard_aliases():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        User._base_manager.using(alias).bulk_create(
+            [User(**values)],
+            update_conflicts=True,
+            unique_fields=[User._meta.pk.name],
+            update_fields=[name for name in fields if name != User._meta.pk.attname],
+        )
+
+
+class ShardCollector(Collector):
+    """
+    Deletion collector that skips related models without a table on its database,
+    e.g. saved views when deleting a user mirror from a shard.
+    """
+    def related_objects(self, related_model, related_fields, objs):
+        if not router.allow_migrate_model(self.using, related_model):
+            return related_model._base_manager.using(self.using).none()
+        return super().related_objects(related_model, related_fields, objs)
+
+
+def remove_user_mirror(user):
+    """
+    Delete a user from every shard, cascading to the rows the user owns there.
+    """
+    for alias in shard_aliases():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        with use_shard(alias):
+            mirrors = list(type(user)._base_manager.using(alias).filter(pk=user.pk))
+            collector = ShardCollector(using=alias, origin=user)
+            collector.collect(mirrors)
+            collector.delete()
+
+
+def reserve_shard_id_range(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate handler moving the id sequences of a shard's kanban tables to the shard's range.
+    Keeps ids unique across shards, so rows can be moved between them without renumbering.
+    """
+    aliases = shard_aliases()
+    if using not in aliases or aliases.index(using) == 0:
+        return
+
+    start = aliases.index(using) * SHARD_ID_SPAN
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config('kanban_app').get_models(include_auto_created=True):
+            if not is_board_scoped(model) or model._meta.pk.get_internal_type() not in AUTO_FIELD_TYPES:
+                continue
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s', [start, table, start])
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)',
+                    [table, start, table],
+                )
+            elif connection.vendor == 'postgresql':
+                column = model._meta.pk.column
+                cursor.execute(
+                    f'SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, (SELECT COALESCE(MAX({connection.ops.quote_name(column)}), 0) FROM {connection.ops.quote_name(table)})))',
+                    [table, column, start],
+                )
+            else:
+                logger.warning("Cannot reserve an id range for %s on %s (%s)", table, using, connection.vendor)
+
+
+def move_board(board_id, target, batch_size=500):
+    """
+    Move a board with all its rows to another shard, keeping every id.
+    The source shard is write locked by bumping the board version, the rows are copied
+    in dependency order, the routing index is pointed at the target and the source rows
+    are purged before the source transaction commits.
+    Args:
+        board_id: Primary key of the board
+        target: Database alias of the target shard
+        batch_size: Rows per insert statement
+    Returns:
+        int: Number of copied rows
+    """
+    from kanban_app.archive import purge_board
+    from kanban_app.models import (
+        BoardDailyStats, BoardProjection, Comment, HistoricComment, HistoricTask, KanbanBoard, ShardRoute, Task, TaskDependency, TaskStatusTransition,
+        WebhookDeadLetter, WebhookSubscription,
+    )
+
+    source = resolve_shard('board', board_id)
+    if source == target:
+        return 0
+
+    Membership = KanbanBoard.members.through
+    querysets = [
+        KanbanBoard._base_manager.filter(pk=board_id),
+        Membership.objects.filter(kanbanboard_id=board_id),
+        Task._base_manager.filter(board_id=board_id),
+        TaskDependency.objects.filter(board_id=board_id),
+        Comment.objects.filter(task__board_id=board_id),
+        HistoricTask.objects.filter(board_id=board_id),
+        HistoricComment.objects.filter(task__board_id=board_id),
+        TaskStatusTransition.objects.filter(board_id=board_id),
+        BoardDailyStats.objects.filter(board_id=board_id),
+        BoardProjection.objects.filter(board_id=board_id),
+        WebhookSubscription.objects.filter(board_id=board_id),
+        WebhookDeadLetter.objects.filter(subscription__board_id=board_id),
+    ]
+
+    copied = 0
+    with use_shard(source), transaction.atomic(using=source):
+        if not KanbanBoard._base_manager.using(source).filter(pk=board_id).update(version=F('version') + 1):
+            return 0
+
+        with transaction.atomic(using=target):
+            for queryset in querysets:
+                copied += _copy_rows(queryset.using(source).order_by('pk'), target, batch_size)
+
+        task_ids = Task._base_manager.using(source).filter(board_id=board_id).values_list('pk', flat=True)
+        routes = [ShardRoute(kind='board', object_id=board_id, shard=target)]
+        routes.extend(ShardRoute(kind='task', object_id=task_id, shard=target) for task_id in task_ids.iterator())
+        ShardRoute.objects.bulk_create(
+            routes, batch_size=batch_size, update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=['shard'],
+        )
+
+        purge_board(board_id, chunk_size=batch_size)
+    return copied
+
+
+def _copy_rows(queryset, target, batch_size):
+    manager = queryset.model._base_manager.using(target)
+    copied = 0
+    batch = []
+    for row in queryset.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            copied += len(manager.bulk_create(batch))
+            batch = []
+    if batch:
+        copied += len(manager.bulk_create(batch))
+    return copied
+
+
+def sync_users():
+    """
+    Mirror all users into every shard, e.g. after adding a shard.
+    Returns:
+        int: Number of mirrored users
+    """
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    count = 0
+    for user in User._base_manager.using(DEFAULT_DB_ALIAS).order_by('pk').iterator(chunk_size=500):
+        mirror_user(user)
+        count += 1
+    return count
@@ -0,0 +1,351 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from kanban_app import analytics, projections, saved_views, webhooks
+from kanban_app.dependencies import invalidate_dependency_graph
+from kanban_app.models import Comment, KanbanBoard, SavedView, Task, TaskDependency
+from kanban_app.ranking import rank_for_new_task
+from kanban_app.sharding import mirror_user, on_signal_shard, remove_user_mirror, sharding_enabled
+
+
+@receiver(pre_save, sender=Task)
+@on_signal_shard
+def remember_previous_status(sender, instance, **kwargs):
+    """
+    Store the status the task had before this save.
+    Uses the status loaded from the database and only queries if it was deferred.
+    """
+    if instance._state.adding:
+        instance._previous_status = ''
+    elif hasattr(instance, '_loaded_status') and instance._loaded_status is not None:
+        instance._previous_status = instance._loaded_status
+    else:
+        instance._previous_status = Task._base_manager.filter(pk=instance.pk).values_list('status', flat=True).first() or ''
+
+
+@receiver(pre_save, sender=Task)
+@on_signal_shard
+def assign_rank_to_new_task(sender, instance, raw=False, **kwargs):
+    """
+    Place new tasks without a rank at the end of their column.
+    """
+    if not raw and instance._state.adding and not instance.rank:
+        instance.rank = rank_for_new_task(instance.board_id, instance.status)
+
+
+@receiver(post_save, sender=Task)
+@on_signal_shard
+def record_status_change(sender, instance, created, raw=False, **kwargs):
+    """
+    Record task creation and status changes for board analytics.
+    """
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_status', '')
+    if created or previous != instance.status:
+        analytics.record_transition(instance, previous, instance.status)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Task)
+@on_signal_shard
+def record_task_removal(sender, instance, **kwargs):
+    """
+    Record deleted tasks for board analytics.
+    Tasks of archived boards are skipped, they are removed by the board purge, and so are
+    tasks deleted together with their board, whose analytics rows are deleted as well.
+    """
+    if instance.archived_at is None and not analytics.is_board_deleting(instance.board_id):
+        analytics.record_transition(instance, instance.status, '')
+
+
+@receiver(pre_delete, sender=KanbanBoard)
+def start_board_deletion(sender, instance, **kwargs):
+    """
+    Mark the board as being deleted before its tasks are deleted by the cascade.
+    """
+    analytics.start_board_deletion(instance.pk)
+
+
+@receiver(post_delete, sender=KanbanBoard)
+def finish_board_deletion(sender, instance, **kwargs):
+    analytics.finish_board_deletion(instance.pk)
+
+
+@receiver(post_save, sender=Task)
+@on_signal_shard
+def patch_projection_on_task_save(sender, instance, raw=False, **kwargs):
+    """
+    Replace the task's entry in the board detail projection.
+    """
+    if not raw and instance.archived_at is None:
+        projections.refresh_task_entry(instance.board_id, instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+@on_signal_shard
+def patch_projection_on_task_delete(sender, instance, **kwargs):
+    """
+    Remove the task's entry from the board detail projection.
+    """
+    if instance.archived_at is None:
+        projections.refresh_task_entry(instance.board_id, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@on_signal_shard
+def patch_projection_on_comment_change(sender, instance, raw=False, **kwargs):
+    """
+    Update the comment count of the task entry in the board detail projection.
+    """
+    if raw or (kwargs.get('signal') is post_save and not kwargs.get('created')):
+        return
+    board_id = Task._base_manager.filter(pk=instance.task_id, archived_at__isnull=True).values_list('board_id', flat=True).first()
+    if board_id:
+        projections.refresh_task_entry(board_id, instance.task_id)
+
+
+@receiver(post_save, sender=KanbanBoard)
+@on_signal_shard
+def patch_projection_on_board_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Update title and owner in the board detail projection.
+    """
+    if not raw and not created:
+        projections.patch_board_fields(instance)
+
+
+@receiver(m2m_changed, sender=KanbanBoard.members.through)
+@on_signal_shard
+def patch_projection_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Add or remove member entries in the board detail projection.
+    Changes made from the user side drop the affected projections instead.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        projections.BoardProjection.objects.filter(board_id__in=pk_set or []).delete()
+        if action == 'post_clear':
+            projections.drop_projections_for_user(instance)
+        return
+
+    if action == 'post_add':
+        projections.patch_members(instance.pk, added_ids=pk_set)
+    elif action == 'post_remove':
+        projections.patch_members(instance.pk, removed_ids=pk_set)
+    else:
+        projections.patch_members(instance.pk, clear=True)
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+@on_signal_shard
+def invalidate_graph_on_edge_change(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached dependency graph of the board after an edge was added or removed.
+    """
+    if not raw:
+        invalidate_dependency_graph(instance.board_id, using=instance._state.db)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@on_signal_shard
+def invalidate_graph_on_task_change(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached dependency graph after a task changed its status or was deleted.
+    Other task updates do not touch the graph.
+    """
+    if raw:
+        return
+    if kwargs.get('signal') is post_save and (kwargs.get('created') or getattr(instance, '_previous_status', '') == instance.status):
+        return
+    invalidate_dependency_graph(instance.board_id, using=instance._state.db)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@on_signal_shard
+def emit_task_webhook(sender, instance, raw=False, **kwargs):
+    """
+    Send task events to the board's webhooks. Tasks of archived boards are skipped.
+    """
+    if raw or instance.archived_at is not None:
+        return
+    if kwargs.get('signal') is post_delete:
+        event_type = 'task.deleted'
+    else:
+        event_type = 'task.created' if kwargs.get('created') else 'task.updated'
+    webhooks.emit(event_type, instance.board_id, webhooks.task_data(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@on_signal_shard
+def emit_comment_webhook(sender, instance, raw=False, **kwargs):
+    """
+    Send comment events to the board's webhooks.
+    """
+    if raw:
+        return
+    if kwargs.get('signal') is post_delete:
+        event_type = 'comment.deleted'
+    else:
+        event_type = 'comment.created' if kwargs.get('created') else 'comment.updated'
+    task = instance.task if Comment.task.is_cached(instance) else None
+    board_id = task.board_id if task else Task._base_manager.filter(pk=instance.task_id).values_list('board_id', flat=True).first()
+    if board_id:
+        webhooks.emit(event_type, board_id, webhooks.comment_data(instance))
+
+
+@receiver(post_save, sender=KanbanBoard)
+@on_signal_shard
+def emit_board_webhook(sender, instance, created, raw=False, **kwargs):
+    """
+    Send board updates to the board's webhooks.
+    """
+    if not raw and not created:
+        webhooks.emit('board.updated', instance.pk, webhooks.board_data(instance))
+
+
+@receiver(m2m_changed, sender=KanbanBoard.members.through)
+@on_signal_shard
+def emit_members_webhook(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Send member changes made from the board side to the board's webhooks.
+    """
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    webhooks.emit('board.members_changed', instance.pk, {
+        'id': instance.pk,
+        'action': action[len('post_'):],
+        'user_ids': sorted(pk_set or []),
+    })
+
+
+@receiver(pre_save, sender=Task)
+@on_signal_shard
+def remember_saved_view_snapshot(sender, instance, raw=False, **kwargs):
+    """
+    Store the saved view fields the task had before this save.
+    Uses the values loaded from the database and only queries if some were deferred.
+    """
+    if raw or instance._state.adding:
+        instance._previous_snapshot = None
+    elif getattr(instance, '_loaded_snapshot', None) is not None:
+        instance._previous_snapshot = instance._loaded_snapshot
+    else:
+        instance._previous_snapshot = Task._base_manager.filter(pk=instance.pk).values(*Task.SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=Task)
+@on_signal_shard
+def update_saved_views_on_task_save(sender, instance, raw=False, **kwargs):
+    """
+    Update the counters and cached results of saved views matching the task before or after the save.
+    """
+    if raw:
+        return
+    snapshot = saved_views.task_snapshot(instance)
+    saved_views.schedule_task_change(instance.pk, getattr(instance, '_previous_snapshot', None), snapshot, instance._state.db)
+    instance._loaded_snapshot = snapshot
+
+
+@receiver(post_delete, sender=Task)
+@on_signal_shard
+def update_saved_views_on_task_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted task from the saved views it matched.
+    """
+    saved_views.schedule_task_change(instance.pk, saved_views.task_snapshot(instance), None, instance._state.db)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@on_signal_shard
+def update_saved_views_on_comment_change(sender, instance, raw=False, **kwargs):
+    """
+    Refresh the comment count of the task in the cached results of saved views.
+    """
+    if raw or (kwargs.get('signal') is post_save and not kwargs.get('created')):
+        return
+    if not saved_views.view_scopes():
+        return
+    using = instance._state.db
+    snapshot = Task._base_manager.using(using).filter(pk=instance.task_id).values(*Task.SNAPSHOT_FIELDS).first()
+    if snapshot:
+        saved_views.schedule_task_change(instance.task_id, snapshot, snapshot, using)
+
+
+@receiver(post_save, sender=SavedView)
+@receiver(post_delete, sender=SavedView)
+def drop_view_scopes_on_saved_view_change(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached scopes of saved views, task changes look up the users with views there.
+    """
+    if not raw:
+        saved_views.drop_view_scopes(instance._state.db)
+
+
+@receiver(m2m_changed, sender=KanbanBoard.members.through)
+@on_signal_shard
+def invalidate_saved_views_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recount the 'member_boards' saved views of users who joined or left a board.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        user_ids = list(instance.members.values_list('id', flat=True))
+    else:
+        user_ids = pk_set or []
+    saved_views.invalidate_views_of_users(user_ids, scopes=['member_boards'])
+
+
+@receiver(post_save, sender=User)
+def drop_projections_on_user_change(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Drop projections and cached saved view results embedding the user's name or email after they changed.
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not set(update_fields) & {'email', 'first_name', 'last_name', 'username'}:
+        return
+    projections.drop_projections_for_user(instance)
+    saved_views.bump_generation()
+
+
+@receiver(post_save, sender=User)
+def mirror_user_to_shards(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Copy users into every shard, board rows reference and join them there.
+    Logins only touching last_login are not mirrored.
+    """
+    if raw or not sharding_enabled():
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    mirror_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_saved_view_results_on_user_delete(sender, instance, **kwargs):
+    """
+    Drop cached saved view results, tasks of a deleted user lose their assignee or reviewer.
+    """
+    saved_views.bump_generation()
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_shards(sender, instance, **kwargs):
+    """
+    Delete the user's mirrors, together with the board rows the user owns on each shard.
+    """
+    if sharding_enabled():
+        remove_user_mirror(instance)
@@ -1 +1,1597 @@
-from django.test import TestCase
+import base64
+import datetime
+import gzip
+import hashlib
+import hmac
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.test import APITestCase
+from rest_framework.views import APIView
+
+from auth_app.api.serializers import RegistrationSerializer
+from core import settings_api
+from core.metrics import Registry
+from core.middleware import CompressionMiddleware
+from core.throttling import EmailCheckRateThrottle, LoginAccountRateThrottle, LoginRateThrottle, UserQuotaThrottle
+from kanban_app.admin import EstimatedCountPaginator
+from kanban_app.api.exceptions import PreconditionFailed
+from kanban_app.api.views import BoardsView
+from kanban_app.api.serializers import TaskDetailSerializer
+from kanban_app.archive import archive_board, delete_board, purge_board
+from kanban_app.history import move_to_history
+from kanban_app.membership import is_board_member, non_member_ids
+from kanban_app import projections
+from kanban_app.models import BoardDailyStats, BoardProjection, Comment, HistoricComment, HistoricTask, KanbanBoard, SavedView, Task, TaskDependency, TaskStatusTransition, WebhookDeadLetter, WebhookSubscription
+from kanban_app.projections import serialize_board
+from kanban_app.saved_views import view_scopes
+from kanban_app.sharding import SHARD_ID_SPAN, move_board, resolve_shard, use_shard
+from kanban_app.webhooks import Batch, DeliveryError, WebhookDispatcher, replay_dead_letter
+
+
+MEMBER_COUNTS = [1, 10, 1000, 10000]
+
+
+class BoardMembershipValidationTests(APITestCase):
+    """
+    Task create/update validation checks assignee and reviewer membership with a
+    constant number of queries, no matter how many members the board has.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner@example.com', email='owner@example.com', password='pw')
+        cls.outsider = User.objects.create_user(username='outsider@example.com', email='outsider@example.com', password='pw')
+        User.objects.bulk_create(
+            User(username=f'member{i}@example.com', email=f'member{i}@example.com') for i in range(max(MEMBER_COUNTS))
+        )
+        cls.member_ids = list(
+            User.objects.filter(username__startswith='member').order_by('id').values_list('id', flat=True)
+        )
+        cls.boards = {}
+        for count in MEMBER_COUNTS:
+            board = KanbanBoard.objects.create(title=f'{count} members', owner=cls.owner)
+            board.members.add(*cls.member_ids[:count])
+            cls.boards[count] = board
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def create_task(self, board, **data):
+        return self.client.post(reverse('tasks-list'), {'board': board.id, 'title': 'Task', **data}, format='json')
+
+    def count_queries(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        return response, len(queries)
+
+    def test_non_member_ids_returns_outsiders_only(self):
+        board = self.boards[10]
+        self.assertEqual(non_member_ids(board.id, [self.member_ids[0], self.outsider.id, None]), {self.outsider.id})
+        self.assertEqual(non_member_ids(board.id, [None]), set())
+
+    def test_is_board_member_accepts_owner_and_members(self):
+        board = self.boards[1]
+        self.assertTrue(is_board_member(board, self.owner))
+        self.assertTrue(is_board_member(board, User.objects.get(pk=self.member_ids[0])))
+        self.assertFalse(is_board_member(board, self.outsider))
+
+    def test_create_rejects_non_member_assignee_and_reviewer(self):
+        board = self.boards[10]
+        response = self.create_task(board, assignee_id=self.outsider.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('assignee_id', response.data)
+
+        response = self.create_task(board, assignee_id=self.member_ids[0], reviewer_id=self.outsider.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('reviewer_id', response.data)
+
+    def test_update_rejects_non_member_assignee(self):
+        board = self.boards[10]
+        task = Task.objects.create(board=board, title='Task', created_by=self.owner)
+        response = self.client.patch(reverse('task-detail', args=[task.id]), {'assignee_id': self.outsider.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('assignee_id', response.data)
+
+    def test_create_query_count_is_independent_of_member_count(self):
+        query_counts = {}
+        for count, board in self.boards.items():
+            last_member = self.member_ids[count - 1]
+            response, query_counts[count] = self.count_queries(
+                lambda: self.create_task(board, assignee_id=last_member, reviewer_id=self.member_ids[0])
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(set(query_counts.values())), 1, query_counts)
+
+    def test_update_query_count_is_independent_of_member_count(self):
+        query_counts = {}
+        for count, board in self.boards.items():
+            task = Task.objects.create(board=board, title='Task', created_by=self.owner)
+            last_member = self.member_ids[count - 1]
+            response, query_counts[count] = self.count_queries(
+                lambda: self.client.patch(
+                    reverse('task-detail', args=[task.id]),
+                    {'assignee_id': last_member, 'reviewer_id': self.member_ids[0]},
+                    format='json',
+                )
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(set(query_counts.values())), 1, query_counts)
+
+
+class BoardMemberEndpointTests(APITestCase):
+    """
+    Members are added and removed incrementally and listed with cursor pagination;
+    only the owner and members can manage them.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='team@example.com', email='team@example.com', password='pw')
+        self.users = [
+            User.objects.create_user(username=f'team{i}@example.com', email=f'team{i}@example.com', password='pw')
+            for i in range(5)
+        ]
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Team', owner=self.owner)
+        self.url = reverse('board-members', args=[self.board.id])
+
+    def member_ids(self):
+        return set(self.board.members.values_list('id', flat=True))
+
+    def test_members_are_added_and_removed(self):
+        response = self.client.post(self.url, {'user_ids': [user.id for user in self.users[:3]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([user['id'] for user in response.data], [user.id for user in self.users[:3]])
+
+        self.client.force_authenticate(self.users[0])
+        response = self.client.delete(reverse('board-member-detail', args=[self.board.id, self.users[1].id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.delete(self.url, {'user_ids': [self.users[2].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.member_ids(), {self.users[0].id})
+
+        self.client.force_authenticate(self.users[4])
+        response = self.client.post(self.url, {'user_ids': [self.users[4].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.member_ids(), {self.users[0].id})
+
+    def test_members_are_listed_page_by_page(self):
+        self.board.members.add(*self.users)
+
+        response = self.client.get(self.url, {'limit': 2})
+        pages = [[user['id'] for user in response.data['results']]]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([user['id'] for user in response.data['results']])
+
+        ids = [user.id for user in self.users]
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:5]])
+
+
+class EstimatedCountPaginatorTests(APITestCase):
+    """
+    Admin changelists use the database statistics for large tables, but only while
+    the estimate fits the primary key range.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        owner = User.objects.create_user(username='admin-count@example.com', email='admin-count@example.com', password='pw')
+        KanbanBoard.objects.bulk_create(KanbanBoard(title=f'Board {i}', owner=owner) for i in range(30))
+
+    def paginator(self):
+        paginator = EstimatedCountPaginator(KanbanBoard.all_objects.all(), 10)
+        paginator.exact_count_limit = 10
+        return paginator
+
+    def test_estimate_is_used_until_it_is_implausible(self):
+        self.assertEqual(self.paginator().count, 30)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(self.paginator().estimate_row_count(KanbanBoard), 30)
+
+        boards = KanbanBoard.all_objects.order_by('id')
+        boards.filter(id__lt=boards[5].id).delete()
+        boards.filter(id__gt=boards[14].id).delete()
+        self.assertEqual(self.paginator().estimate_row_count(KanbanBoard), None)
+        self.assertEqual(self.paginator().count, 15)
+
+
+class CommentPaginationTests(APITestCase):
+    """
+    Comment threads page backwards along (created_at, id) with an opaque 'before' cursor.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='thread@example.com', email='thread@example.com', password='pw')
+        self.client.force_authenticate(self.user)
+        board = KanbanBoard.objects.create(title='Thread', owner=self.user)
+        board.members.add(self.user)
+        self.task = Task.objects.create(board=board, title='Discussed', created_by=self.user)
+        start = timezone.now() - datetime.timedelta(days=1)
+        self.comments = []
+        # Comments 2 to 4 share a timestamp, so the cursor has to break ties by id.
+        for i, minutes in enumerate([0, 1, 2, 2, 2, 5, 6]):
+            comment = Comment.objects.create(task=self.task, author=self.user, content=f'Comment {i}')
+            comment.created_at = start + datetime.timedelta(minutes=minutes)
+            Comment.objects.filter(pk=comment.pk).update(created_at=comment.created_at)
+            self.comments.append(comment)
+        self.url = reverse('task-comments', args=[self.task.id])
+
+    def page(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [comment['content'] for comment in response.data['results']], response.data['older']
+
+    def test_without_parameters_the_whole_thread_is_returned(self):
+        response = self.client.get(self.url)
+        self.assertEqual([comment['content'] for comment in response.data], [f'Comment {i}' for i in range(7)])
+
+    def test_pages_walk_back_through_tied_timestamps(self):
+        contents, older = self.page(limit=3)
+        self.assertEqual(contents, ['Comment 4', 'Comment 5', 'Comment 6'])
+        oldest = self.comments[4]
+        self.assertEqual(base64.urlsafe_b64decode(older).decode(), f'{oldest.created_at.isoformat()}|{oldest.id}')
+        self.assertEqual(older, self.cursor(oldest))
+
+        contents, older = self.page(limit=3, before=older)
+        self.assertEqual(contents, ['Comment 1', 'Comment 2', 'Comment 3'])
+        contents, older = self.page(limit=3, before=older)
+        self.assertEqual((contents, older), (['Comment 0'], None))
+
+    def cursor(self, comment):
+        return base64.urlsafe_b64encode(f'{comment.created_at.isoformat()}|{comment.id}'.encode()).decode()
+
+    def test_before_excludes_the_cursor_comment(self):
+        self.assertEqual(self.page(limit=1, before=self.cursor(self.comments[3])), (['Comment 2'], self.cursor(self.comments[2])))
+        self.assertEqual(self.page(before=self.cursor(self.comments[2])), (['Comment 0', 'Comment 1'], None))
+
+    def test_invalid_cursors_and_limits_are_rejected(self):
+        invalid = ['not base64!', base64.urlsafe_b64encode(b'yesterday|1').decode(), base64.urlsafe_b64encode(b'2026-10-18T10:00:00+00:00|x').decode(), base64.urlsafe_b64encode(b'\xff\xfe').decode()]
+        for cursor in invalid:
+            response = self.client.get(self.url, {'before': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, cursor)
+            self.assertIn('before', response.data)
+        self.assertEqual(self.client.get(self.url, {'limit': 'ten'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.page(limit=0)[0]), 1)
+
+    def test_older_pages_cost_the_same_queries_as_the_newest(self):
+        database = connections[self.task._state.db]
+        with CaptureQueriesContext(database) as newest:
+            _, older = self.page(limit=2)
+        _, older = self.page(limit=2, before=older)
+        with CaptureQueriesContext(database) as deeper:
+            self.page(limit=2, before=older)
+        self.assertEqual(len(deeper.captured_queries), len(newest.captured_queries))
+
+
+class BoardCloneTests(APITestCase):
+    """
+    Cloning copies members, active tasks, their dependencies and optionally their comments into a board of the current user.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='source@example.com', email='source@example.com', password='pw')
+        self.member = User.objects.create_user(username='cloner@example.com', email='cloner@example.com', password='pw')
+        self.other = User.objects.create_user(username='other-member@example.com', email='other-member@example.com', password='pw')
+        self.board = KanbanBoard.objects.create(title='Source', owner=self.owner)
+        self.board.members.add(self.owner, self.member, self.other)
+        due = datetime.date(2026, 11, 1)
+        self.first = Task.objects.create(board=self.board, title='First', status='done', due_date=due, assignee=self.other, created_by=self.owner)
+        self.second = Task.objects.create(board=self.board, title='Second', status='to_do', due_date=due, created_by=self.owner)
+        self.third = Task.objects.create(board=self.board, title='Third', status='review', created_by=self.owner)
+        self.archived = Task.objects.create(board=self.board, title='Archived', created_by=self.owner)
+        TaskDependency.objects.create(board=self.board, task=self.second, blocked_by=self.first)
+        TaskDependency.objects.create(board=self.board, task=self.third, blocked_by=self.second)
+        TaskDependency.objects.create(board=self.board, task=self.third, blocked_by=self.archived)
+        self.created_at = timezone.now() - datetime.timedelta(days=30)
+        for task in (self.first, self.archived):
+            comment = Comment.objects.create(task=task, author=self.other, content=f'On {task.title}')
+            Comment.objects.filter(pk=comment.pk).update(created_at=self.created_at)
+        self.archived.archived_at = timezone.now()
+        self.archived.save()
+        self.client.force_authenticate(self.member)
+
+    def clone(self, **options):
+        response = self.client.post(reverse('board-clone', args=[self.board.id]), options, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return KanbanBoard.objects.get(pk=response.data['id'])
+
+    def test_clone_copies_members_tasks_and_remapped_edges(self):
+        clone = self.clone()
+        self.assertEqual((clone.title, clone.owner), ('Source', self.member))
+        self.assertEqual(set(clone.members.all()), {self.owner, self.other})
+
+        tasks = {task.title: task for task in Task.all_objects.filter(board=clone)}
+        self.assertEqual(set(tasks), {'First', 'Second', 'Third'})
+        self.assertEqual([(tasks['First'].status, tasks['First'].due_date), (tasks['Third'].status, tasks['Third'].due_date)], [('done', self.first.due_date), ('review', None)])
+        self.assertEqual(tasks['First'].assignee, self.other)
+        self.assertEqual({task.created_by for task in tasks.values()}, {self.member})
+        edges = set(TaskDependency.objects.filter(board=clone).values_list('task_id', 'blocked_by_id'))
+        self.assertEqual(edges, {(tasks['Second'].id, tasks['First'].id), (tasks['Third'].id, tasks['Second'].id)})
+        self.assertFalse(Comment.objects.filter(task__board=clone).exists())
+        self.assertEqual(Task.all_objects.filter(board=self.board).count(), 4)
+
+    def test_clone_options(self):
+        clone = self.clone(title='Copy', reset_status=True, reset_dates=True, include_comments=True)
+        self.assertEqual(clone.title, 'Copy')
+        tasks = list(Task.objects.filter(board=clone).order_by('rank'))
+        self.assertEqual({(task.status, task.due_date) for task in tasks}, {('to_do', None)})
+        self.assertEqual([task.title for task in tasks], ['Second', 'Third', 'First'])
+        comments = list(Comment.objects.filter(task__board=clone).values_list('task__title', 'author', 'content', 'created_at'))
+        self.assertEqual(comments, [('First', self.other.id, 'On First', self.created_at)])
+
+    def test_cloning_a_board_of_its_owner_keeps_the_owner_out_of_the_members(self):
+        self.client.force_authenticate(self.owner)
+        clone = self.clone()
+        self.assertEqual(clone.owner, self.owner)
+        self.assertEqual(set(clone.members.all()), {self.member, self.other})
+
+    def test_only_owners_and_members_can_clone(self):
+        outsider = User.objects.create_user(username='outsider@example.com', email='outsider@example.com', password='pw')
+        self.client.force_authenticate(outsider)
+        response = self.client.post(reverse('board-clone', args=[self.board.id]), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(KANBAN_BACKGROUND_PURGE=False)
+class BoardArchiveTests(APITestCase):
+    """
+    Archived boards and their tasks are hidden by the default managers until restored;
+    deleted boards are archived at once and purged in chunks without model signals.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='archive@example.com', email='archive@example.com', password='pw')
+        self.member = User.objects.create_user(username='archived-member@example.com', email='archived-member@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Archive', owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+        self.tasks = [Task.objects.create(board=self.board, title=f'Task {i}', created_by=self.owner) for i in range(3)]
+        TaskDependency.objects.create(board=self.board, task=self.tasks[1], blocked_by=self.tasks[0])
+        for task in self.tasks:
+            Comment.objects.create(task=task, author=self.owner, content='Comment')
+        self.using = self.board._state.db
+
+    def test_archived_boards_are_hidden_until_restored(self):
+        self.tasks[2].archived_at = timezone.now() - datetime.timedelta(days=1)
+        self.tasks[2].save()
+
+        response = self.client.post(reverse('board-archive', args=[self.board.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(KanbanBoard.objects.using(self.using).filter(pk=self.board.pk).exists())
+        self.assertTrue(KanbanBoard.all_objects.using(self.using).filter(pk=self.board.pk).exists())
+        self.assertFalse(Task.objects.using(self.using).filter(board_id=self.board.pk).exists())
+        self.assertEqual(self.client.get(reverse('board-detail', args=[self.board.id])).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('boards')).data, [])
+
+        response = self.client.post(reverse('board-restore', args=[self.board.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        restored = Task.objects.using(self.using).filter(board_id=self.board.pk).order_by('id')
+        self.assertEqual(list(restored), self.tasks[:2])
+        self.assertEqual([board['id'] for board in self.client.get(reverse('boards')).data], [self.board.id])
+
+    def test_only_the_owner_archives_and_restores(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.post(reverse('board-archive', args=[self.board.id])).status_code, status.HTTP_403_FORBIDDEN)
+        archive_board(self.board)
+        self.assertEqual(self.client.post(reverse('board-restore', args=[self.board.id])).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deleted_boards_are_hidden_then_purged_in_chunks(self):
+        response = self.client.delete(reverse('board-detail', args=[self.board.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        board = KanbanBoard.all_objects.using(self.using).get(pk=self.board.pk)
+        self.assertIsNotNone(board.deleted_at)
+        self.assertEqual(self.client.post(reverse('board-restore', args=[self.board.id])).status_code, status.HTTP_404_NOT_FOUND)
+        transitions = TaskStatusTransition.objects.using(self.using).filter(board_id=self.board.pk).count()
+
+        with use_shard(self.using):
+            deleted = purge_board(self.board.pk, chunk_size=2)
+        connections[self.using].check_constraints()
+        self.assertEqual(deleted, 1 + 2 + 3 + 1 + 3 + transitions + 1)
+        self.assertFalse(KanbanBoard.all_objects.using(self.using).filter(pk=self.board.pk).exists())
+        self.assertFalse(Task.all_objects.using(self.using).filter(board_id=self.board.pk).exists())
+        self.assertFalse(Comment.objects.using(self.using).filter(task_id__in=[task.pk for task in self.tasks]).exists())
+        self.assertFalse(KanbanBoard.members.through.objects.using(self.using).filter(kanbanboard_id=self.board.pk).exists())
+
+    def test_purge_boards_command_picks_up_deleted_boards(self):
+        delete_board(self.board)
+        output = StringIO()
+        call_command('purge_boards', stdout=output)
+        self.assertIn('Purged 1 board(s).', output.getvalue())
+        self.assertFalse(KanbanBoard.all_objects.using(self.using).filter(pk=self.board.pk).exists())
+
+
+class BoardAnalyticsTests(APITestCase):
+    """
+    Status transitions keep the daily rollups up to date; deleting a board or its
+    owner deletes its analytics without recording the removed tasks.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='analytics@example.com', email='analytics@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Analytics', owner=self.owner)
+        self.board.members.add(self.owner)
+        self.tasks = [Task.objects.create(board=self.board, title=f'Task {i}', created_by=self.owner) for i in range(3)]
+
+    def assert_deleted_with_board(self, delete):
+        board_id, using = self.board.pk, self.board._state.db
+        self.assertTrue(TaskStatusTransition.objects.using(using).filter(board_id=board_id).exists())
+        delete()
+        connections[using].check_constraints()
+        self.assertFalse(TaskStatusTransition.objects.using(using).filter(board_id=board_id).exists())
+        self.assertFalse(BoardDailyStats.objects.using(using).filter(board_id=board_id).exists())
+
+    def test_deleting_a_board_deletes_its_analytics(self):
+        self.assert_deleted_with_board(self.board.delete)
+
+        other = KanbanBoard.objects.create(title='Other', owner=self.owner)
+        Task.objects.create(board=other, title='Other', created_by=self.owner).delete()
+        self.assertTrue(TaskStatusTransition.objects.using(other._state.db).filter(board_id=other.pk, to_status='').exists())
+
+    def test_deleting_the_owner_deletes_board_analytics(self):
+        self.assert_deleted_with_board(self.owner.delete)
+
+    def today_stats(self):
+        return BoardDailyStats.objects.using(self.board._state.db).get(board=self.board, date=timezone.localdate())
+
+    def test_status_changes_update_the_daily_rollup(self):
+        todo, doing, done = self.tasks
+        doing.status = 'in_progress'
+        doing.save()
+        with CaptureQueriesContext(connections[self.board._state.db]) as queries:
+            done.status = 'done'
+            done.save()
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('SELECT') and 'kanban_app_taskstatustransition' in query['sql']])
+
+        stats = self.today_stats()
+        self.assertEqual((stats.to_do_count, stats.in_progress_count, stats.review_count, stats.done_count), (1, 1, 0, 1))
+        self.assertEqual(stats.completed_count, 1)
+
+        todo.delete()
+        self.assertEqual(self.today_stats().to_do_count, 0)
+
+    def test_analytics_view_reports_flow_throughput_and_cycle_time(self):
+        for task in self.tasks[:2]:
+            task.status = 'done'
+            task.save()
+        TaskStatusTransition.objects.using(self.board._state.db).filter(board=self.board, to_status='done').update(cycle_seconds=60)
+
+        response = self.client.get(reverse('board-analytics', args=[self.board.id]), {'days': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = timezone.localdate()
+        self.assertEqual(len(response.data['cumulative_flow']), 7)
+        self.assertEqual(response.data['cumulative_flow'][-1], {'date': today, 'to_do': 1, 'in_progress': 0, 'review': 0, 'done': 2})
+        self.assertEqual(response.data['throughput'][-1], {'date': today, 'completed': 2})
+        self.assertEqual(response.data['cycle_time']['daily'], [{'date': today, 'median': 60, 'p90': 60}])
+        self.assertEqual(response.data['cycle_time']['window'], {'count': 2, 'median': 60, 'p90': 60})
+
+    def test_analytics_view_validates_the_window_and_membership(self):
+        url = reverse('board-analytics', args=[self.board.id])
+        self.assertEqual(self.client.get(url, {'from': '2026-02-01', 'to': '2026-01-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'days': 'many'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        stranger = User.objects.create_user(username='stranger@example.com', email='stranger@example.com', password='pw')
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BoardProjectionTests(APITestCase):
+    """
+    The board detail projection is patched from task, comment and member changes and
+    stays equal to live serialization; check_board_projections reports and repairs drift.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='projection@example.com', email='projection@example.com', password='pw')
+        self.member = User.objects.create_user(username='member@example.com', email='member@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Projection', owner=self.owner)
+        self.board.members.add(self.owner)
+        self.task = Task.objects.create(board=self.board, title='Task', created_by=self.owner)
+        self.client.get(reverse('board-detail', args=[self.board.id]))
+
+    def stored(self):
+        return BoardProjection.objects.using(self.board._state.db).get(board_id=self.board.id).document
+
+    def assert_projection_is_live(self):
+        with use_shard(self.board._state.db):
+            self.assertEqual(self.stored(), serialize_board(self.board.id))
+
+    def test_projection_follows_task_comment_and_member_changes(self):
+        self.task.title = 'Renamed'
+        self.task.save()
+        other = Task.objects.create(board=self.board, title='Other', created_by=self.owner)
+        Comment.objects.create(task=self.task, author=self.owner, content='Comment')
+        self.board.members.add(self.member)
+        self.assert_projection_is_live()
+        self.assertEqual([task['title'] for task in self.stored()['tasks']], ['Renamed', 'Other'])
+
+        other.delete()
+        self.board.members.remove(self.owner)
+        self.assert_projection_is_live()
+        self.assertEqual([member['id'] for member in self.stored()['members']], [self.member.id])
+
+        response = self.client.get(reverse('board-detail', args=[self.board.id]))
+        self.assertEqual(response.data['tasks'], self.stored()['tasks'])
+
+    def test_task_entry_is_serialized_under_the_lock(self):
+        patch_projection = projections.patch_projection
+
+        def save_meanwhile(board_id, patch):
+            Task.objects.filter(pk=self.task.pk).update(title='Saved meanwhile')
+            patch_projection(board_id, patch)
+
+        with use_shard(self.board._state.db), mock.patch.object(projections, 'patch_projection', save_meanwhile):
+            projections.refresh_task_entry(self.board.id, self.task.id)
+        self.assertEqual(self.stored()['tasks'][0]['title'], 'Saved meanwhile')
+
+    def test_check_board_projections_reports_and_repairs_drift(self):
+        call_command('check_board_projections', stdout=StringIO())
+        Task.objects.filter(pk=self.task.pk).update(title='Changed without signals')
+
+        with self.assertRaises(CommandError):
+            call_command('check_board_projections', stdout=StringIO())
+        output = StringIO()
+        call_command('check_board_projections', '--repair', stdout=output)
+        self.assertIn('Repaired', output.getvalue())
+        self.assert_projection_is_live()
+
+
+class OptimisticConcurrencyTests(APITestCase):
+    """
+    Task updates claim the version with a conditional UPDATE; a stale If-Match or a
+    version claimed by another request in between fails with 412.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='versions@example.com', email='versions@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        board = KanbanBoard.objects.create(title='Versions', owner=self.owner)
+        self.task = Task.objects.create(board=board, title='Task', created_by=self.owner)
+        self.url = reverse('task-detail', args=[self.task.id])
+
+    def test_stale_if_match_is_rejected(self):
+        response = self.client.patch(self.url, {'title': 'First'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.patch(self.url, {'title': 'Second'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.patch(self.url, {'title': 'Second'}, format='json', HTTP_IF_MATCH='"0"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.version), ('First', 2))
+
+    def test_version_claimed_in_between_is_rejected(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        Task.objects.filter(pk=self.task.pk).update(title='Concurrent', version=2)
+
+        serializer = TaskDetailSerializer(stale, data={'title': 'Stale'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(PreconditionFailed):
+            serializer.save()
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.version), ('Concurrent', 2))
+
+
+class TaskRankingTests(APITestCase):
+    """
+    Tasks are ordered within their column by rank keys: moves write one row under the
+    version check, duplicate keys trigger a rebalance that also rebuilds the board projection.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='ranks@example.com', email='ranks@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Ranks', owner=self.owner)
+        self.first, self.second, self.third = (
+            Task.objects.create(board=self.board, title=title, created_by=self.owner) for title in ('First', 'Second', 'Third')
+        )
+
+    def move(self, task, **data):
+        return self.client.post(reverse('task-move', args=[task.id]), data, format='json')
+
+    def board_order(self, status='to_do'):
+        tasks = self.client.get(reverse('board-detail', args=[self.board.id])).data['tasks']
+        return [task['title'] for task in sorted(tasks, key=lambda task: task['rank']) if task['status'] == status]
+
+    def test_tasks_move_after_and_before_their_neighbors(self):
+        self.assertEqual(self.board_order(), ['First', 'Second', 'Third'])
+
+        self.assertEqual(self.move(self.third, after=self.first.id).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.board_order(), ['First', 'Third', 'Second'])
+        self.assertEqual(self.move(self.second, before=self.first.id).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.board_order(), ['Second', 'First', 'Third'])
+        self.assertEqual(self.move(self.first, after=self.third.id, before=self.second.id).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_duplicate_keys_are_rebalanced_into_the_projection(self):
+        self.assertEqual(self.board_order(), ['First', 'Second', 'Third'])
+        Task.objects.filter(pk=self.second.pk).update(rank=self.first.rank)
+
+        response = self.move(self.third, after=self.first.id, before=self.second.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ranks = dict(Task.objects.filter(board=self.board).values_list('title', 'rank'))
+        self.assertEqual(len(set(ranks.values())), 3)
+        self.assertEqual(self.board_order(), ['First', 'Third', 'Second'])
+        tasks = self.client.get(reverse('board-detail', args=[self.board.id])).data['tasks']
+        self.assertEqual({task['title']: task['rank'] for task in tasks}, ranks)
+
+    def test_status_change_appends_to_the_new_column(self):
+        self.move(self.second, status='review')
+        self.client.patch(reverse('task-detail', args=[self.first.id]), {'status': 'review'}, format='json')
+        self.assertEqual(self.board_order('review'), ['Second', 'First'])
+
+    def test_stale_move_is_rejected(self):
+        response = self.move(self.first, after=self.third.id)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.post(reverse('task-move', args=[self.first.id]), {'before': self.second.id}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(self.board_order(), ['Second', 'Third', 'First'])
+
+
+class TaskHistoryTests(APITestCase):
+    """
+    Tasks done for longer than the history age move with their comments out of
+    the live board into the paginated board history.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='history@example.com', email='history@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='History', owner=self.owner)
+        self.old = Task.objects.create(board=self.board, title='Old', status='done', created_by=self.owner)
+        self.recent = Task.objects.create(board=self.board, title='Recent', status='done', created_by=self.owner)
+        self.open = Task.objects.create(board=self.board, title='Open', created_by=self.owner)
+        Comment.objects.create(task=self.old, author=self.owner, content='Shipped')
+        Task.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - datetime.timedelta(days=100))
+
+    def test_old_done_tasks_move_to_history_with_their_comments(self):
+        self.client.get(reverse('board-detail', args=[self.board.id]))
+
+        self.assertEqual(move_to_history(90), 1)
+
+        self.assertFalse(Task.all_objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Comment.objects.filter(task_id=self.old.pk).exists())
+        self.assertEqual(HistoricComment.objects.get().task_id, self.old.pk)
+        response = self.client.get(reverse('board-detail', args=[self.board.id]))
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.recent.id, self.open.id])
+
+    def test_history_endpoint_pages_through_moved_tasks(self):
+        move_to_history(0)
+        self.assertEqual(HistoricTask.objects.count(), 2)
+
+        response = self.client.get(reverse('board-history', args=[self.board.id]), {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['results']], [self.recent.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([task['id'] for task in response.data['results']], [self.old.id])
+        self.assertEqual(response.data['results'][0]['comments'][0]['content'], 'Shipped')
+
+
+class TaskDependencyTests(APITestCase):
+    """
+    "Blocked by" edges between tasks: cycles are rejected, the board graph is
+    ordered topologically and cached until an edge or a status changes.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='deps@example.com', email='deps@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Dependencies', owner=self.owner)
+        self.addCleanup(cache.clear)
+        self.design, self.build, self.test, self.docs = (
+            Task.objects.create(board=self.board, title=title, created_by=self.owner)
+            for title in ('Design', 'Build', 'Test', 'Docs')
+        )
+
+    def block(self, task, blocked_by):
+        return self.client.post(reverse('task-dependencies', args=[task.id]), {'blocked_by': blocked_by.id}, format='json')
+
+    def test_edges_closing_a_cycle_are_rejected(self):
+        self.assertEqual(self.block(self.build, self.design).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.block(self.test, self.build).status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.block(self.design, self.test).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.block(self.design, self.design).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+
+    def test_graph_lists_topological_order_and_critical_path(self):
+        self.block(self.test, self.build)
+        self.block(self.build, self.design)
+        self.block(self.docs, self.design)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('board-dependencies', args=[self.board.id]))
+        graph_queries = [query for query in queries.captured_queries if 'kanban_app_taskdependency' in query['sql']]
+        self.assertEqual(len(graph_queries), 1)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.design.id, self.build.id, self.test.id, self.docs.id])
+        self.assertEqual(response.data['critical_path'], [self.design.id, self.build.id, self.test.id])
+        self.assertEqual(response.data['blocked'], [self.build.id, self.test.id, self.docs.id])
+
+    def test_status_change_refreshes_the_cached_graph(self):
+        self.block(self.build, self.design)
+        url = reverse('board-dependencies', args=[self.board.id])
+        self.assertEqual(self.client.get(url).data['blocked'], [self.build.id])
+
+        self.design.status = 'done'
+        self.design.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['blocked'], [])
+        self.assertEqual(response.data['critical_path'], [self.build.id])
+
+
+class SavedViewTests(APITestCase):
+    """
+    Saved views compile to task queries; counters and cached results follow task
+    changes without recounting.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='views@example.com', email='views@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.addCleanup(cache.clear)
+        self.board = KanbanBoard.objects.create(title='Views', owner=self.owner)
+        self.urgent = Task.objects.create(board=self.board, title='Urgent', priority='high', status='review', created_by=self.owner)
+        self.minor = Task.objects.create(board=self.board, title='Minor', priority='low', status='review', created_by=self.owner)
+        response = self.client.post(reverse('saved-views'), {
+            'name': 'High priority in review',
+            'filters': {'scope': 'owned_boards', 'priority': ['high'], 'status': ['review']},
+        }, format='json')
+        self.view = SavedView.objects.get(pk=response.data['id'])
+
+    def counts(self):
+        return {view['name']: view['count'] for view in self.client.get(reverse('saved-views')).data}
+
+    def test_opening_a_saved_view_reads_the_cache(self):
+        url = reverse('saved-view-tasks', args=[self.view.id])
+        self.assertEqual([task['id'] for task in self.client.get(url).data], [self.urgent.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual([task['id'] for task in response.data], [self.urgent.id])
+        self.assertFalse([query for query in queries.captured_queries if 'kanban_app_task' in query['sql']])
+
+    def test_counts_and_results_follow_task_changes(self):
+        self.client.get(reverse('saved-view-tasks', args=[self.view.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.minor.priority = 'high'
+            self.minor.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.urgent.status = 'done'
+            self.urgent.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(board=self.board, title='New', priority='high', status='review', created_by=self.owner)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.counts(), {'High priority in review': 2})
+        self.assertEqual(len(queries.captured_queries), 1)
+        cached = self.client.get(reverse('saved-view-tasks', args=[self.view.id])).data
+        self.assertEqual([task['title'] for task in cached], ['Minor', 'New'])
+
+        SavedView.objects.filter(pk=self.view.pk).update(task_count=None)
+        cache.clear()
+        self.assertEqual(self.counts(), {'High priority in review': 2})
+        self.assertEqual(self.client.get(reverse('saved-view-tasks', args=[self.view.id])).data, cached)
+
+    def test_changes_already_in_built_results_are_not_counted_twice(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            late = Task.objects.create(board=self.board, title='Late', priority='high', status='review', created_by=self.owner)
+        url = reverse('saved-view-tasks', args=[self.view.id])
+        self.assertEqual([task['id'] for task in self.client.get(url).data], [self.urgent.id, late.id])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.counts(), {'High priority in review': 2})
+        self.assertEqual([task['id'] for task in self.client.get(url).data], [self.urgent.id, late.id])
+
+    def saved_view_queries(self, change):
+        view_scopes()
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            change()
+        return [query for query in queries.captured_queries if 'kanban_app_savedview' in query['sql']]
+
+    def test_task_changes_skip_users_without_views(self):
+        other = User.objects.create_user(username='noviews@example.com', email='noviews@example.com', password='pw')
+        board = KanbanBoard.objects.create(title='No views', owner=other)
+        board.members.add(other)
+
+        def change():
+            task = Task.objects.create(board=board, title='Unseen', assignee=other, created_by=other)
+            Comment.objects.create(task=task, author=other, content='Comment')
+        self.assertEqual(self.saved_view_queries(change), [])
+
+        SavedView.objects.all().delete()
+        self.assertEqual(self.saved_view_queries(lambda: Task.objects.create(board=self.board, title='Unseen', created_by=self.owner)), [])
+
+    def test_unchanged_views_are_not_locked(self):
+        self.client.get(reverse('saved-view-tasks', args=[self.view.id]))
+        self.assertEqual(len(self.saved_view_queries(self.urgent.save)), 1)
+
+        self.urgent.title = 'Very urgent'
+        self.assertEqual(len(self.saved_view_queries(self.urgent.save)), 2)
+        self.assertEqual([task['title'] for task in self.client.get(reverse('saved-view-tasks', args=[self.view.id])).data], ['Very urgent'])
+
+
+class StreamedTaskListTests(APITestCase):
+    """
+    Streamed task lists return the same tasks as the serialized list with a single query.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='stream@example.com', email='stream@example.com', password='pw', first_name='Stream')
+        self.client.force_authenticate(self.user)
+        board = KanbanBoard.objects.create(title='Stream', owner=self.user)
+        board.members.add(self.user)
+        for i in range(5):
+            task = Task.objects.create(board=board, title=f'Task {i}', assignee=self.user, reviewer_id=self.user if i % 2 else None, created_by=self.user)
+            for _ in range(i % 3):
+                Comment.objects.create(task=task, author=self.user, content='Comment')
+
+    def get_streamed(self, params):
+        response = self.client.get(reverse('tasks-assigned-to-me'), params)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_streamed_list_matches_serialized_list(self):
+        serialized = json.loads(self.client.get(reverse('tasks-assigned-to-me')).content)
+        self.assertEqual(self.get_streamed({'stream': 'true'}), sorted(serialized, key=lambda task: task['id']))
+
+        normalized = json.loads(self.client.get(reverse('tasks-assigned-to-me'), {'normalize': 'true'}).content)
+        streamed = self.get_streamed({'stream': 'true', 'normalize': 'true'})
+        self.assertEqual(streamed['results'], sorted(normalized['results'], key=lambda task: task['id']))
+        self.assertEqual(streamed['users'], normalized['users'])
+
+    def test_streamed_list_uses_one_query(self):
+        response = self.client.get(reverse('tasks-assigned-to-me'), {'stream': 'true'})
+        with CaptureQueriesContext(connection) as queries:
+            tasks = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(tasks), 5)
+        self.assertEqual(len(queries), 1)
+
+    async def test_streamed_list_under_asgi(self):
+        token = await Token.objects.acreate(user=self.user)
+        for params in ({'stream': 'true'}, {'stream': 'true', 'normalize': 'true'}):
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                response = await self.async_client.get(reverse('tasks-assigned-to-me'), params, headers={'Authorization': f'Token {token.key}'})
+                self.assertTrue(response.is_async)
+                streamed = json.loads(b''.join([chunk async for chunk in response]))
+            self.assertEqual(streamed, await sync_to_async(self.get_streamed)(params))
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=100)
+class ResponseCompressionTests(APITestCase):
+    """
+    JSON responses above the size cutoff are compressed with the best encoding the client accepts.
+    """
+    databases = '__all__'
+    payload = {'tasks': [{'id': i, 'title': 'Compressible task'} for i in range(20)]}
+
+    def respond(self, accept_encoding, response=None, without_brotli=False):
+        response = response or JsonResponse(self.payload)
+        request = RequestFactory().get('/api/boards/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        if without_brotli:
+            with mock.patch('core.middleware.brotli', None):
+                return middleware(request)
+        return middleware(request)
+
+    def test_gzip_is_used_without_brotli(self):
+        response = self.respond('gzip, deflate', without_brotli=True)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @skipUnless(importlib.util.find_spec('brotli'), 'brotli is not installed')
+    def test_brotli_is_preferred_when_installed(self):
+        import brotli
+        response = self.respond('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content)), self.payload)
+        self.assertEqual(self.respond('br;q=0, gzip')['Content-Encoding'], 'gzip')
+        self.assertEqual(self.respond('*')['Content-Encoding'], 'br')
+
+    def test_negotiation_honors_q_zero_and_wildcards(self):
+        cases = {
+            '': None,
+            'identity': None,
+            'gzip;q=0': None,
+            'gzip;q=0.5': 'gzip',
+            '*': 'gzip',
+            '*, gzip;q=0': None,
+            'gzip;q=invalid': None,
+        }
+        for accept_encoding, encoding in cases.items():
+            response = self.respond(accept_encoding, without_brotli=True)
+            self.assertEqual(response.get('Content-Encoding'), encoding, accept_encoding)
+
+    def test_small_streamed_and_other_responses_are_left_alone(self):
+        small = self.respond('gzip', JsonResponse({'id': 1}))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', small['Vary'])
+        streamed = self.respond('gzip', StreamingHttpResponse(iter([b'{}'] * 100), content_type='application/json'))
+        self.assertFalse(streamed.has_header('Content-Encoding'))
+        html = self.respond('gzip', JsonResponse(self.payload, content_type='text/html'))
+        self.assertFalse(html.has_header('Content-Encoding'))
+
+    def test_strong_etags_become_weak_on_compressed_responses(self):
+        response = JsonResponse(self.payload)
+        response['ETag'] = '"3"'
+        self.assertEqual(self.respond('gzip', response, without_brotli=True)['ETag'], 'W/"3"')
+        response = JsonResponse({'id': 1})
+        response['ETag'] = '"3"'
+        self.assertEqual(self.respond('gzip', response)['ETag'], '"3"')
+
+    def test_api_responses_are_compressed(self):
+        user = User.objects.create_user(username='compress@example.com', email='compress@example.com', password='pw')
+        self.client.force_authenticate(user)
+        for i in range(10):
+            KanbanBoard.objects.create(title=f'Board {i}', owner=user)
+        response = self.client.get(reverse('boards'), HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 10)
+
+
+@override_settings(ROOT_URLCONF=settings_api.ROOT_URLCONF, MIDDLEWARE=settings_api.MIDDLEWARE, REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+class ApiProfileTests(APITestCase):
+    """
+    The API-only profile serves the token-authenticated JSON API without admin, sessions or form parsing.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        # Views read the default renderers and parsers on import, so they are set as a worker with core.settings_api would.
+        for attribute, setting in (('renderer_classes', 'DEFAULT_RENDERER_CLASSES'), ('parser_classes', 'DEFAULT_PARSER_CLASSES')):
+            classes = [import_string(path) for path in settings_api.REST_FRAMEWORK[setting]]
+            patcher = mock.patch.object(APIView, attribute, classes)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='api@example.com', email='api@example.com', password='pw')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_token_authenticated_json_requests(self):
+        response = self.client.post('/api/boards/', {'title': 'API', 'members': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        response = self.client.get('/api/boards/')
+        self.assertEqual([board['title'] for board in response.json()], ['API'])
+
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/boards/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_form_posts_and_the_browsable_api_are_rejected(self):
+        response = self.client.post('/api/boards/', {'title': 'Form'})
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        response = self.client.post('/api/boards/', 'title=Form', content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertEqual(self.client.get('/api/boards/', HTTP_ACCEPT='text/html').status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertFalse(KanbanBoard.objects.exists())
+
+    def test_admin_and_login_views_are_not_routed(self):
+        self.assertEqual(self.client.get('/admin/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api-auth/login/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class NormalizedResponseTests(APITestCase):
+    """
+    With ?normalize=true users are side-loaded once and referenced by id.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='norm@example.com', email='norm@example.com', password='pw', first_name='Norm')
+        self.member = User.objects.create_user(username='mal@example.com', email='mal@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Normalized', owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+        self.task = Task.objects.create(board=self.board, title='Shared', assignee=self.owner, reviewer_id=self.member, created_by=self.owner)
+        Task.objects.create(board=self.board, title='Unassigned', created_by=self.owner)
+
+    def test_board_detail_references_users_by_id(self):
+        url = reverse('board-detail', args=[self.board.id])
+        nested = self.client.get(url).data
+        normalized = self.client.get(url, {'normalize': 'true'}).data
+        users = {str(user['id']): user for user in nested['members']}
+        self.assertEqual(normalized['users'], users)
+        self.assertEqual(normalized['members'], [user['id'] for user in nested['members']])
+        self.assertEqual(
+            [(task['assignee'], task['reviewer']) for task in normalized['tasks']],
+            [(task['assignee'] and task['assignee']['id'], task['reviewer'] and task['reviewer']['id']) for task in nested['tasks']],
+        )
+        self.assertEqual({key: value for key, value in normalized.items() if key not in ('members', 'tasks', 'users')},
+                         {key: value for key, value in nested.items() if key not in ('members', 'tasks')})
+
+    def test_task_lists_side_load_users(self):
+        response = self.client.get(reverse('tasks-assigned-to-me'), {'normalize': 'true'})
+        self.assertEqual(set(response.data), {'results', 'users'})
+        self.assertEqual([(task['id'], task['assignee'], task['reviewer']) for task in response.data['results']], [(self.task.id, self.owner.id, self.member.id)])
+        self.assertEqual(set(response.data['users']), {str(self.owner.id), str(self.member.id)})
+        self.assertEqual(response.data['users'][str(self.owner.id)]['fullname'], 'Norm')
+
+
+class StubWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    status_code = 204
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.received.append((dict(self.headers), body))
+        self.send_response(self.status_code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class BlockedWebhookHandler(StubWebhookHandler):
+    release = threading.Event()
+
+    def do_POST(self):
+        self.release.wait(5)
+        super().do_POST()
+
+
+@override_settings(
+    KANBAN_WEBHOOK_BACKGROUND=False, KANBAN_WEBHOOK_BACKOFF=0, KANBAN_WEBHOOK_MAX_ATTEMPTS=2,
+    KANBAN_WEBHOOK_ALLOWED_NETWORKS=['127.0.0.1/32'],
+)
+class WebhookDeliveryTests(APITestCase):
+    """
+    Board events are delivered after commit in signed batches to a local stub server,
+    failing batches are retried and end up as dead letters. Internal addresses are
+    refused unless allowed, and a slow host does not hold up the others.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubWebhookHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubWebhookHandler.received = []
+        StubWebhookHandler.status_code = 204
+        self.dispatcher = WebhookDispatcher()
+        patcher = mock.patch('kanban_app.webhooks.dispatcher', self.dispatcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.owner = User.objects.create_user(username='hooks@example.com', email='hooks@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+        self.board = KanbanBoard.objects.create(title='Hooks', owner=self.owner)
+        response = self.client.post(
+            reverse('board-webhooks', args=[self.board.id]),
+            {'url': f'http://127.0.0.1:{self.server.server_port}/hook', 'events': ['task.created', 'comment.created']},
+            format='json',
+        )
+        self.subscription = WebhookSubscription.objects.get(pk=response.data['id'])
+
+    def create_task_with_comment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = self.client.post(reverse('tasks-list'), {'board': self.board.id, 'title': 'Task'}, format='json').data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task-comments', args=[task_id]), {'content': 'Comment'}, format='json')
+            self.client.patch(reverse('task-detail', args=[task_id]), {'title': 'Renamed'}, format='json')
+        return task_id
+
+    def test_events_are_delivered_in_one_signed_batch(self):
+        task_id = self.create_task_with_comment()
+        self.assertEqual(StubWebhookHandler.received, [])
+
+        self.assertEqual(self.dispatcher.step(), 1)
+
+        [(headers, body)] = StubWebhookHandler.received
+        expected = 'sha256=' + hmac.new(self.subscription.secret.encode(), body, hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-KanMind-Signature'], expected)
+        events = json.loads(body)['events']
+        self.assertEqual([event['type'] for event in events], ['task.created', 'comment.created'])
+        self.assertEqual(events[0]['data']['id'], task_id)
+
+    def test_failed_batches_are_retried_and_dead_lettered(self):
+        StubWebhookHandler.status_code = 500
+        self.create_task_with_comment()
+
+        with self.assertLogs('kanban_app.webhooks', 'WARNING') as logs:
+            self.dispatcher.step()
+
+        self.assertEqual(logs.output, [f'WARNING:kanban_app.webhooks:Webhook {self.subscription.pk} gave up after 2 attempts: HTTP 500'])
+        self.assertEqual(self.dispatcher.retries, [])
+        dead_letter = WebhookDeadLetter.objects.get()
+        self.assertEqual((dead_letter.attempts, dead_letter.last_error), (2, 'HTTP 500'))
+        self.assertEqual(len(StubWebhookHandler.received), 2)
+
+        StubWebhookHandler.status_code = 204
+        self.assertTrue(replay_dead_letter(dead_letter))
+        self.assertFalse(WebhookDeadLetter.objects.exists())
+
+    def test_internal_addresses_are_refused(self):
+        url = reverse('board-webhooks', args=[self.board.id])
+        with override_settings(KANBAN_WEBHOOK_ALLOWED_NETWORKS=[]):
+            for target in ('http://127.0.0.1:8000/hook', 'http://169.254.169.254/latest/meta-data/', 'http://10.0.0.5/', 'http://[::1]/', 'ftp://example.com/'):
+                response = self.client.post(url, {'url': target}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, target)
+                self.assertIn('url', response.data)
+
+            with self.assertRaises(DeliveryError):
+                self.dispatcher.post(self.subscription.url, b'{}', {})
+        self.assertEqual(StubWebhookHandler.received, [])
+
+    def test_slow_host_does_not_hold_up_other_hosts(self):
+        blocked = ThreadingHTTPServer(('127.0.0.1', 0), BlockedWebhookHandler)
+        threading.Thread(target=blocked.serve_forever, daemon=True).start()
+        BlockedWebhookHandler.release.clear()
+        self.addCleanup(blocked.server_close)
+        self.addCleanup(blocked.shutdown)
+        self.addCleanup(BlockedWebhookHandler.release.set)
+
+        def batch(url):
+            return Batch(due=0, sequence=0, subscription_id=self.subscription.pk, shard='default', url=url, secret='secret', events=[{'type': 'task.created'}])
+
+        with override_settings(KANBAN_WEBHOOK_BACKGROUND=True):
+            self.dispatcher.start_workers()
+            self.dispatcher.submit(batch(f'http://127.0.0.1:{blocked.server_port}/hook'))
+            self.dispatcher.submit(batch(self.subscription.url))
+            deadline = time.monotonic() + 3
+            while not StubWebhookHandler.received and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(StubWebhookHandler.received), 1)
+
+            BlockedWebhookHandler.release.set()
+            while len(StubWebhookHandler.received) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(len(StubWebhookHandler.received), 2)
+
+
+class BoardShardingTests(APITestCase):
+    """
+    Boards are created on their owner's shard, found by id range or routing index,
+    and keep their ids when moved to another shard.
+    Without KANMIND_SHARDS the class adds two in-memory SQLite shards of its own.
+    """
+    databases = '__all__'
+    test_shards = ['test_shard_1', 'test_shard_2']
+
+    @classmethod
+    def setUpClass(cls):
+        if len(settings.KANBAN_SHARDS) == 1:
+            cls.add_test_shards()
+        super().setUpClass()
+
+    @classmethod
+    def add_test_shards(cls):
+        databases = {alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'} for alias in [DEFAULT_DB_ALIAS, *cls.test_shards]}
+        databases = {alias: database for alias, database in connections.configure_settings(databases).items() if alias in cls.test_shards}
+        shard_settings = override_settings(KANBAN_SHARDS=[*settings.KANBAN_SHARDS, *cls.test_shards], DATABASES={**settings.DATABASES, **databases})
+        with warnings.catch_warnings():
+            # Only the aliases added below are used, existing connections stay as they are.
+            warnings.filterwarnings('ignore', 'Overriding setting DATABASES', UserWarning)
+            shard_settings.enable()
+        cls.addClassCleanup(shard_settings.disable)
+        for alias in cls.test_shards:
+            connections.settings[alias] = databases[alias]
+            cls.addClassCleanup(cls.remove_test_shard, alias)
+            connections[alias].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    @staticmethod
+    def remove_test_shard(alias):
+        connections[alias].creation.destroy_test_db(verbosity=0)
+        del connections[alias]
+        del connections.settings[alias]
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='sharded@example.com', email='sharded@example.com', password='pw')
+        self.client.force_authenticate(self.owner)
+
+    def create_board_with_task(self):
+        board_id = self.client.post(reverse('boards'), {'title': 'Sharded', 'members': []}, format='json').data['id']
+        task_id = self.client.post(reverse('tasks-list'), {'board': board_id, 'title': 'Task'}, format='json').data['id']
+        self.client.post(reverse('task-comments', args=[task_id]), {'content': 'Comment'}, format='json')
+        return board_id, task_id
+
+    def test_users_are_mirrored_into_every_shard(self):
+        for alias in settings.KANBAN_SHARDS:
+            self.assertTrue(User.objects.using(alias).filter(pk=self.owner.pk).exists(), alias)
+
+    def test_board_is_created_on_the_owner_shard_in_its_id_range(self):
+        board_id, task_id = self.create_board_with_task()
+        shard = settings.KANBAN_SHARDS[self.owner.pk % len(settings.KANBAN_SHARDS)]
+        self.assertEqual(resolve_shard('board', board_id), shard)
+        self.assertEqual(resolve_shard('task', task_id), shard)
+        self.assertEqual(board_id // SHARD_ID_SPAN, settings.KANBAN_SHARDS.index(shard))
+
+        response = self.client.get(reverse('board-detail', args=[board_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [task_id])
+
+    def test_moved_board_keeps_ids_and_is_routed_to_the_target(self):
+        board_id, task_id = self.create_board_with_task()
+        source = resolve_shard('board', board_id)
+        target = next(alias for alias in settings.KANBAN_SHARDS if alias != source)
+
+        move_board(board_id, target)
+
+        self.assertEqual(resolve_shard('board', board_id), target)
+        self.assertEqual(resolve_shard('task', task_id), target)
+        self.assertFalse(KanbanBoard.all_objects.using(source).filter(pk=board_id).exists())
+        self.assertEqual(Comment.objects.using(target).filter(task_id=task_id).count(), 1)
+
+        response = self.client.get(reverse('task-detail', args=[task_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('boards'))
+        self.assertEqual([board['id'] for board in response.data], [board_id])
+
+    def test_lists_are_merged_across_shards_by_id(self):
+        board_ids = [self.client.post(reverse('boards'), {'title': f'Board {i}', 'members': [self.owner.id]}, format='json').data['id'] for i in range(3)]
+        for board_id, alias in zip(board_ids, reversed(settings.KANBAN_SHARDS[:3])):
+            move_board(board_id, alias)
+            response = self.client.post(reverse('tasks-list'), {'board': board_id, 'title': 'Task', 'assignee_id': self.owner.id}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        self.assertEqual([board['id'] for board in self.client.get(reverse('boards')).data], board_ids)
+        tasks = self.client.get(reverse('tasks-assigned-to-me')).data
+        self.assertEqual(sorted(task['board'] for task in tasks), board_ids)
+        self.assertEqual([task['id'] for task in tasks], sorted(task['id'] for task in tasks))
+        normalized = self.client.get(reverse('tasks-assigned-to-me'), {'normalize': 'true'}).data
+        self.assertEqual([task['id'] for task in normalized['results']], [task['id'] for task in tasks])
+
+        with mock.patch.object(BoardsView, 'pagination_class', LimitOffsetPagination):
+            first = self.client.get(reverse('boards'), {'limit': 2}).data
+            second = self.client.get(first['next']).data
+        self.assertEqual(first['count'], 3)
+        self.assertEqual([board['id'] for board in first['results'] + second['results']], board_ids)
+
+    def test_deleting_a_user_removes_the_mirrors_and_saved_views(self):
+        user_id = self.owner.pk
+        board_id, _ = self.create_board_with_task()
+        SavedView.objects.create(user=self.owner, name='Mine', filters={'scope': 'assigned'})
+
+        self.owner.delete()
+
+        for alias in settings.KANBAN_SHARDS:
+            self.assertFalse(User.objects.using(alias).filter(pk=user_id).exists(), alias)
+        self.assertFalse(KanbanBoard.all_objects.using(resolve_shard('board', board_id)).filter(pk=board_id).exists())
+        self.assertFalse(SavedView.objects.filter(user_id=user_id).exists())
+
+
+class MetricsTests(APITestCase):
+    """
+    The metrics endpoint is staff only and renders the registry in the Prometheus
+    text format, adding up the snapshots of all worker processes.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='metrics@example.com', email='metrics@example.com', password='pw', is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    def test_metrics_count_requests_and_are_staff_only(self):
+        self.client.get(reverse('boards'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('kanmind_http_requests_total{view="BoardsView",method="GET",status="200"}', body)
+        self.assertIn('kanmind_db_queries_total{database="default",statement="SELECT"}', body)
+
+        member = User.objects.create_user(username='member@example.com', email='member@example.com', password='pw')
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_snapshots_of_worker_processes_are_added_up(self):
+        registry = Registry()
+        requests = registry.counter('requests_total', 'Requests.', ('view',))
+        duration = registry.histogram('duration_seconds', 'Duration.', buckets=(0.1, 1.0))
+        registry.gauge('queue_depth', 'Queue depth.', lambda: 3)
+        requests.inc('BoardsView', amount=2)
+        duration.observe(0.05)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(KANBAN_METRICS_DIR=directory):
+            exited_worker = 2 ** 22 + 1
+            with open(os.path.join(directory, f'metrics-{exited_worker}.json'), 'w') as file:
+                json.dump({'pid': exited_worker, 'metrics': registry.snapshot()}, file)
+            body = registry.render()
+
+        self.assertIn('requests_total{view="BoardsView"} 4', body)
+        self.assertIn('duration_seconds_bucket{le="0.1"} 2', body)
+        self.assertIn('duration_seconds_count 2', body)
+        self.assertIn('queue_depth 3', body)
+
+    def test_processes_with_the_same_pid_keep_their_own_snapshots(self):
+        workers = [Registry(), Registry()]
+        for worker in workers:
+            worker.counter('requests_total', 'Requests.').inc()
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(KANBAN_METRICS_DIR=directory):
+            for worker in workers:
+                worker.flush()
+            self.assertEqual(len(os.listdir(directory)), 2)
+            self.assertIn('requests_total 2', Registry().render())
+
+    def test_compact_folds_exited_processes_into_one_file(self):
+        worker = Registry()
+        worker.counter('requests_total', 'Requests.', ('view',)).inc('BoardsView', amount=2)
+        worker.gauge('queue_depth', 'Queue depth.', lambda: 3)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(KANBAN_METRICS_DIR=directory):
+            for exited_worker in (2 ** 22 + 1, 2 ** 22 + 2):
+                path = os.path.join(directory, f'metrics-{exited_worker}-0a1b2c3d.json')
+                with open(path, 'w') as file:
+                    json.dump({'pid': exited_worker, 'metrics': worker.snapshot()}, file)
+            recent = os.path.join(directory, 'metrics-4194307-0a1b2c3d.json')
+            with open(recent, 'w') as file:
+                json.dump({'pid': 2 ** 22 + 3, 'metrics': worker.snapshot()}, file)
+            for path in os.listdir(directory):
+                if path != os.path.basename(recent):
+                    os.utime(os.path.join(directory, path), (0, 0))
+
+            output = StringIO()
+            call_command('compact_metrics', stdout=output)
+            self.assertIn('Folded 2 snapshot(s)', output.getvalue())
+            self.assertEqual(sorted(os.listdir(directory)), ['metrics-4194307-0a1b2c3d.json', 'metrics-exited.json'])
+            self.assertIn('requests_total{view="BoardsView"} 6', Registry().render())
+
+            os.utime(recent, (0, 0))
+            self.assertEqual(Registry().compact(), 1)
+            body = Registry().render()
+        self.assertIn('requests_total{view="BoardsView"} 6', body)
+        self.assertNotIn('queue_depth', body)
+
+
+class RegistrationTests(APITestCase):
+    """
+    Duplicate registrations are rejected before the password is hashed, and logins
+    rehash passwords stored with another hasher profile.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.addCleanup(caches[settings.THROTTLE_CACHE_ALIAS].clear)
+        User.objects.create_user(username='taken@example.com', email='taken@example.com', password='secret-pw')
+
+    def register(self, email):
+        return self.client.post(reverse('registration'), {
+            'fullname': 'New User', 'email': email, 'password': 'secret-pw', 'repeated_password': 'secret-pw',
+        }, format='json')
+
+    def test_duplicate_email_is_rejected_without_hashing(self):
+        with mock.patch('django.contrib.auth.models.make_password', wraps=make_password) as hash_password:
+            response = self.register('taken@example.com')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['email'], ['Email already exists'])
+        hash_password.assert_not_called()
+
+        response = self.register('new@example.com')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Token.objects.filter(user_id=response.data['user_id'], key=response.data['token']).exists())
+
+    def test_insert_conflicts_are_reported_by_cause(self):
+        data = {'fullname': 'New User', 'email': 'taken@example.com', 'password': 'secret-pw', 'repeated_password': 'secret-pw'}
+        with self.assertRaises(ValidationError) as raised:
+            RegistrationSerializer().create(dict(data))
+        self.assertEqual(raised.exception.detail['email'], ['Email already exists'])
+
+        User.objects.create_user(username='legacy@example.com', email='other@example.com', password='secret-pw')
+        response = self.register('legacy@example.com')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['email'], ['Email is already used as a username'])
+
+    def test_login_rehashes_with_the_configured_profile(self):
+        profiles = settings.PASSWORD_HASHER_PROFILES
+        for profile, hasher in profiles.items():
+            with self.subTest(profile=profile):
+                if profile == 'argon2' and importlib.util.find_spec('argon2') is None:
+                    self.skipTest('argon2-cffi is not installed')
+                hashers = [hasher, *(other for name, other in profiles.items() if name != profile), 'django.contrib.auth.hashers.MD5PasswordHasher']
+                with override_settings(PASSWORD_HASHERS=hashers):
+                    email = f'{profile}@example.com'
+                    user = User.objects.create_user(username=email, email=email)
+                    User.objects.filter(pk=user.pk).update(password=make_password('secret-pw', hasher='md5'))
+
+                    response = self.client.post(reverse('login'), {'email': email, 'password': 'secret-pw'}, format='json')
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    user.refresh_from_db()
+                    self.assertEqual(identify_hasher(user.password).algorithm, import_string(hasher).algorithm)
+                    self.assertTrue(user.check_password('secret-pw'))
+
+
+class EmailCheckTests(APITestCase):
+    """
+    Email checks match case-insensitively, resolve batches in one query, cache misses
+    briefly and charge one throttle token per checked address.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(caches[settings.THROTTLE_CACHE_ALIAS].clear)
+        self.user = User.objects.create_user(username='checker@example.com', email='checker@example.com', password='pw')
+        self.anna = User.objects.create_user(username='anna@example.com', email='anna@example.com', password='pw', first_name='Anna', last_name='Smith')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('email-check')
+
+    def test_single_lookup_is_case_insensitive(self):
+        response = self.client.get(self.url, {'email': ' ANNA@Example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['id'], response.data['fullname']), (self.anna.id, 'Anna Smith'))
+
+        self.assertEqual(self.client.get(self.url, {'email': 'ben@example.com'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_lookup_lists_found_and_missing_addresses(self):
+        emails = ['Anna@example.com', 'ben@example.com', 'Anna@example.com']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'emails': emails}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'found': [{'id': self.anna.id, 'email': 'Anna@example.com', 'fullname': 'Anna Smith'}],
+            'missing': ['ben@example.com'],
+        })
+        self.assertEqual(len([query for query in queries.captured_queries if 'auth_user' in query['sql'] and 'LOWER' in query['sql']]), 1)
+
+    def test_batch_limit_and_malformed_bodies_are_rejected(self):
+        limit = settings.EMAIL_CHECK_BATCH_LIMIT
+        for body in ({'emails': [f'user{i}@example.com' for i in range(limit + 1)]}, {'emails': []}, {'emails': [1]}, ['anna@example.com']):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_misses_are_cached_until_registration(self):
+        self.assertEqual(self.client.get(self.url, {'email': 'ben@example.com'}).status_code, status.HTTP_404_NOT_FOUND)
+        User.objects.create_user(username='ben@example.com', email='ben@example.com', password='pw')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url, {'email': 'ben@example.com'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse([query for query in queries.captured_queries if 'LOWER' in query['sql']])
+
+        self.assertEqual(self.client.get(self.url, {'email': 'cleo@example.com'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.post(reverse('registration'), {
+            'fullname': 'Cleo', 'email': 'cleo@example.com', 'password': 'secret-pw', 'repeated_password': 'secret-pw',
+        }, format='json')
+        self.assertEqual(self.client.get(self.url, {'email': 'cleo@example.com'}).status_code, status.HTTP_200_OK)
+
+    def test_batches_cost_one_token_per_address(self):
+        throttle = EmailCheckRateThrottle()
+        self.client.post(self.url, {'emails': ['a@example.com', 'b@example.com', 'c@example.com']}, format='json')
+        tokens, _ = caches[settings.THROTTLE_CACHE_ALIAS].get(throttle.format_key(self.user.pk))
+        self.assertAlmostEqual(tokens, throttle.capacity - 3, delta=0.5)
+
+
+class ThrottleTests(APITestCase):
+    """
+    Token buckets are updated under a lock that is never waited for, the account
+    login limit counts attempts from every address, and oversized email batches are
+    rejected before they are charged.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.throttle_cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        self.throttle_cache.clear()
+        self.addCleanup(self.throttle_cache.clear)
+
+    def test_concurrent_requests_cannot_overspend_a_bucket(self):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        barrier = threading.Barrier(20)
+        allowed = []
+        slow_get = LocMemCache.get
+
+        def get(cache, *args, **kwargs):
+            value = slow_get(cache, *args, **kwargs)
+            time.sleep(0.005)
+            return value
+
+        def attempt():
+            throttle = LoginRateThrottle()
+            barrier.wait()
+            allowed.append(throttle.allow_request(request, None))
+
+        with mock.patch.object(LocMemCache, 'get', get):
+            threads = [threading.Thread(target=attempt) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        throttle = LoginRateThrottle()
+        tokens, _ = self.throttle_cache.get(throttle.get_cache_key(request, None))
+        self.assertGreater(allowed.count(True), 0)
+        self.assertAlmostEqual(tokens, throttle.capacity - allowed.count(True), delta=0.5)
+
+    def test_held_locks_are_not_waited_for_or_released(self):
+        user = User.objects.create_user(username='quota@example.com', email='quota@example.com', password='pw')
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        request.user = user
+        for throttle, allowed in ((UserQuotaThrottle(), True), (LoginRateThrottle(), False)):
+            lock_key = f'{throttle.get_cache_key(request, None)}_lock'
+            self.throttle_cache.set(lock_key, 'other', 60)
+            with mock.patch('time.sleep') as sleep:
+                self.assertEqual(throttle.allow_request(request, None), allowed)
+            sleep.assert_not_called()
+            self.assertEqual(self.throttle_cache.get(lock_key), 'other')
+            self.assertIsNone(self.throttle_cache.get(throttle.get_cache_key(request, None)))
+
+    def test_account_limit_counts_attempts_from_every_address(self):
+        User.objects.create_user(username='victim@example.com', email='victim@example.com', password='secret')
+        url = reverse('login')
+        for i in range(LoginAccountRateThrottle().capacity):
+            response = self.client.post(url, {'email': ' Victim@example.com', 'password': 'wrong'}, REMOTE_ADDR=f'10.0.{i}.1')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {'email': 'victim@example.com', 'password': 'wrong'}, REMOTE_ADDR='10.1.0.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_login_rejects_bodies_that_are_not_objects(self):
+        response = self.client.post(reverse('login'), ['victim@example.com'], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_oversized_email_batches_are_rejected_before_throttling(self):
+        user = User.objects.create_user(username='checker@example.com', email='checker@example.com', password='pw')
+        self.client.force_authenticate(user)
+        url = reverse('email-check')
+        emails = [f'user{i}@example.com' for i in range(100)]
+
+        response = self.client.post(url, {'emails': emails}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+        response = self.client.post(url, {'emails': emails[:settings.EMAIL_CHECK_BATCH_LIMIT]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['missing']), settings.EMAIL_CHECK_BATCH_LIMIT)
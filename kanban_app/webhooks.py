@@ -0,0 +1,434 @@
+import hashlib
+import heapq
+import hmac
+import http.client
+import ipaddress
+import itertools
+import json
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.metrics import registry
+from kanban_app.models import WebhookDeadLetter, WebhookSubscription
+from kanban_app.sharding import current_shard, use_shard
+
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = [
+    'board.updated', 'board.members_changed',
+    'task.created', 'task.updated', 'task.deleted',
+    'comment.created', 'comment.updated', 'comment.deleted',
+]
+SIGNATURE_HEADER = 'X-KanMind-Signature'
+
+EVENTS_DROPPED = registry.counter('kanmind_webhook_events_dropped_total', 'Webhook events dropped because the queue was full.')
+DELIVERIES = registry.counter('kanmind_webhook_deliveries_total', 'Webhook batch deliveries by result (delivered, retry, dead_letter).', ('result',))
+
+
+class DeliveryError(Exception):
+    """Raised when an endpoint cannot be reached or does not answer with 2xx."""
+
+
+def webhook_setting(name, default):
+    return getattr(settings, f'KANBAN_WEBHOOK_{name}', default)
+
+
+def resolve_destination(url):
+    """
+    Resolve the host of a webhook URL and check that it is a public address.
+    Loopback, private, link-local, reserved and multicast addresses (e.g. 127.0.0.1 or the
+    169.254.169.254 metadata service) are refused unless they are in one of the networks
+    of KANBAN_WEBHOOK_ALLOWED_NETWORKS, so subscriptions cannot reach internal services.
+    Returns:
+        str: The first address of the host, connections are made to it
+    Raises:
+        DeliveryError: If the URL is not http(s), the host does not resolve or an address is refused
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise DeliveryError("Only http and https URLs are supported.")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except ValueError as exc:
+        raise DeliveryError(f"Invalid URL: {exc}") from exc
+    except (OSError, UnicodeError) as exc:
+        raise DeliveryError(f"Host '{parts.hostname}' could not be resolved.") from exc
+
+    allowed = [ipaddress.ip_network(network) for network in webhook_setting('ALLOWED_NETWORKS', ())]
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if any(address in network for network in allowed):
+            continue
+        if not address.is_global or address.is_multicast:
+            raise DeliveryError(f"Host '{parts.hostname}' resolves to the non-public address {address}.")
+    return infos[0][4][0]
+
+
+def connection_key(url):
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+def sign(secret, body):
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def emit(event_type, board_id, data, using=None):
+    """
+    Queue a board event for delivery once the current transaction commits.
+    Only builds the event and puts it on an in-memory queue, subscriptions are
+    resolved and requests are sent by the dispatcher thread.
+    Args:
+        event_type: One of EVENT_TYPES
+        board_id: Primary key of the board
+        data: JSON serializable event data
+        using: Database alias of the transaction, defaults to the current shard
+    """
+    using = using or current_shard()
+    event = {
+        'id': str(uuid.uuid4()),
+        'type': event_type,
+        'board': board_id,
+        'occurred_at': timezone.now(),
+        'data': data,
+    }
+    transaction.on_commit(lambda: dispatcher.enqueue(event, using), using=using)
+
+
+def task_data(task):
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'status': task.status,
+        'priority': task.priority,
+        'assignee_id': task.assignee_id,
+        'reviewer_id': task.reviewer_id_id,
+        'due_date': task.due_date,
+        'rank': task.rank,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'task': comment.task_id,
+        'author_id': comment.author_id,
+        'content': comment.content,
+        'created_at': comment.created_at,
+    }
+
+
+def board_data(board):
+    return {
+        'id': board.pk,
+        'title': board.title,
+        'owner_id': board.owner_id,
+    }
+
+
+@dataclass(order=True)
+class Batch:
+    """Events for one subscription, delivered in a single request."""
+    due: float
+    sequence: int
+    subscription_id: int = field(compare=False)
+    shard: str = field(compare=False)
+    url: str = field(compare=False)
+    secret: str = field(compare=False)
+    events: list = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    last_error: str = field(default='', compare=False)
+
+
+class WebhookDispatcher:
+    """
+    Delivers queued board events to webhook subscriptions from background threads.
+    Events are collected for up to KANBAN_WEBHOOK_BATCH_WINDOW seconds and sent as one
+    request per subscription. Failed batches are retried with exponential backoff and
+    stored as WebhookDeadLetter rows after KANBAN_WEBHOOK_MAX_ATTEMPTS.
+    The dispatcher thread only matches events to subscriptions; the requests are made by
+    KANBAN_WEBHOOK_WORKERS worker threads. The batches of one host are sent in order by
+    one worker at a time over a kept-alive connection, different hosts in parallel, so a
+    slow or unreachable endpoint only holds up its own deliveries.
+    With KANBAN_WEBHOOK_BACKGROUND disabled no thread is started and step() delivers the
+    queued events in the calling thread.
+    """
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=webhook_setting('QUEUE_SIZE', 10000))
+        self.retries = []
+        self.connections = {}
+        self.sequence = itertools.count()
+        self.thread = None
+        self.workers = []
+        self.pending = {}
+        self.ready = queue.Queue()
+        self.lock = threading.Lock()
+
+    def enqueue(self, event, shard=None):
+        """Add an event without ever blocking; events are dropped with a warning when the queue is full."""
+        try:
+            self.queue.put_nowait((shard, event))
+        except queue.Full:
+            EVENTS_DROPPED.inc()
+            logger.warning("Webhook queue full, dropped %s event of board %s", event['type'], event['board'])
+            return
+        if webhook_setting('BACKGROUND', True):
+            self.ensure_started()
+
+    def ensure_started(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='webhook-dispatcher', daemon=True)
+                self.thread.start()
+        self.start_workers()
+
+    def start_workers(self):
+        with self.lock:
+            self.workers = [worker for worker in self.workers if worker.is_alive()]
+            while len(self.workers) < webhook_setting('WORKERS', 4):
+                worker = threading.Thread(target=self.work, name=f'webhook-worker-{len(self.workers)}', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def run(self):
+        while True:
+            try:
+                self.step(wait=True)
+            except Exception:
+                logger.exception("Webhook dispatch failed")
+            finally:
+                connections.close_all()
+
+    def step(self, wait=False):
+        """
+        Hand out one batch window of queued events and the retries that are due.
+        Args:
+            wait: Block until an event arrives or the next retry is due
+        Returns:
+            int: Number of batches submitted
+        """
+        events = self.collect(wait)
+        sent = self.dispatch(events) if events else 0
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            while self.retries and self.retries[0].due <= now:
+                due.append(heapq.heappop(self.retries))
+        for batch in due:
+            self.submit(batch)
+        return sent + len(due)
+
+    def collect(self, wait):
+        batch_size = webhook_setting('BATCH_SIZE', 100)
+        window = webhook_setting('BATCH_WINDOW', 1.0)
+        timeout = 0
+        if wait:
+            # Retries are scheduled by the workers, so wake up at least every window to pick them up.
+            with self.lock:
+                next_due = self.retries[0].due if self.retries else None
+            timeout = window if next_due is None else min(window, max(0.0, next_due - time.monotonic()))
+
+        events = []
+        try:
+            events.append(self.queue.get(timeout=timeout) if wait else self.queue.get_nowait())
+        except queue.Empty:
+            return events
+
+        deadline = time.monotonic() + window if wait else 0
+        while len(events) < batch_size * 10:
+            try:
+                remaining = deadline - time.monotonic()
+                events.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def dispatch(self, events):
+        """
+        Match events to active subscriptions, one query per shard, and submit a batch per subscription.
+        """
+        by_shard = {}
+        for shard, event in events:
+            by_shard.setdefault(shard, []).append(event)
+
+        batch_size = webhook_setting('BATCH_SIZE', 100)
+        sent = 0
+        for shard, shard_events in by_shard.items():
+            with use_shard(shard):
+                subscriptions = list(WebhookSubscription.objects.filter(
+                    board_id__in={event['board'] for event in shard_events}, is_active=True,
+                ))
+            for subscription in subscriptions:
+                matching = [
+                    event for event in shard_events
+                    if event['board'] == subscription.board_id and (not subscription.events or event['type'] in subscription.events)
+                ]
+                for start in range(0, len(matching), batch_size):
+                    self.submit(Batch(
+                        due=0, sequence=next(self.sequence), subscription_id=subscription.pk, shard=shard,
+                        url=subscription.url, secret=subscription.secret, events=matching[start:start + batch_size],
+                    ))
+                    sent += 1
+        return sent
+
+    def submit(self, batch):
+        """
+        Queue a batch behind the other batches of its host, or deliver it right away
+        when background delivery is disabled.
+        """
+        if not webhook_setting('BACKGROUND', True):
+            self.deliver(batch)
+            return
+        key = connection_key(batch.url)
+        with self.lock:
+            batches = self.pending.get(key)
+            if batches is not None:
+                batches.append(batch)
+                return
+            self.pending[key] = deque([batch])
+        self.ready.put(key)
+
+    def work(self):
+        """Worker thread: deliver the pending batches of one host at a time."""
+        while True:
+            key = self.ready.get()
+            try:
+                self.drain(key)
+            except Exception:
+                logger.exception("Webhook delivery to %s failed", key[1])
+            finally:
+                connections.close_all()
+
+    def drain(self, key):
+        while True:
+            with self.lock:
+                batches = self.pending[key]
+                if not batches:
+                    del self.pending[key]
+                    return
+                batch = batches.popleft()
+            self.deliver(batch)
+
+    def deliver(self, batch):
+        batch.attempts += 1
+        body = json.dumps({'events': batch.events}, cls=JSONEncoder).encode()
+        try:
+            self.post(batch.url, body, {SIGNATURE_HEADER: sign(batch.secret, body)})
+        except DeliveryError as exc:
+            batch.last_error = str(exc)
+            if batch.attempts >= webhook_setting('MAX_ATTEMPTS', 6):
+                DELIVERIES.inc('dead_letter')
+                self.dead_letter(batch, body)
+            else:
+                DELIVERIES.inc('retry')
+                delay = min(webhook_setting('BACKOFF', 2.0) * 2 ** (batch.attempts - 1), webhook_setting('MAX_BACKOFF', 300))
+                batch.due = time.monotonic() + delay * random.uniform(0.8, 1.2)
+                batch.sequence = next(self.sequence)
+                with self.lock:
+                    heapq.heappush(self.retries, batch)
+                logger.info("Webhook %s failed (%s), retry %s in %.1fs", batch.subscription_id, exc, batch.attempts, delay)
+            return False
+        DELIVERIES.inc('delivered')
+        return True
+
+    def dead_letter(self, batch, body):
+        logger.warning("Webhook %s gave up after %s attempts: %s", batch.subscription_id, batch.attempts, batch.last_error)
+        try:
+            with use_shard(batch.shard):
+                WebhookDeadLetter.objects.create(
+                    subscription_id=batch.subscription_id, payload=json.loads(body),
+                    attempts=batch.attempts, last_error=batch.last_error,
+                )
+        except DatabaseError:
+            logger.exception("Could not store dead letter of webhook %s", batch.subscription_id)
+
+    def post(self, url, body, headers):
+        """
+        POST a JSON body over a kept-alive connection to the endpoint's host.
+        A reused connection that was closed by the server is reopened once.
+        Raises:
+            DeliveryError: On connection errors, timeouts and non-2xx responses
+        """
+        parts = urlsplit(url)
+        key = connection_key(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {'Content-Type': 'application/json', 'User-Agent': 'KanMind-Webhooks', **headers}
+
+        for reused in (key in self.connections, False):
+            connection = self.connections.get(key) or self.connect(url)
+            self.connections[key] = connection
+            try:
+                connection.request('POST', path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as exc:
+                self.close(key)
+                if reused:
+                    continue
+                raise DeliveryError(f"{type(exc).__name__}: {exc}") from exc
+            if response.will_close:
+                self.close(key)
+            if not 200 <= response.status < 300:
+                raise DeliveryError(f"HTTP {response.status}")
+            return response.status
+
+    def connect(self, url):
+        """
+        Open a connection to the checked address of the URL's host. The socket is connected
+        to that address, so the host cannot be re-resolved to an internal one in between;
+        Host header and TLS certificate check still use the host name.
+        """
+        address = resolve_destination(url)
+        parts = urlsplit(url)
+        timeout = webhook_setting('TIMEOUT', 5)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        connection._create_connection = lambda target, *args, **kwargs: socket.create_connection((address, target[1]), *args, **kwargs)
+        return connection
+
+    def close(self, key):
+        connection = self.connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+
+dispatcher = WebhookDispatcher()
+registry.gauge('kanmind_webhook_queue_depth', 'Webhook events waiting in the queue.', dispatcher.queue.qsize)
+registry.gauge('kanmind_webhook_retries_pending', 'Webhook batches waiting for a retry.', lambda: len(dispatcher.retries))
+
+
+def replay_dead_letter(dead_letter):
+    """
+    Redeliver a dead letter once, synchronously. Delivered dead letters are deleted.
+    Returns:
+        bool: True if the endpoint accepted the batch
+    """
+    subscription = dead_letter.subscription
+    body = json.dumps(dead_letter.payload).encode()
+    try:
+        dispatcher.post(subscription.url, body, {SIGNATURE_HEADER: sign(subscription.secret, body)})
+    except DeliveryError as exc:
+        dead_letter.attempts += 1
+        dead_letter.last_error = str(exc)
+        dead_letter.save(update_fields=['attempts', 'last_error'])
+        return False
+    dead_letter.delete()
+    return True